@@ -0,0 +1,238 @@
+# -*- encoding: utf-8 -*-
+"""Asyncio SSH transport.
+
+Asyncio counterpart of :func:`robottelo.ssh.command` which allows running
+thousands of concurrent commands from a single thread::
+
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(asyncio.gather(*(
+        command('subscription-manager identity', hostname=host)
+        for host in hosts
+    )))
+
+The commands return the same :class:`robottelo.ssh.SSHCommandResult` of the
+synchronous transport. Connections are kept open and reused by
+:class:`AsyncSSHConnectionPool`, which also limits the number of commands
+running at the same time.
+
+This module requires Python 3.5 or later and the `asyncssh`_ package, it is
+kept apart from :mod:`robottelo.ssh` which still supports Python 2.
+
+.. _asyncssh: https://asyncssh.readthedocs.io
+"""
+import asyncio
+import logging
+
+from robottelo.config import settings
+from robottelo.ssh import _build_result, _get_credentials
+
+try:
+    import asyncssh
+except ImportError:
+    # Let it fail later if not installed
+    asyncssh = None
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection(object):
+    """A connection of :class:`AsyncSSHConnectionPool` and the number of
+    sessions currently running on it.
+    """
+
+    def __init__(self, key, connecting):
+        self.key = key
+        self.connecting = connecting
+        self.sessions = 0
+        self.broken = False
+
+
+class _Borrowed(object):
+    """Async context manager returned by
+    :meth:`AsyncSSHConnectionPool.connection`.
+    """
+
+    def __init__(self, pool, args):
+        self.pool = pool
+        self.args = args
+        self.pooled = None
+
+    async def __aenter__(self):
+        self.pooled, connection = await self.pool.acquire(*self.args)
+        return connection
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        discard = exc_type is not None and issubclass(
+            exc_type, self.pool.connection_errors)
+        self.pool.release(self.pooled, discard)
+
+
+class AsyncSSHConnectionPool(object):
+    """Pool of asyncio SSH connections.
+
+    SSH multiplexes sessions over a single connection, so each connection is
+    shared by up to ``max_sessions`` commands at the same time and a new
+    connection is only opened when all the connections to the same host are
+    busy. Connections are keyed by hostname, username, password and key
+    filename like :class:`robottelo.ssh.SSHConnectionPool` ones.
+
+    :param int max_concurrency: Maximum number of commands running at the
+        same time on all the hosts, the other commands wait for their turn.
+    :param int max_sessions: Maximum number of sessions running at the same
+        time on a single connection, should not exceed the server sshd
+        ``MaxSessions`` which defaults to 10.
+    """
+
+    #: Errors which indicate that a connection can no longer be trusted and
+    #: should not be reused.
+    connection_errors = (OSError, EOFError, asyncio.TimeoutError)
+    if asyncssh is not None:
+        connection_errors += (asyncssh.Error,)
+
+    def __init__(self, max_concurrency=100, max_sessions=10):
+        self.max_concurrency = max_concurrency
+        self.max_sessions = max_sessions
+        self._connections = {}
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        """The semaphore limiting the running commands, created on first use
+        so it belongs to the running event loop.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @staticmethod
+    async def _connect(hostname, username, password, key_filename, timeout):
+        """Open a new connection."""
+        if asyncssh is None:
+            raise RuntimeError(
+                'Dependency `asyncssh` is not installed! '
+                'run `pip install asyncssh`'
+            )
+        options = {}
+        if key_filename:
+            options['client_keys'] = [key_filename]
+        connection = await asyncio.wait_for(
+            asyncssh.connect(
+                hostname,
+                port=settings.server.ssh_port or 22,
+                username=username,
+                password=password,
+                known_hosts=None,
+                **options
+            ),
+            timeout,
+        )
+        logger.info('Instantiated asyncio SSH connection to %s', hostname)
+        return connection
+
+    async def acquire(self, hostname=None, username=None, password=None,
+                      key_filename=None, timeout=10):
+        """Borrow a session slot on a pooled connection, opening a new
+        connection if all the pooled ones are busy.
+
+        :return: A tuple with the pooled connection, which must be passed to
+            :meth:`release` once the session is done, and the connection.
+        """
+        key = _get_credentials(hostname, username, password, key_filename)
+        pooled = None
+        for candidate in self._connections.get(key, []):
+            if not candidate.broken and candidate.sessions < self.max_sessions:
+                pooled = candidate
+                break
+        if pooled is None:
+            pooled = _PooledConnection(
+                key, asyncio.ensure_future(self._connect(*key, timeout)))
+            self._connections.setdefault(key, []).append(pooled)
+        pooled.sessions += 1
+        try:
+            connection = await asyncio.shield(pooled.connecting)
+        except Exception:
+            self.release(pooled, discard=True)
+            raise
+        return pooled, connection
+
+    def release(self, pooled, discard=False):
+        """Return a session slot borrowed with :meth:`acquire`.
+
+        :param bool discard: Close the connection once its running sessions
+            are done instead of reusing it.
+        """
+        pooled.sessions -= 1
+        if discard and not pooled.broken:
+            pooled.broken = True
+            self._connections[pooled.key].remove(pooled)
+        if pooled.broken and not pooled.sessions:
+            self._close(pooled)
+
+    @staticmethod
+    def _close(pooled):
+        """Close a pooled connection, if it was opened."""
+        connecting = pooled.connecting
+        if not connecting.done():
+            connecting.cancel()
+        elif not connecting.cancelled() and connecting.exception() is None:
+            connecting.result().close()
+
+    def connection(self, hostname=None, username=None, password=None,
+                   key_filename=None, timeout=10):
+        """Return an async context manager borrowing a pooled connection::
+
+            async with pool.connection(hostname='example.com') as connection:
+                await connection.run('ls')
+
+        The connection is discarded if the ``async with`` block raises one
+        of :attr:`connection_errors`.
+        """
+        return _Borrowed(
+            self, (hostname, username, password, key_filename, timeout))
+
+    def close_all(self):
+        """Close all the pooled connections."""
+        connections, self._connections = self._connections, {}
+        self._semaphore = None
+        for pooled_list in connections.values():
+            for pooled in pooled_list:
+                self._close(pooled)
+
+    def stats(self):
+        """Return the number of ``connections`` and running ``sessions``."""
+        pooled_list = [
+            pooled
+            for pooled_list in self._connections.values()
+            for pooled in pooled_list
+        ]
+        return {
+            'connections': len(pooled_list),
+            'sessions': sum(pooled.sessions for pooled in pooled_list),
+        }
+
+
+#: Connection pool used by :func:`command`.
+connection_pool = AsyncSSHConnectionPool()
+
+
+async def command(cmd, hostname=None, output_format=None, username=None,
+                  password=None, key_filename=None, timeout=10, pool=None):
+    """Executes SSH command on remote hostname.
+
+    Arguments have the same meaning of the :func:`robottelo.ssh.command`
+    ones.
+
+    :param pool: The :class:`AsyncSSHConnectionPool` to borrow the
+        connection from, defaults to :data:`connection_pool`.
+    :return: A :class:`robottelo.ssh.SSHCommandResult`.
+    """
+    if pool is None:
+        pool = connection_pool
+    async with pool.semaphore:
+        async with pool.connection(
+                hostname, username, password, key_filename,
+                timeout) as connection:
+            logger.debug('>>> %s', cmd)
+            result = await connection.run(cmd, check=False)
+    return _build_result(
+        result.stdout, result.stderr, result.exit_status, output_format)
@@ -1,8 +1,12 @@
 # -*- encoding: utf-8 -*-
 """Cleanup module for different entities"""
 import logging
+import threading
+import time
+
 from collections import deque, defaultdict
-from nailgun import entities, signals
+from multiprocessing.pool import ThreadPool
+from nailgun import entities, entity_mixins, signals
 from robottelo.cli.base import CLIReturnCodeError
 from robottelo.cli.proxy import Proxy
 from robottelo.constants import DEFAULT_ORG_ID
@@ -42,14 +46,74 @@ def vm_cleanup(vm):
     vm.destroy()
 
 
+def _deletion_levels(entity_types):
+    """Group entity types in the order they must be deleted.
+
+    A type referencing another one must be deleted first, so each level only
+    has types which are not referenced by the types of the next levels.
+    References are found on the nailgun fields of the entities. The fields
+    of the taxonomies (organizations and locations) list what they contain
+    rather than what they depend on, so they are ignored. When the
+    references form a cycle all the remaining types are deleted together.
+
+    :param dict entity_types: Maps a type name to an entity of that type.
+    :return: A list of lists of type names.
+    """
+    references = {}
+    for name, entity in entity_types.items():
+        references[name] = set()
+        if isinstance(entity, (entities.Organization, entities.Location)):
+            continue
+        for field in entity.get_fields().values():
+            if isinstance(field, (entity_mixins.OneToOneField,
+                                  entity_mixins.OneToManyField)):
+                target = field.entity.__name__
+                if target in entity_types and target != name:
+                    references[name].add(target)
+    levels = []
+    remaining = set(references)
+    while remaining:
+        # the types no remaining type references can be deleted now
+        referenced = set()
+        for name in remaining:
+            referenced.update(references[name] & remaining)
+        level = sorted(remaining - referenced) or sorted(remaining)
+        levels.append(level)
+        remaining.difference_update(level)
+    return levels
+
+
+def _is_task(result):
+    """Whether an entity ``delete`` result is a foreman task."""
+    return (isinstance(result, dict) and 'id' in result and
+            'state' in result and 'result' in result)
+
+
 class EntitiesCleaner(object):
-    """Register and clean entities for cleanup using signals"""
+    """Register and clean entities for cleanup using signals
+
+    Entities are grouped by type and deleted in the order required by their
+    relationships. The deletions and updates of a group run concurrently on
+    a pool of ``workers`` threads, and the foreman tasks started by the
+    deletions are polled together until they finish or ``task_timeout``
+    seconds pass.
 
-    def __init__(self, *types_to_cleanup):
+    Timing and failures are recorded per type in :attr:`stats`.
+    """
+
+    def __init__(self, *types_to_cleanup, **kwargs):
         self.cleanup_queue = defaultdict(deque)
         self.deleted_entities = defaultdict(set)
         self.types_to_cleanup = types_to_cleanup
+        self.workers = kwargs.get('workers', 10)
+        self.poll_rate = kwargs.get('poll_rate', 2)
+        self.task_timeout = kwargs.get('task_timeout', 300)
         self.logger = logging.getLogger('robottelo')
+        #: Per type counters of ``deleted``, ``updated`` and ``failed``
+        #: entities and ``seconds`` spent on them.
+        self.stats = defaultdict(lambda: {
+            'deleted': 0, 'updated': 0, 'failed': 0, 'seconds': 0.0})
+        self._stats_lock = threading.Lock()
         self.connect_cleanup_signals()
 
     def connect_cleanup_signals(self):
@@ -65,64 +129,211 @@ class EntitiesCleaner(object):
             'Adding {0}:{1} for cleanup_queue'.format(sender, entity.id))
         self.cleanup_queue[entity.__class__.__name__].appendleft(entity)
 
+    def _record(self, entity_type, counter, seconds):
+        """Add an entity outcome to the type stats."""
+        with self._stats_lock:
+            stats = self.stats[entity_type]
+            stats[counter] += 1
+            stats['seconds'] += seconds
+
+    def _run(self, func, items):
+        """Call ``func`` with each item on the worker threads."""
+        if not items:
+            return []
+        pool = ThreadPool(max(1, min(self.workers, len(items))))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+            pool.join()
+
     def clean(self):
         """This method is called in TearDownClass only when cleanup=true"""
+        start = time.time()
         default_org = entities.Organization(id=DEFAULT_ORG_ID)
-        # reassign created hosts to default org
-        self.update_entities(
-            self.cleanup_queue.get(entities.Host.__name__, []),
-            hostgroup=None,
-            managed=False,
-            organization=default_org
-        )
-        # reassign created host groups to default org
-        self.update_entities(
-            self.cleanup_queue.get(entities.HostGroup.__name__, []),
-            lifecycle_environment=None,
-            content_view=None,
-            organization=[default_org]
+        # reassign created hosts and host groups to default org
+        updates = dict((
+            (entities.Host.__name__, {
+                'hostgroup': None,
+                'managed': False,
+                'organization': default_org,
+            }),
+            (entities.HostGroup.__name__, {
+                'lifecycle_environment': None,
+                'content_view': None,
+                'organization': [default_org],
+            }),
+        ))
+        self._run(
+            lambda update: self.update_entities(
+                self.cleanup_queue.get(update[0], []), **update[1]),
+            list(updates.items())
         )
-        # delete organizations
-        self.delete_entities(
-            self.cleanup_queue.get(entities.Organization.__name__, []),
-            synchronous=False
+        # delete the other entities
+        to_delete = dict(
+            (entity_type, queue)
+            for entity_type, queue in self.cleanup_queue.items()
+            if queue and entity_type not in updates
         )
+        for level in _deletion_levels(dict(
+                (entity_type, queue[0])
+                for entity_type, queue in to_delete.items())):
+            self.delete_entities(
+                [entity for entity_type in level
+                 for entity in to_delete[entity_type]],
+                synchronous=False
+            )
 
         self.logger.debug(
-            'Cleanup deleted %s entities', len(self.deleted_entities))
+            'Cleanup deleted %s entities in %.1fs',
+            sum(len(ids) for ids in self.deleted_entities.values()),
+            time.time() - start
+        )
+        for entity_type, stats in sorted(self.stats.items()):
+            self.logger.debug(
+                'Cleanup %s: %s deleted, %s updated, %s failed in %.1fs',
+                entity_type, stats['deleted'], stats['updated'],
+                stats['failed'], stats['seconds']
+            )
+
+    def _organizations_with_hosts(self, organizations):
+        """Return the ids of the ``organizations`` which have hosts, with a
+        single search.
+        """
+        if not organizations:
+            return set()
+        query = {
+            'search': 'organization_id ^ ({0})'.format(
+                ','.join(str(org.id) for org in organizations)),
+            'per_page': 10000,
+        }
+        try:
+            hosts = entities.Host(
+                organizations[0]._server_config).search(query=query)
+        except Exception as err:
+            self.logger.warn('Error searching organization hosts %s', err)
+            # keep all of them to be safe
+            return set(org.id for org in organizations)
+        return set(
+            host.organization.id for host in hosts
+            if getattr(host, 'organization', None) is not None
+        )
+
+    def _delete(self, entity, **kwargs):
+        """Delete an entity and return its foreman task, if any."""
+        entity_type = entity.__class__.__name__
+        start = time.time()
+        try:
+            result = entity.delete(**kwargs)
+        except Exception as e:
+            self.logger.warn('Error deleting entity %s', str(e))
+            self._record(entity_type, 'failed', time.time() - start)
+            return None
+        if _is_task(result) and result['state'] not in ('paused', 'stopped'):
+            return entity, result['id'], start
+        self._finish_delete(entity, result, start)
+        return None
+
+    def _finish_delete(self, entity, task, start):
+        """Record the outcome of a deletion, ``task`` being the finished
+        foreman task if any.
+        """
+        entity_type = entity.__class__.__name__
+        if _is_task(task) and task['result'] != 'success':
+            self.logger.warn(
+                'Error deleting entity %s:%s, task %s finished with %s',
+                entity_type, entity.id, task['id'], task['result'])
+            self._record(entity_type, 'failed', time.time() - start)
+            return
+        with self._stats_lock:
+            self.deleted_entities[entity_type].add(entity.id)
+        self._record(entity_type, 'deleted', time.time() - start)
+
+    def _poll_tasks(self, pending):
+        """Poll the ``(entity, task id, start)`` tuples until their tasks
+        finish or time out.
+        """
+        def read(item):
+            entity, task_id, _ = item
+            try:
+                return entities.ForemanTask(
+                    entity._server_config, id=task_id).read_json()
+            except Exception as e:
+                self.logger.warn('Error polling task %s: %s', task_id, e)
+                return None
+
+        while pending:
+            time.sleep(self.poll_rate)
+            still_pending = []
+            for item, task in zip(pending, self._run(read, pending)):
+                entity, task_id, start = item
+                if task is not None and task['state'] in (
+                        'paused', 'stopped'):
+                    self._finish_delete(entity, task, start)
+                elif time.time() - start > self.task_timeout:
+                    self.logger.warn(
+                        'Timed out waiting task %s deleting %s:%s',
+                        task_id, entity.__class__.__name__, entity.id)
+                    self._record(
+                        entity.__class__.__name__, 'failed',
+                        time.time() - start)
+                else:
+                    still_pending.append(item)
+            pending = still_pending
 
     def delete_entities(self, entity_list, **kwargs):
+        """Delete the entities concurrently and wait for their tasks.
+
+        Organizations with hosts are not deleted.
+        """
         self.logger.debug(
             'Cleanup got %s entities to delete', len(entity_list))
+        to_delete = []
+        seen = set()
         for entity in entity_list:
-            entity_type = entity.__class__.__name__
-            if entity.id in self.deleted_entities[entity_type]:
+            key = (entity.__class__.__name__, entity.id)
+            if key in seen or entity.id in self.deleted_entities[key[0]]:
                 # skip already deleted entities
                 continue
-            try:
-                if isinstance(entity, entities.Organization):
-                    query = {'search': 'organization_id={0}'.format(entity.id)}
-                    org_hosts = entities.Host().search(query=query)
-                    if org_hosts:  # Do not delete organizations with hosts
-                        self.logger.debug(
-                            'Org %s can\'t be deleted as it has %s hosts',
-                            entity.id,
-                            len(org_hosts)
-                        )
-                        return
-                entity.delete(**kwargs)
-            except Exception as e:
-                self.logger.warn('Error deleting entity %s', str(e))
+            seen.add(key)
+            to_delete.append(entity)
+        with_hosts = self._organizations_with_hosts([
+            entity for entity in to_delete
+            if isinstance(entity, entities.Organization)
+        ])
+        deletable = []
+        for entity in to_delete:
+            if (isinstance(entity, entities.Organization) and
+                    entity.id in with_hosts):
+                # Do not delete organizations with hosts
+                self.logger.debug(
+                    'Org %s can\'t be deleted as it has hosts', entity.id)
             else:
-                self.deleted_entities[entity_type].add(entity.id)
+                deletable.append(entity)
+        pending = [
+            task for task in self._run(
+                lambda entity: self._delete(entity, **kwargs), deletable)
+            if task is not None
+        ]
+        self._poll_tasks(pending)
 
     def update_entities(self, entity_list, **kwargs):
+        """Update the fields of the entities concurrently."""
         self.logger.debug(
             'Cleanup got %s entities to update', len(entity_list))
-        for entity in entity_list:
+
+        def update(entity):
+            start = time.time()
             try:
                 for key, value in kwargs.items():
                     setattr(entity, key, value)
-                entity.update(fields=kwargs.keys())
+                entity.update(fields=list(kwargs))
             except Exception as e:
                 self.logger.warn('Error updating entity %s', str(e))
+                self._record(
+                    entity.__class__.__name__, 'failed', time.time() - start)
+            else:
+                self._record(
+                    entity.__class__.__name__, 'updated', time.time() - start)
+
+        self._run(update, list(entity_list))
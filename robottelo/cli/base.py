@@ -1,7 +1,16 @@
 # -*- encoding: utf-8 -*-
 """Generic base class for cli hammer commands."""
+import copy
 import logging
 import re
+import shlex
+import sys
+import threading
+import time
+
+import six
+
+from collections import OrderedDict
 
 from robottelo import ssh
 from robottelo.cli import hammer
@@ -61,6 +70,333 @@ class CLIDataBaseError(CLIBaseError):
     """
 
 
+class HammerCommand(six.text_type):
+    """A hammer command, as built by :meth:`Base._construct_command`, which
+    keeps the parts it was built from.
+
+    :param text: the command text.
+    :param command_base: the command, like ``host``.
+    :param command_sub: the subcommand, like ``create``.
+    :param options: the command options.
+    """
+
+    def __new__(cls, text, command_base=None, command_sub=None,
+                options=None):
+        command = super(HammerCommand, cls).__new__(cls, text)
+        command.command_base = command_base
+        command.command_sub = command_sub
+        command.options = options
+        return command
+
+
+class CommandInvocation(object):
+    """A single call of a hammer command.
+
+    The command, the credentials and the output format are kept on the
+    invocation instead of the CLI class, so the same CLI class can run any
+    number of commands at the same time from different threads.
+
+    :param cli_class: the :class:`Base` subclass running the command, which
+        provides the default credentials and handles the response.
+    :param command: the command to run, a :class:`HammerCommand` or a plain
+        command string.
+    :param user: the hammer username, defaults to the ``cli_class`` one.
+    :param password: the hammer password, defaults to the ``cli_class`` one.
+    :param output_format: the hammer output format.
+    """
+
+    def __init__(self, cli_class, command, user=None, password=None,
+                 output_format=None):
+        self.cli_class = cli_class
+        self.command = command
+        self.command_base = getattr(
+            command, 'command_base', cli_class.command_base)
+        self.command_sub = getattr(command, 'command_sub', None)
+        self.options = getattr(command, 'options', None)
+        self.user, self.password = cli_class._get_username_password(
+            user, password)
+        self.output_format = output_format
+
+    def __repr__(self):
+        return '<{0} {1!r} output_format={2!r}>'.format(
+            type(self).__name__, self.name, self.output_format)
+
+    @property
+    def name(self):
+        """The command and subcommand, without the options."""
+        if self.command_sub is None:
+            return self.command.split(u' --', 1)[0].strip()
+        return u'{0} {1}'.format(self.command_base, self.command_sub)
+
+    @staticmethod
+    def _time_hammer():
+        """Whether the hammer commands are timed with ``time -p``, which
+        needs a new hammer process for every command.
+        """
+        return bool(settings.performance and settings.performance.time_hammer)
+
+    def hammer_command(self):
+        """Return the full utf-8 encoded hammer command line."""
+        return (
+            self.cli_class._hammer_prefix(
+                self.user, self.password, self.output_format) +
+            self.command.encode('utf-8')
+        )
+
+    def hammer_args(self):
+        """Return the hammer arguments of the command, without the
+        ``hammer`` executable, for :func:`robottelo.ssh.hammer_command`.
+
+        The command is split with the shell quoting rules, without any
+        expansion.
+        """
+        args = [u'-v', u'-u', self.user, u'-p', self.password]
+        if self.output_format:
+            args.append(u'--output={0}'.format(self.output_format))
+        command = self.command
+        if six.PY2:
+            # shlex does not support unicode on Python 2
+            return args + [
+                arg.decode('utf-8')
+                for arg in shlex.split(command.encode('utf-8'))
+            ]
+        return args + shlex.split(command)
+
+    @property
+    def read_only(self):
+        """Whether the command does not change the server state."""
+        return (self.name.rsplit(u' ', 1)[-1] in
+                ResponseCache.read_only_subcommands)
+
+    @property
+    def cacheable(self):
+        """Whether the response of the command can be cached: it is read
+        only and its command base is not polled.
+        """
+        return (self.read_only and self.command_base not in
+                ResponseCache.polled_command_bases)
+
+    def cache_key(self):
+        """Return the :data:`response_cache` key of the command."""
+        return (
+            self.user,
+            self.output_format,
+            six.text_type(self.command).strip(),
+        )
+
+    def run(self, timeout=None, ignore_stderr=None,
+            return_raw_response=None, cache=True):
+        """Run the command on the server via ssh.
+
+        When the ``hammer_cache`` setting is enabled the verified responses
+        of the :attr:`cacheable` commands are served from
+        :data:`response_cache`, unless ``cache`` is ``False``, and the
+        commands which are not read only invalidate the cached responses of
+        their command base and of the ``cli_class``
+        :attr:`Base.cache_invalidates` ones. When the ``hammer_session``
+        setting is enabled the command runs on a persistent
+        :class:`robottelo.ssh.SSHHammerSession`, unless the hammer commands
+        are timed.
+
+        :return: the raw ``SSHCommandResult`` when ``return_raw_response``,
+            otherwise the response ``stdout`` once verified by
+            :meth:`Base._handle_response`.
+        """
+        cached = settings.hammer_cache and cache and self.cacheable
+        if cached and not return_raw_response:
+            found, stdout, generation = response_cache.get(self.cache_key())
+            if found:
+                return stdout
+        try:
+            if settings.hammer_session and not self._time_hammer():
+                response = ssh.hammer_command(
+                    self.hammer_args(),
+                    output_format=self.output_format,
+                    timeout=timeout,
+                )
+            else:
+                response = ssh.command(
+                    self.hammer_command(),
+                    output_format=self.output_format,
+                    timeout=timeout,
+                )
+        finally:
+            if settings.hammer_cache and not self.read_only:
+                response_cache.invalidate(
+                    (self.command_base,) +
+                    tuple(self.cli_class.cache_invalidates)
+                )
+        if return_raw_response:
+            return response
+        stdout = self.cli_class._handle_response(
+            response,
+            ignore_stderr=ignore_stderr,
+            command=self.name,
+        )
+        if cached:
+            response_cache.put(
+                self.cache_key(), self.command_base, stdout,
+                settings.hammer_cache_ttl, generation)
+        return stdout
+
+    def stream(self, timeout=None, ignore_stderr=None):
+        """Run the command on the server via ssh and lazily yield each csv
+        row as soon as it is received.
+
+        The response is verified by :meth:`Base._handle_response` after the
+        last row, the verification is skipped if the iteration stops earlier.
+        """
+        stream = ssh.command_stream(self.hammer_command(), timeout=timeout)
+        try:
+            for row in hammer.iter_csv(stream):
+                yield row
+        finally:
+            stream.close()
+        self.cli_class._handle_response(
+            ssh.SSHCommandResult(
+                stderr=stream.stderr, return_code=stream.return_code),
+            ignore_stderr=ignore_stderr,
+            command=self.name,
+        )
+
+
+class _BackgroundCall(object):
+    """Run ``func(*args, **kwargs)`` on a daemon thread.
+
+    :meth:`result` waits for the call to finish and returns its value or
+    re-raises its exception on the calling thread.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self._value = None
+        self._exc_info = None
+        self._thread = threading.Thread(
+            target=self._run, args=(func, args, kwargs))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self._value = func(*args, **kwargs)
+        except Exception:
+            self._exc_info = sys.exc_info()
+
+    def result(self):
+        """Wait for the call and return its value."""
+        self._thread.join()
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        return self._value
+
+
+class ResponseCache(object):
+    """Thread safe TTL and LRU cache of the responses of read only hammer
+    commands.
+
+    Entries are keyed by the hammer user, the output format and the command
+    with its options, and tagged with the command base so the writes can
+    invalidate them. The values are copied in and out of the cache, so
+    callers can freely change the returned responses.
+
+    :param int max_size: Maximum number of entries, the least recently used
+        entry is evicted when the limit is reached.
+    """
+
+    #: Subcommands which do not change the server state, ``version info``
+    #: and other nested subcommands are matched by their last word.
+    read_only_subcommands = frozenset(('info', 'list'))
+
+    #: Command bases whose responses change without any write, as the
+    #: server runs them in the background, and are polled by the tests.
+    #: They are never cached.
+    polled_command_bases = frozenset(('job-invocation', 'task'))
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a ``(found, value, generation)`` tuple for ``key``.
+
+        ``generation`` must be passed to :meth:`put` so a response read
+        while a write was running is not cached.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] > now:
+                # re-insert as most recently used
+                self._entries[key] = entry
+                self.hits += 1
+                return True, copy.deepcopy(entry[2]), self._generation
+            self.misses += 1
+            return False, None, self._generation
+
+    def put(self, key, command_base, value, ttl, generation):
+        """Cache ``value`` for ``ttl`` seconds unless an invalidation
+        happened since ``generation`` was returned by :meth:`get`.
+        """
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, command_base, value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, command_bases):
+        """Drop the entries of the ``command_bases``, ``'*'`` drops all the
+        entries.
+        """
+        with self._lock:
+            self._generation += 1
+            if '*' in command_bases:
+                stale = list(self._entries)
+            else:
+                stale = [
+                    key for key, entry in self._entries.items()
+                    if entry[1] in command_bases
+                ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop all the entries."""
+        self.invalidate(('*',))
+
+    def stats(self):
+        """Return the cache counters.
+
+        :return: A dict with the number of ``hits``, ``misses``,
+            ``evictions`` (entries dropped to respect the size limit),
+            ``invalidations`` (entries dropped by writes) and cached
+            ``entries``.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+            }
+
+
+#: Cache of the read only hammer responses, used when the ``hammer_cache``
+#: setting is enabled.
+response_cache = ResponseCache()
+
+
 class Base(object):
     """
     @param command_base: base command of hammer.
@@ -124,8 +460,16 @@ class Base(object):
     @since: 27.Nov.2013
     """
     command_base = None  # each inherited instance should define this
-    command_sub = None  # specific to instance, like: create, update, etc
     command_requires_org = False  # True when command requires organization-id
+    #: Command bases whose cached responses are invalidated by the writes of
+    #: this command, besides its own, ``'*'`` invalidates all of them. See
+    #: :class:`ResponseCache`.
+    cache_invalidates = ()
+
+    #: Compiled command templates, see :meth:`_command_template`
+    _command_templates = {}
+    #: Encoded hammer command line prefixes, see :meth:`_hammer_prefix`
+    _hammer_prefixes = {}
 
     logger = logging.getLogger('robottelo')
     _db_error_regex = re.compile(
@@ -133,7 +477,7 @@ class Base(object):
     )
 
     @classmethod
-    def _handle_response(cls, response, ignore_stderr=None):
+    def _handle_response(cls, response, ignore_stderr=None, command=None):
         """Verify ``return_code`` of the CLI command.
 
         Check for a non-zero return code or any stderr contents.
@@ -142,16 +486,22 @@ class Base(object):
             :mod:`robottelo.ssh.command`.
         :param ignore_stderr: indicates whether to throw a warning in logs if
             ``stderr`` is not empty.
+        :param command: the cli command which got the response, its
+            subcommand is reported on the error message.
         :returns: contents of ``stdout``.
         :raises robottelo.cli.base.CLIReturnCodeError: If return code is
             different from zero.
         """
         if response.return_code != 0:
+            if command:
+                # strip the options and keep only the command and subcommand
+                command = command.split(u' --', 1)[0].strip()
+            else:
+                command = cls.command_base
             full_msg = (
-                u'Command "{0} {1}" finished with return_code {2}\n'
-                'stderr contains following message:\n{3}'.format(
-                    cls.command_base,
-                    cls.command_sub,
+                u'Command "{0}" finished with return_code {1}\n'
+                'stderr contains following message:\n{2}'.format(
+                    command,
                     response.return_code,
                     response.stderr
                 )
@@ -174,9 +524,8 @@ class Base(object):
         Adds OS to record.
         """
 
-        cls.command_sub = 'add-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'add-operatingsystem'))
 
         return result
 
@@ -186,13 +535,11 @@ class Base(object):
         Creates a new record using the arguments passed via dictionary.
         """
 
-        cls.command_sub = 'create'
-
         if options is None:
             options = {}
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'create'), output_format='csv')
 
         # Extract new object ID if it was successfully created
         if len(result) > 0 and 'id' in result[0]:
@@ -217,9 +564,8 @@ class Base(object):
     @classmethod
     def delete(cls, options=None):
         """Deletes existing record."""
-        cls.command_sub = 'delete'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'delete'),
             ignore_stderr=True,
         )
 
@@ -229,9 +575,8 @@ class Base(object):
         Deletes parameter from record.
         """
 
-        cls.command_sub = 'delete-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'delete-parameter'))
 
         return result
 
@@ -241,9 +586,7 @@ class Base(object):
         Displays the content for existing partition table.
         """
 
-        cls.command_sub = 'dump'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'dump'))
 
         return result
 
@@ -274,35 +617,56 @@ class Base(object):
         return (username, password)
 
     @classmethod
-    def execute(cls, command, user=None, password=None, output_format=None,
-                timeout=None, ignore_stderr=None, return_raw_response=None):
-        """Executes the cli ``command`` on the server via ssh"""
-        user, password = cls._get_username_password(user, password)
+    def _hammer_prefix(cls, user, password, output_format):
+        """Return the utf-8 encoded hammer command line which precedes every
+        command run by ``user`` with ``output_format``.
+
+        The prefixes are built once and cached, only the locale and the
+        hammer timing settings are checked on every call.
+        """
         time_hammer = False
         if settings.performance:
-            time_hammer = settings.performance.time_hammer
-
-        # add time to measure hammer performance
-        cmd = u'LANG={0} {1} hammer -v -u {2} -p {3} {4} {5}'.format(
-            settings.locale,
-            u'time -p' if time_hammer else '',
-            user,
-            password,
-            u'--output={0}'.format(output_format) if output_format else u'',
-            command,
-        )
-        response = ssh.command(
-            cmd.encode('utf-8'),
-            output_format=output_format,
-            timeout=timeout,
-        )
-        if return_raw_response:
-            return response
-        else:
-            return cls._handle_response(
-                response,
-                ignore_stderr=ignore_stderr,
-            )
+            time_hammer = bool(settings.performance.time_hammer)
+        key = (settings.locale, time_hammer, user, password, output_format)
+        prefix = Base._hammer_prefixes.get(key)
+        if prefix is None:
+            # add time to measure hammer performance
+            prefix = u'LANG={0} {1} hammer -v -u {2} -p {3} {4} '.format(
+                settings.locale,
+                u'time -p' if time_hammer else '',
+                user,
+                password,
+                u'--output={0}'.format(output_format)
+                if output_format else u'',
+            ).encode('utf-8')
+            Base._hammer_prefixes[key] = prefix
+        return prefix
+
+    @classmethod
+    def execute(cls, command, user=None, password=None, output_format=None,
+                timeout=None, ignore_stderr=None, return_raw_response=None,
+                cache=True):
+        """Executes the cli ``command`` on the server via ssh
+
+        Pass ``cache=False`` to always run a read only command, e.g. when
+        polling for a change made outside of the CLI, see
+        :meth:`CommandInvocation.run`.
+        """
+        return CommandInvocation(
+            cls, command, user, password, output_format
+        ).run(timeout, ignore_stderr, return_raw_response, cache)
+
+    @classmethod
+    def execute_stream(cls, command, user=None, password=None, timeout=None,
+                       ignore_stderr=None):
+        """Executes the cli ``command`` on the server via ssh with csv output
+        and lazily yields each row as soon as it is received.
+
+        See :meth:`CommandInvocation.stream`.
+        """
+        return CommandInvocation(
+            cls, command, user, password, u'csv'
+        ).stream(timeout, ignore_stderr)
 
     @classmethod
     def exists(cls, options=None, search=None):
@@ -324,6 +688,14 @@ class Base(object):
                 u'search': u'{0}=\\"{1}\\"'.format(search[0], search[1])
             })
 
+        if cls._stream_lists():
+            # Stop reading the list as soon as the first entity is received
+            results = cls.iter_list(options)
+            try:
+                return next(results, [])
+            finally:
+                results.close()
+
         result = cls.list(options)
         if result:
             result = result[0]
@@ -331,9 +703,12 @@ class Base(object):
         return result
 
     @classmethod
-    def info(cls, options=None, output_format=None):
-        """Reads the entity information."""
-        cls.command_sub = 'info'
+    def info(cls, options=None, output_format=None, cache=True):
+        """Reads the entity information.
+
+        Pass ``cache=False`` to bypass the ``hammer_cache``, e.g. when
+        polling the entity.
+        """
 
         if options is None:
             options = {}
@@ -346,28 +721,133 @@ class Base(object):
             )
 
         result = cls.execute(
-            command=cls._construct_command(options),
-            output_format=output_format
+            command=cls._construct_command(options, 'info'),
+            output_format=output_format,
+            cache=cache,
         )
         if output_format != 'json':
             result = hammer.parse_info(result)
         return result
 
+    @staticmethod
+    def _stream_lists(cache=True):
+        """Whether :meth:`list` and :meth:`exists` stream the list rows with
+        :meth:`execute_stream`.
+
+        The streams run on a pooled SSH channel, so they are only used when
+        neither the ``hammer_session`` setting nor, if ``cache`` is set, the
+        ``hammer_cache`` one is enabled.
+        """
+        return not (settings.hammer_session or
+                    (cache and settings.hammer_cache))
+
     @classmethod
-    def list(cls, options=None, per_page=True):
+    def list(cls, options=None, per_page=True, cache=True):
         """
         List information.
         @param options: ID (sometimes name works as well) to retrieve info.
+        @param cache: Whether the response can be served by the
+            ``hammer_cache``, disable it when polling.
+
+        The rows are parsed as they are received, without keeping the whole
+        output, unless the ``hammer_session`` or ``hammer_cache`` settings
+        are enabled. See :meth:`iter_list`.
         """
 
-        cls.command_sub = 'list'
+        if options is None:
+            options = {}
+
+        if 'per-page' not in options and per_page:
+            options[u'per-page'] = 10000
+
+        cls._check_list_options(options)
+
+        command = cls._construct_command(options, 'list')
+        if cls._stream_lists(cache):
+            return list(cls.execute_stream(command))
 
+        result = cls.execute(command, output_format='csv', cache=cache)
+
+        return result
+
+    @classmethod
+    def iter_list(cls, options=None, per_page=True, page_size=None,
+                  prefetch=False):
+        """Same as :meth:`list` but returns a generator which parses and
+        yields each entity as soon as it is received, so the output is never
+        fully kept in memory and the command can be interrupted once the
+        needed entities are found.
+
+        The rows are read from a pooled SSH channel, the ``hammer_session``
+        and ``hammer_cache`` settings do not apply.
+
+        :param options: the list command options.
+        :param per_page: when ``page_size`` is not provided, defaults the
+            ``per-page`` option to 10000 to get all entities at once.
+        :param page_size: when provided, walk the hammer pages of
+            ``page_size`` entities with one command per page instead of
+            running a single list command. Pages are only fetched when the
+            previous page is consumed.
+        :param prefetch: with ``page_size``, fetch the next page in a
+            background thread while the current page is consumed.
+        """
         if options is None:
             options = {}
 
+        cls._check_list_options(options)
+
+        if page_size is not None:
+            return cls._iter_pages(options, page_size, prefetch)
+
         if 'per-page' not in options and per_page:
             options[u'per-page'] = 10000
 
+        return cls.execute_stream(cls._construct_command(options, 'list'))
+
+    @classmethod
+    def count(cls, options=None, page_size=100):
+        """Return the number of entities :meth:`list` would return.
+
+        Hammer does not report the total number of entities on the csv
+        output, so the total is probed by looking for the last non empty page
+        of ``page_size`` entities, doubling the page number and then
+        bisecting. Only a few pages are fetched instead of the full list.
+        """
+        if options is None:
+            options = {}
+
+        def page_length(page):
+            """Return the number of entities on ``page``"""
+            return len(cls.execute(
+                cls._list_page_command(options, page, page_size),
+                output_format='csv',
+            ))
+
+        # find a page past the last entity
+        low, high = 0, 1
+        length = page_length(high)
+        while length == page_size:
+            low, high = high, high * 2
+            length = page_length(high)
+        if length:
+            return (high - 1) * page_size + length
+        # low is a full page (or zero) and high is empty, bisect between them
+        while high - low > 1:
+            middle = (low + high) // 2
+            length = page_length(middle)
+            if length == page_size:
+                low = middle
+            elif length:
+                return (middle - 1) * page_size + length
+            else:
+                high = middle
+        return low * page_size
+
+    @classmethod
+    def _check_list_options(cls, options):
+        """Make sure list ``options`` include the organization when the
+        command requires it.
+        """
         if cls.command_requires_org and 'organization-id' not in options:
             raise CLIError(
                 'organization-id option is required for {0}.list'.format(
@@ -375,10 +855,48 @@ class Base(object):
                 )
             )
 
-        result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+    @classmethod
+    def _list_page_command(cls, options, page, page_size):
+        """Build the list command which fetches the ``page`` of
+        ``page_size`` entities.
+        """
+        options = dict(options)
+        options[u'page'] = page
+        options[u'per-page'] = page_size
+        cls._check_list_options(options)
+        return cls._construct_command(options, 'list')
 
-        return result
+    @classmethod
+    def _iter_pages(cls, options, page_size, prefetch):
+        """Generator which yields the entities of each list page until a
+        page with less than ``page_size`` entities is received.
+        """
+
+        def fetch(page):
+            """Return a callable which returns the entities of ``page``.
+
+            The command is built on the calling thread so the background
+            thread only runs it.
+            """
+            command = cls._list_page_command(options, page, page_size)
+            if not prefetch:
+                return lambda: cls.execute(command, output_format='csv')
+            return _BackgroundCall(
+                cls.execute, command, output_format='csv').result
+
+        page = 1
+        pending = fetch(page)
+        while True:
+            entities = pending()
+            if len(entities) < page_size:
+                pending = None
+            else:
+                page += 1
+                pending = fetch(page)
+            for entity in entities:
+                yield entity
+            if pending is None:
+                break
 
     @classmethod
     def puppetclasses(cls, options=None):
@@ -386,10 +904,9 @@ class Base(object):
         Lists all puppet classes.
         """
 
-        cls.command_sub = 'puppet-classes'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'puppet-classes'),
+            output_format='csv')
 
         return result
 
@@ -399,9 +916,8 @@ class Base(object):
         Removes OS from record.
         """
 
-        cls.command_sub = 'remove-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'remove-operatingsystem'))
 
         return result
 
@@ -411,10 +927,8 @@ class Base(object):
         Lists all smart class parameters.
         """
 
-        cls.command_sub = 'sc-params'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'sc-params'), output_format='csv')
 
         return result
 
@@ -424,9 +938,7 @@ class Base(object):
         Creates or updates parameter for a record.
         """
 
-        cls.command_sub = 'set-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'set-parameter'))
 
         return result
 
@@ -436,10 +948,8 @@ class Base(object):
         Updates existing record.
         """
 
-        cls.command_sub = 'update'
-
         result = cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'update'),
             output_format='csv'
         )
 
@@ -464,26 +974,53 @@ class Base(object):
         return Wrapper
 
     @classmethod
-    def _construct_command(cls, options=None):
-        """Build a hammer cli command based on the options passed"""
-        tail = u''
+    def _command_template(cls, command_sub, keys):
+        """Return the compiled template of the ``command_sub`` command called
+        with the ``keys`` options.
+
+        The template is a tuple with the command and subcommand and, for each
+        option key, the flag and the quoted option format strings. Templates
+        are cached by command, subcommand and option keys, so the formatting
+        is compiled once for the many calls of a command.
+        """
+        template_key = (cls.command_base, command_sub, keys)
+        template = Base._command_templates.get(template_key)
+        if template is None:
+            template = (
+                u'{0} {1}'.format(cls.command_base, command_sub),
+                tuple(
+                    (u'--{0}'.format(key), u'--{0}="{{0}}"'.format(key))
+                    for key in keys
+                ),
+            )
+            Base._command_templates[template_key] = template
+        return template
+
+    @classmethod
+    def _construct_command(cls, options=None, command_sub=None):
+        """Build a hammer cli ``command_sub`` command based on the options
+        passed
 
+        :rtype: HammerCommand
+        """
         if options is None:
             options = {}
 
-        for key, val in options.items():
-            if val is None:
+        command, formats = cls._command_template(command_sub, tuple(options))
+        tail = []
+        for (flag, option), val in zip(formats, options.values()):
+            if val is None or val is False:
                 continue
             if val is True:
-                tail += u' --{0}'.format(key)
-            elif val is not False:
+                tail.append(flag)
+            else:
                 if isinstance(val, list):
                     val = ','.join(str(el) for el in val)
-                tail += u' --{0}="{1}"'.format(key, val)
-        cmd = u'{0} {1} {2}'.format(
+                tail.append(option.format(val))
+
+        return HammerCommand(
+            u'{0} {1}'.format(command, u' '.join(tail)),
             cls.command_base,
-            cls.command_sub,
-            tail.strip()
+            command_sub,
+            dict(options),
         )
-
-        return cmd
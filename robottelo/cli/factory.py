@@ -8,6 +8,9 @@ import json
 import logging
 import os
 import random
+import six
+import sys
+import threading
 
 from fauxfactory import (
     gen_alphanumeric,
@@ -81,6 +84,7 @@ from robottelo.helpers import (
     update_dictionary, default_url_on_new_port, get_available_capsule_port
 )
 from robottelo.ssh import upload_file
+from six.moves import queue
 from tempfile import mkstemp
 from time import sleep
 
@@ -2952,3 +2956,166 @@ def publish_puppet_module(puppet_modules, repo_url, organization_id=None):
     # Puppet Class entities
     ContentView.publish({u'id': cv['id']})
     return ContentView.info({u'id': cv['id']})
+
+
+def _entity_references(spec, options):
+    """Return the names of the ``spec`` entities referenced by ``options``.
+
+    Only the values of options ending with ``-id`` or ``-ids`` are
+    considered references.
+    """
+    references = set()
+    for key, value in options.items():
+        if key.endswith(u'-id'):
+            values = [value]
+        elif key.endswith(u'-ids') and isinstance(value, list):
+            values = value
+        else:
+            continue
+        references.update(
+            val for val in values
+            if isinstance(val, six.string_types) and val in spec
+        )
+    return references
+
+
+def _resolve_references(options, entities):
+    """Return a copy of ``options`` where the references to other entities
+    are replaced by their ids.
+    """
+    resolved = {}
+    for key, value in options.items():
+        if (key.endswith(u'-id') and
+                isinstance(value, six.string_types) and value in entities):
+            value = entities[value]['id']
+        elif key.endswith(u'-ids') and isinstance(value, list):
+            value = [
+                entities[val]['id']
+                if isinstance(val, six.string_types) and val in entities
+                else val
+                for val in value
+            ]
+        resolved[key] = value
+    return resolved
+
+
+def make_entities(spec, workers=5):
+    """Create several entities running independent creations concurrently.
+
+    ``spec`` maps a name to a ``(make_function, options)`` tuple. The value
+    of an option ending with ``-id`` (or an item of an option ending with
+    ``-ids``) which is the name of another entity of the ``spec`` is replaced
+    by the ``id`` of that entity once it is created. Those references define
+    the order of the creations, entities which do not depend on each other
+    are created at the same time::
+
+        entities = make_entities({
+            'org': (make_org, {}),
+            'env': (make_lifecycle_environment, {u'organization-id': 'org'}),
+            'product': (make_product, {u'organization-id': 'org'}),
+            'repo': (make_repository, {u'product-id': 'product'}),
+            'cv': (make_content_view, {
+                u'organization-id': 'org',
+                u'repository-ids': ['repo'],
+            }),
+        })
+        entities['cv']['id']
+
+    :param dict spec: The entities to create.
+    :param int workers: Maximum number of entities created at the same time.
+    :raise robottelo.cli.factory.CLIFactoryError: If the references form a
+        cycle.
+    :return: A dict mapping each name of ``spec`` to the dict returned by its
+        make function.
+    :rtype: dict
+
+    """
+    dependencies = {
+        name: _entity_references(spec, options)
+        for name, (_, options) in spec.items()
+    }
+    dependents = {name: [] for name in spec}
+    for name, references in dependencies.items():
+        for reference in references:
+            dependents[reference].append(name)
+    _check_entity_cycles(dependencies)
+
+    tasks = queue.Queue()
+    done = queue.Queue()
+
+    def worker():
+        """Create the entities put on the tasks queue until ``None``."""
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            name, function, options = task
+            try:
+                done.put((name, function(options), None))
+            except Exception:
+                done.put((name, None, sys.exc_info()))
+
+    threads = [
+        threading.Thread(target=worker)
+        for _ in range(max(1, min(workers, len(spec))))
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    entities = {}
+    error = None
+    running = 0
+    waiting = {name: set(refs) for name, refs in dependencies.items()}
+
+    def schedule(name):
+        """Queue the creation of an entity which dependencies exist."""
+        del waiting[name]
+        function, options = spec[name]
+        tasks.put((name, function, _resolve_references(options, entities)))
+
+    try:
+        for name in [name for name, refs in waiting.items() if not refs]:
+            schedule(name)
+            running += 1
+        while running:
+            name, entity, exc_info = done.get()
+            running -= 1
+            if exc_info is not None:
+                # Stop scheduling and wait for the running creations
+                error = error or exc_info
+                continue
+            entities[name] = entity
+            logger.debug('Created %s: %s', name, entity)
+            if error is not None:
+                continue
+            for dependent in dependents[name]:
+                waiting[dependent].discard(name)
+                if not waiting[dependent]:
+                    schedule(dependent)
+                    running += 1
+    finally:
+        for _ in threads:
+            tasks.put(None)
+    if error is not None:
+        six.reraise(*error)
+    return entities
+
+
+def _check_entity_cycles(dependencies):
+    """Raise ``CLIFactoryError`` if there is a dependency cycle.
+
+    :param dict dependencies: Maps each entity name to the names it depends
+        on.
+    """
+    remaining = {name: set(refs) for name, refs in dependencies.items()}
+    while remaining:
+        ready = [name for name, refs in remaining.items() if not refs]
+        if not ready:
+            raise CLIFactoryError(
+                u'Circular references between entities: {0}'.format(
+                    u', '.join(sorted(remaining))))
+        for name in ready:
+            del remaining[name]
+        for refs in remaining.values():
+            refs.difference_update(ready)
@@ -5,7 +5,6 @@ import json
 import re
 import six
 from six import text_type
-from six.moves import cStringIO as StringIO
 from six.moves import zip
 
 
@@ -24,16 +23,17 @@ def _csv_reader(output):
     unicode.
 
     :param output: can be any object which supports the iterator protocol and
-    returns a unicode string each time its next() method is called.
+    returns a unicode string each time its next() method is called. It is
+    consumed lazily, one line at a time.
     :return: generator that will yield a list of unicode string values.
 
     """
-    data = '\n'.join(output)
+    # csv reader needs the line breaks to parse values spanning many lines
+    lines = (u'{0}\n'.format(line) for line in output)
     if six.PY2:
-        data = data.encode('utf8')
-    handler = StringIO(data)
+        lines = (line.encode('utf8') for line in lines)
 
-    for row in csv.reader(handler):
+    for row in csv.reader(lines):
         if six.PY2:
             yield [value.decode('utf8') for value in row]
         else:
@@ -68,13 +68,31 @@ def _normalize_obj(obj):
     return obj
 
 
-def parse_csv(output):
-    """Parse CSV output from Hammer CLI and convert it to python dictionary."""
+def iter_csv(output):
+    """Lazily parse CSV output from Hammer CLI yielding a python dictionary for
+    each row.
+
+    :param output: an iterable of lines, lines are only read when the next row
+        is requested, so ``output`` can be a stream which is still being
+        received.
+    :return: generator of dictionaries mapping the normalized headers to the
+        row values.
+    """
     reader = _csv_reader(output)
-    # Generate the key names, spaces will be converted to dashes "-"
-    keys = [_normalize(header) for header in next(reader)]
+    try:
+        # Generate the key names, spaces will be converted to dashes "-"
+        keys = [_normalize(header) for header in next(reader)]
+    except StopIteration:
+        return
     # For each entry, create a dict mapping each key with each value
-    return [dict(zip(keys, values)) for values in reader if len(values) > 0]
+    for values in reader:
+        if len(values) > 0:
+            yield dict(zip(keys, values))
+
+
+def parse_csv(output):
+    """Parse CSV output from Hammer CLI and convert it to python dictionary."""
+    return list(iter_csv(output))
 
 
 def parse_help(output):
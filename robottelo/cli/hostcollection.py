@@ -32,18 +32,17 @@ class HostCollection(Base):
     """Manipulates Katello engine's host-collection command."""
 
     command_base = 'host-collection'
+    cache_invalidates = ('host', 'activation-key')
 
     @classmethod
     def add_host(cls, options=None):
         """Add host to the host collection"""
-        cls.command_sub = 'add-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-host'))
 
     @classmethod
     def remove_host(cls, options=None):
         """Remove hosts from the host collection"""
-        cls.command_sub = 'remove-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'remove-host'))
 
     @classmethod
     def hosts(cls, options=None):
@@ -76,6 +75,5 @@ class HostCollection(Base):
              --search SEARCH                         filter results
              -h, --help                              print help
         """
-        cls.command_sub = 'hosts'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'hosts'), output_format='csv')
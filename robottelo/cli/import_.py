@@ -102,8 +102,9 @@ class Import(Base):
 
         """
         result = []
-        for csv_file in csv_files:
-            ssh_cat = ssh.command(u'cat {0}'.format(csv_file))
+        ssh_cats = ssh.batch_command(
+            [u'cat {0}'.format(csv_file) for csv_file in csv_files])
+        for ssh_cat in ssh_cats:
             if ssh_cat.return_code != 0:
                 raise AssertionError(ssh_cat.stderr)
             csv = ssh_cat.stdout[:-1]
@@ -124,36 +125,32 @@ class Import(Base):
         Requires organization.
 
         """
-        cls.command_sub = 'activation-key'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'activation-key'),
             output_format='csv',
         )
 
     @classmethod
     def organization(cls, options=None):
         """Import Organizations (from spacewalk-report users)."""
-        cls.command_sub = 'organization'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'organization'),
             output_format='',
         )
 
     @classmethod
     def user(cls, options=None):
         """Import Users (from spacewalk-report users)."""
-        cls.command_sub = 'user'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'user'),
             output_format='',
         )
 
     @classmethod
     def host_collection(cls, options=None):
         """Import Host Collections (from spacewalk-report system-groups)."""
-        cls.command_sub = 'host-collection'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'host-collection'),
             output_format='',
         )
 
@@ -163,18 +160,16 @@ class Import(Base):
         spacewalk-report config-files-latest).
 
         """
-        cls.command_sub = 'config-file'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'config-file'),
             output_format='',
         )
 
     @classmethod
     def content_host(cls, options=None):
         """Import Content Hosts (from spacewalk-report system-profiles)."""
-        cls.command_sub = 'content-host'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'content-host'),
             output_format='',
         )
 
@@ -184,18 +179,16 @@ class Import(Base):
         spacewalk-export-channels).
 
         """
-        cls.command_sub = 'content-view'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'content-view'),
             output_format='',
         )
 
     @classmethod
     def repository(cls, options=None):
         """Import repositories (from spacewalk-report repositories)."""
-        cls.command_sub = 'repository'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'repository'),
             output_format='',
         )
 
@@ -205,9 +198,8 @@ class Import(Base):
         (from spacewalk-report channels).
 
         """
-        cls.command_sub = 'repository-enable'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'repository-enable'),
             output_format='',
         )
 
@@ -217,9 +209,8 @@ class Import(Base):
         kickstart-scripts).
 
         """
-        cls.command_sub = 'template-snippet'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'template-snippet'),
             output_format='',
         )
 
@@ -229,9 +220,8 @@ class Import(Base):
         format.
 
         """
-        cls.command_sub = 'all'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'all'),
             output_format='',
         )
 
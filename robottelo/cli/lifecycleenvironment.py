@@ -28,6 +28,7 @@ class LifecycleEnvironment(Base):
 
     command_base = 'lifecycle-environment'
     command_requires_org = True
+    cache_invalidates = ('content-view',)
 
     @classmethod
     def list(cls, options=None, per_page=False):
@@ -36,7 +37,13 @@ class LifecycleEnvironment(Base):
 
         return result
 
+    @classmethod
+    def iter_list(cls, options=None, per_page=False, page_size=None,
+                  prefetch=False):
+        return super(LifecycleEnvironment, cls).iter_list(
+            options, per_page=per_page, page_size=page_size,
+            prefetch=prefetch)
+
     @classmethod
     def paths(cls, options=None):
-        cls.command_sub = 'paths'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'paths'))
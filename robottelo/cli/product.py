@@ -22,6 +22,7 @@ Subcommands::
 """
 
 from robottelo.cli.base import Base
+from robottelo.cli.repository import CONTENT_COMMAND_BASES
 
 
 class Product(Base):
@@ -31,6 +32,9 @@ class Product(Base):
 
     command_base = 'product'
     command_requires_org = True
+    cache_invalidates = (
+        'repository', 'repository-set', 'subscription', 'sync-plan'
+    ) + CONTENT_COMMAND_BASES
 
     @classmethod
     def remove_sync_plan(cls, options=None):
@@ -38,9 +42,8 @@ class Product(Base):
         Delete assignment sync plan and product.
         """
 
-        cls.command_sub = 'remove-sync-plan'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'remove-sync-plan'))
 
         return result
 
@@ -50,17 +53,14 @@ class Product(Base):
         Assign sync plan to product.
         """
 
-        cls.command_sub = 'set-sync-plan'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'set-sync-plan'))
 
         return result
 
     @classmethod
     def synchronize(cls, options=None):
         """Synchronize a product."""
-        cls.command_sub = 'synchronize'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'synchronize'),
             ignore_stderr=True,
         )
@@ -23,6 +23,12 @@ Subcommands::
 """
 from robottelo.cli.base import Base
 
+#: Command bases listing the content of the repositories, changed by their
+#: synchronization, content uploads and removals
+CONTENT_COMMAND_BASES = (
+    'docker manifest', 'docker tag', 'erratum', 'ostree-branch', 'package',
+    'package-group', 'puppet-module')
+
 
 class Repository(Base):
     """
@@ -31,6 +37,8 @@ class Repository(Base):
 
     command_base = 'repository'
     command_requires_org = True
+    cache_invalidates = (
+        'product', 'content-view', 'repository-set') + CONTENT_COMMAND_BASES
 
     @classmethod
     def create(cls, options=None):
@@ -47,20 +55,19 @@ class Repository(Base):
     @classmethod
     def export(cls, options=None):
         """Export a repository"""
-        cls.command_sub = 'export'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'export'),
             output_format='csv',
             ignore_stderr=True,
         )
 
     @classmethod
-    def info(cls, options=None):
+    def info(cls, options=None, cache=True):
         """Show a custom repository"""
         cls.command_requires_org = False
 
         try:
-            result = super(Repository, cls).info(options)
+            result = super(Repository, cls).info(options, cache=cache)
         finally:
             cls.command_requires_org = True
 
@@ -69,9 +76,8 @@ class Repository(Base):
     @classmethod
     def synchronize(cls, options, return_raw_response=None):
         """Synchronizes a repository."""
-        cls.command_sub = 'synchronize'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'synchronize'),
             output_format='csv',
             ignore_stderr=True,
             return_raw_response=return_raw_response,
@@ -80,9 +86,8 @@ class Repository(Base):
     @classmethod
     def remove_content(cls, options):
         """Remove content from a repository"""
-        cls.command_sub = 'remove-content'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'remove-content'),
             output_format='csv',
             ignore_stderr=True,
         )
@@ -90,9 +95,8 @@ class Repository(Base):
     @classmethod
     def upload_content(cls, options):
         """Upload content to repository."""
-        cls.command_sub = 'upload-content'
         return cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, 'upload-content'),
             output_format='csv',
             ignore_stderr=True,
         )
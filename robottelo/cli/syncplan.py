@@ -28,6 +28,7 @@ class SyncPlan(Base):
 
     command_base = 'sync-plan'
     command_requires_org = True
+    cache_invalidates = ('product',)
 
     @classmethod
     def create(cls, options=None):
@@ -131,6 +131,7 @@ class ServerSettings(FeatureSettings):
         self.scheme = None
         self.ssh_key = None
         self.ssh_password = None
+        self.ssh_port = None
         self.ssh_username = None
 
     def read(self, reader):
@@ -144,6 +145,7 @@ class ServerSettings(FeatureSettings):
         self.scheme = reader.get('server', 'scheme', 'https')
         self.ssh_key = reader.get('server', 'ssh_key')
         self.ssh_password = reader.get('server', 'ssh_password')
+        self.ssh_port = reader.get('server', 'ssh_port', 22, int)
         self.ssh_username = reader.get('server', 'ssh_username', 'root')
 
     def validate(self):
@@ -332,6 +334,9 @@ class FakeManifestSettings(FeatureSettings):
         self.cert_url = None
         self.key_url = None
         self.url = None
+        self.cache_dir = None
+        self.cache_max_age = None
+        self.pool_size = None
 
     def read(self, reader):
         """Read fake manifest settings."""
@@ -341,11 +346,17 @@ class FakeManifestSettings(FeatureSettings):
             'fake_manifest', 'key_url')
         self.url = reader.get(
             'fake_manifest', 'url')
+        self.cache_dir = reader.get(
+            'fake_manifest', 'cache_dir')
+        self.cache_max_age = reader.get(
+            'fake_manifest', 'cache_max_age', 3600, int)
+        self.pool_size = reader.get(
+            'fake_manifest', 'pool_size', 2, int)
 
     def validate(self):
         """Validate fake manifest settings."""
         validation_errors = []
-        if not all(vars(self).values()):
+        if not all((self.cert_url, self.key_url, self.url)):
             validation_errors.append(
                 'All [fake_manifest] cert_url, key_url, url options must '
                 'be provided.'
@@ -587,6 +598,8 @@ class PerformanceSettings(FeatureSettings):
         self.fresh_install_savepoint = None
         self.enabled_repos_savepoint = None
         self.csv_buckets_count = None
+        self.load_processes = None
+        self.load_rate = None
         self.sync_count = None
         self.sync_type = None
         self.repos = None
@@ -605,6 +618,10 @@ class PerformanceSettings(FeatureSettings):
             'performance', 'enabled_repos_savepoint')
         self.csv_buckets_count = reader.get(
             'performance', 'csv_buckets_count', 10, int)
+        self.load_processes = reader.get(
+            'performance', 'load_processes', None, int)
+        self.load_rate = reader.get(
+            'performance', 'load_rate', None, float)
         self.sync_count = reader.get(
             'performance', 'sync_count', 3, int)
         self.sync_type = reader.get(
@@ -719,6 +736,11 @@ class Settings(object):
         self._configured = False
         self._validation_errors = []
         self.browser = None
+        self.browser_max_uses = None
+        self.docker_browser_pool_size = None
+        self.hammer_cache = None
+        self.hammer_cache_ttl = None
+        self.hammer_session = None
         self.locale = None
         self.project = None
         self.reader = None
@@ -817,6 +839,16 @@ class Settings(object):
         )
         self.browser = self.reader.get(
             'robottelo', 'browser', 'selenium')
+        self.browser_max_uses = self.reader.get(
+            'robottelo', 'browser_max_uses', 10, int)
+        self.docker_browser_pool_size = self.reader.get(
+            'robottelo', 'docker_browser_pool_size', 2, int)
+        self.hammer_cache = self.reader.get(
+            'robottelo', 'hammer_cache', False, bool)
+        self.hammer_cache_ttl = self.reader.get(
+            'robottelo', 'hammer_cache_ttl', 60, int)
+        self.hammer_session = self.reader.get(
+            'robottelo', 'hammer_session', False, bool)
         self.locale = self.reader.get('robottelo', 'locale', 'en_US.UTF-8')
         self.project = self.reader.get('robottelo', 'project', 'sat')
         self.rhel6_repo = self.reader.get('robottelo', 'rhel6_repo', None)
@@ -0,0 +1,534 @@
+# -*- encoding: utf-8 -*-
+"""Pool of pre-created entities shared by the test processes.
+
+Creating organizations with manifests, synchronized products or published
+content views takes minutes, while most tests only need one to exist. The
+pool creates those entities once, optionally in the background, and lends
+them to the tests::
+
+    from robottelo.entity_pool import entity_pool
+
+    entity_pool.warm('published_content_view', size=2)
+    ...
+    with entity_pool.entity('published_content_view') as entities:
+        ContentView.info({u'id': entities['content-view-id']})
+
+Entities are requested by spec, a recipe name and its options, and each
+distinct spec has its own pool. A returned entity is lent again to the next
+test, so tests which change the entity must say so with ``modify=True``:
+the entity is then reset by the recipe ``reset`` function or, when the
+recipe has none, dropped from the pool.
+
+The pool registry is a JSON file guarded by a file lock, so all the
+pytest-xdist workers of a test run share the same entities. Each test run
+has its own registry, the entities of a previous run may have been changed
+or deleted since, and the last process of the run removes it on exit.
+Entities lent to a process which died are dropped, as their state is
+unknown.
+"""
+import atexit
+import errno
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+
+from contextlib import contextmanager
+from robottelo import manifests, ssh
+from robottelo.cli.activationkey import ActivationKey
+from robottelo.cli.contentview import ContentView
+from robottelo.cli.factory import (
+    make_content_view,
+    make_entities,
+    make_org,
+    make_product,
+    make_repository,
+    setup_org_for_a_rh_repo,
+)
+from robottelo.cli.repository import Repository
+from robottelo.cli.subscription import Subscription
+from robottelo.config import settings
+from robottelo.constants import DEFAULT_CV, FAKE_0_YUM_REPO
+
+LOGGER = logging.getLogger(__name__)
+
+
+class EntityPoolError(Exception):
+    """Indicates an entity could not be lent by the pool."""
+
+
+class Lease(object):
+    """An entity lent by :class:`EntityPool`.
+
+    :param str name: The recipe name.
+    :param dict options: The recipe options.
+    :param str token: Identifies the lease on the pool registry.
+    :param dict entity: The lent entity.
+    :param bool reused: Whether the entity was already on the pool.
+    """
+
+    def __init__(self, name, options, token, entity, reused):
+        self.name = name
+        self.options = options
+        self.token = token
+        self.entity = entity
+        self.reused = reused
+
+    def __repr__(self):
+        return '<{0} {1!r} {2!r}>'.format(
+            type(self).__name__, self.name, self.entity)
+
+
+def _pid_alive(pid):
+    """Check whether a process with ``pid`` is running."""
+    try:
+        os.kill(pid, 0)
+    except OSError as err:
+        return err.errno != errno.ESRCH
+    return True
+
+
+def _run_id():
+    """Return an identifier shared by the processes of the test run.
+
+    That is the pytest-xdist test run uid on its workers, or the id of the
+    process running the tests.
+    """
+    run_id = os.environ.get('PYTEST_XDIST_TESTRUNUID')
+    if run_id:
+        return run_id
+    if os.environ.get('PYTEST_XDIST_WORKER'):
+        # Older pytest-xdist workers are children of the controller
+        return str(os.getppid())
+    return str(os.getpid())
+
+
+class EntityPool(object):
+    """Pool of entities shared by the processes of a machine.
+
+    :param str path: The registry file, defaults to a file named after the
+        Satellite hostname and the test run on the temporary directory. The
+        lock file is created next to it.
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._recipes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.drops = 0
+
+    @property
+    def path(self):
+        """The registry file path."""
+        if self._path is None:
+            self._path = os.path.join(
+                tempfile.gettempdir(),
+                'robottelo_entity_pool_{0}_{1}.json'.format(
+                    settings.server.hostname, _run_id())
+            )
+        return self._path
+
+    def register(self, name, create, reset=None):
+        """Register a recipe.
+
+        :param str name: The recipe name used to request its entities.
+        :param create: A callable receiving the recipe options and returning
+            a JSON serializable entity.
+        :param reset: An optional callable receiving a modified entity and
+            restoring it. It should return ``False`` or raise if the entity
+            can not be reused.
+        """
+        self._recipes[name] = (create, reset)
+
+    @staticmethod
+    def key(name, options=None):
+        """Return the registry key of a spec."""
+        return u'{0} {1}'.format(
+            name, json.dumps(options or {}, sort_keys=True))
+
+    @contextmanager
+    def _locked(self):
+        """Hold the registry file lock.
+
+        The lock file is removed by :meth:`close`, so the lock is taken
+        again if the locked file is no longer the one on the lock path.
+        """
+        lock_path = self.path + '.lock'
+        while True:
+            with open(lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    current = (os.stat(lock_path).st_ino ==
+                               os.fstat(lock_file.fileno()).st_ino)
+                except OSError:
+                    current = False
+                if current:
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    return
+
+    def _load(self):
+        """Return the registry contents, must be called while holding the
+        registry lock.
+        """
+        try:
+            with open(self.path) as registry_file:
+                return json.load(registry_file)
+        except (IOError, ValueError):
+            return {}
+
+    def _save(self, registry):
+        """Atomically replace the registry contents, must be called while
+        holding the registry lock.
+        """
+        temp_path = '{0}.{1}'.format(self.path, os.getpid())
+        with open(temp_path, 'w') as registry_file:
+            json.dump(registry, registry_file)
+        os.rename(temp_path, self.path)
+
+    @contextmanager
+    def _registry(self):
+        """Yield the registry contents while holding the file lock and save
+        them afterwards.
+
+        The registry records the processes using it, see :meth:`close`.
+        """
+        with self._locked():
+            registry = self._load()
+            processes = registry.setdefault('processes', [])
+            if os.getpid() not in processes:
+                processes.append(os.getpid())
+            yield registry
+            self._save(registry)
+
+    def close(self):
+        """Stop using the registry, removing it if no other running process
+        uses it.
+        """
+        if self._path is None or not os.path.exists(self._path + '.lock'):
+            # The pool was never used
+            return
+        with self._locked():
+            registry = self._load()
+            processes = [
+                pid for pid in registry.get('processes', [])
+                if pid != os.getpid() and _pid_alive(pid)
+            ]
+            if processes:
+                registry['processes'] = processes
+                self._save(registry)
+                return
+            for path in (self.path, self.path + '.lock'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _spec(registry, key):
+        """Return the registry entry of a spec key, adding it if missing."""
+        spec = registry.setdefault('specs', {}).setdefault(key, {})
+        spec.setdefault('free', [])
+        spec.setdefault('lent', {})
+        spec.setdefault('creating', {})
+        return spec
+
+    def _prune(self, spec):
+        """Drop the entities lent to processes which are no longer running,
+        and the creations they reserved.
+
+        Must be called while holding the registry lock.
+        """
+        for token, lent in list(spec['lent'].items()):
+            if not _pid_alive(lent['pid']):
+                LOGGER.info(
+                    'Dropping entity %s lent to dead process %s',
+                    lent['entity'], lent['pid'])
+                del spec['lent'][token]
+        for token, pid in list(spec['creating'].items()):
+            if not _pid_alive(pid):
+                del spec['creating'][token]
+
+    def _create(self, name, options):
+        """Create an entity with the ``name`` recipe."""
+        try:
+            create, _ = self._recipes[name]
+        except KeyError:
+            raise EntityPoolError(u'Unknown recipe {0}'.format(name))
+        LOGGER.debug('Creating pool entity %s %s', name, options)
+        return create(dict(options or {}))
+
+    def checkout(self, name, options=None):
+        """Lend an entity of the spec, creating it if the pool is empty.
+
+        :return: A :class:`Lease` which must be given back to
+            :meth:`checkin`.
+        """
+        key = self.key(name, options)
+        token = uuid.uuid4().hex
+        with self._registry() as registry:
+            spec = self._spec(registry, key)
+            self._prune(spec)
+            entity = spec['free'].pop(0) if spec['free'] else None
+            if entity is not None:
+                spec['lent'][token] = {'pid': os.getpid(), 'entity': entity}
+        with self._lock:
+            if entity is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entity is not None:
+            return Lease(name, options, token, entity, True)
+        # Create outside the lock, other processes keep using the pool
+        entity = self._create(name, options)
+        with self._registry() as registry:
+            spec = self._spec(registry, key)
+            spec['lent'][token] = {'pid': os.getpid(), 'entity': entity}
+        return Lease(name, options, token, entity, False)
+
+    def checkin(self, lease, modified=False):
+        """Give back a lent entity.
+
+        :param Lease lease: The lease returned by :meth:`checkout`.
+        :param bool modified: Whether the entity was changed, it is then
+            reset by the recipe or dropped.
+        """
+        keep = True
+        if modified:
+            _, reset = self._recipes.get(lease.name, (None, None))
+            keep = False
+            if reset is not None:
+                try:
+                    keep = reset(lease.entity) is not False
+                except Exception as err:
+                    LOGGER.warning(
+                        'Failed to reset pool entity %s: %s',
+                        lease.entity, err)
+        with self._registry() as registry:
+            spec = self._spec(registry, self.key(lease.name, lease.options))
+            lent = spec['lent'].pop(lease.token, None)
+            if keep and lent is not None:
+                spec['free'].append(lease.entity)
+        if not keep:
+            with self._lock:
+                self.drops += 1
+            LOGGER.info('Dropped pool entity %s', lease.entity)
+
+    @contextmanager
+    def entity(self, name, options=None, modify=False):
+        """Lend an entity of the spec for the ``with`` block.
+
+        :param bool modify: Whether the block changes the entity. The entity
+            is also considered changed when the block raises.
+        """
+        lease = self.checkout(name, options)
+        modified = True
+        try:
+            yield lease.entity
+            modified = modify
+        finally:
+            self.checkin(lease, modified)
+
+    def lend(self, test_case, name, options=None):
+        """Lend an entity of the spec until the end of a test.
+
+        The entity is given back as modified by a ``test_case`` cleanup, so
+        it is reset or dropped afterwards::
+
+            org = entity_pool.lend(self, 'org_with_manifest')
+
+        :param test_case: The running ``unittest.TestCase``.
+        :return: The lent entity.
+        """
+        lease = self.checkout(name, options)
+        test_case.addCleanup(self.checkin, lease, True)
+        return lease.entity
+
+    def fill(self, name, options=None, size=1):
+        """Create entities until the spec has ``size`` free entities.
+
+        Each creation is reserved on the registry first, so the entities
+        being created by other processes count towards ``size``.
+        """
+        key = self.key(name, options)
+        while True:
+            token = uuid.uuid4().hex
+            with self._registry() as registry:
+                spec = self._spec(registry, key)
+                self._prune(spec)
+                if len(spec['free']) + len(spec['creating']) >= size:
+                    return
+                spec['creating'][token] = os.getpid()
+            entity = None
+            try:
+                entity = self._create(name, options)
+            finally:
+                with self._registry() as registry:
+                    spec = self._spec(registry, key)
+                    spec['creating'].pop(token, None)
+                    if entity is not None:
+                        spec['free'].append(entity)
+
+    def warm(self, name, options=None, size=1):
+        """Run :meth:`fill` on a background thread.
+
+        :return: The started daemon thread.
+        """
+        def fill():
+            try:
+                self.fill(name, options, size)
+            except Exception:
+                LOGGER.exception('Failed to warm pool %s', name)
+
+        thread = threading.Thread(target=fill)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Return the pool counters.
+
+        :return: A dict with the number of ``hits`` (checkouts served by the
+            pool), ``misses`` (checkouts which created the entity) and
+            ``drops`` (modified entities dropped) of this process, and the
+            number of ``free`` and ``lent`` entities of each spec key.
+        :rtype: dict
+        """
+        with self._registry() as registry:
+            specs = {
+                key: {'free': len(spec['free']), 'lent': len(spec['lent'])}
+                for key, spec in registry.get('specs', {}).items()
+            }
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'drops': self.drops,
+                'specs': specs,
+            }
+
+    def clear(self):
+        """Forget all the free entities, the lent ones are dropped when given
+        back.
+        """
+        with self._registry() as registry:
+            registry.pop('specs', None)
+
+
+def create_org_with_manifest(options):
+    """Create an organization and upload a cloned manifest to it.
+
+    :return: The organization.
+    """
+    org = make_org(options)
+    with manifests.clone() as manifest:
+        ssh.upload_file(manifest.content, manifest.filename)
+    Subscription.upload({
+        u'file': manifest.filename,
+        u'organization-id': org['id'],
+    })
+    return org
+
+
+def reset_org_with_manifest(org):
+    """Delete the repositories of an organization created by
+    :func:`create_org_with_manifest`, the Red Hat ones are disabled.
+
+    :return: ``False`` if the organization has activation keys or content
+        views besides the default one, which may consume its subscriptions
+        or use its repositories.
+    """
+    if ActivationKey.list({u'organization-id': org['id']}):
+        return False
+    content_views = ContentView.list({u'organization-id': org['id']})
+    if any(cv['name'] != DEFAULT_CV for cv in content_views):
+        return False
+    for repository in Repository.list({u'organization-id': org['id']}):
+        Repository.delete({u'id': repository['id']})
+    return True
+
+
+def create_synced_product(options):
+    """Create an organization with a product and a synchronized yum
+    repository.
+
+    Options::
+
+        url (optional) - The repository URL, defaults to FAKE_0_YUM_REPO
+
+    :return: A dict with the ``organization-id``, ``product-id`` and
+        ``repository-id``, and the synchronized ``content-counts`` of the
+        repository.
+    """
+    entities = make_entities({
+        'org': (make_org, {}),
+        'product': (make_product, {u'organization-id': 'org'}),
+        'repo': (make_repository, {
+            u'content-type': u'yum',
+            u'product-id': 'product',
+            u'url': options.get('url', FAKE_0_YUM_REPO),
+        }),
+    })
+    Repository.synchronize({u'id': entities['repo']['id']})
+    repository = Repository.info({u'id': entities['repo']['id']})
+    return {
+        u'organization-id': entities['org']['id'],
+        u'product-id': entities['product']['id'],
+        u'repository-id': entities['repo']['id'],
+        u'content-counts': repository['content-counts'],
+    }
+
+
+def reset_synced_product(entities):
+    """Synchronize the repository of :func:`create_synced_product` again,
+    restoring the content removed from it.
+
+    :return: ``False`` if the repository content differs from the
+        synchronized one, e.g. because content was uploaded to it.
+    """
+    Repository.synchronize({u'id': entities['repository-id']})
+    repository = Repository.info(
+        {u'id': entities['repository-id']}, cache=False)
+    return repository['content-counts'] == entities['content-counts']
+
+
+def create_published_content_view(options):
+    """Create a content view with a synchronized yum repository and
+    publish it.
+
+    Options are the :func:`create_synced_product` ones.
+
+    :return: A dict with the :func:`create_synced_product` ids and the
+        ``content-view-id`` and ``content-view-version-id``.
+    """
+    entities = create_synced_product(options)
+    content_view = make_content_view({
+        u'organization-id': entities['organization-id'],
+        u'repository-ids': [entities['repository-id']],
+    })
+    ContentView.publish({u'id': content_view['id']})
+    content_view = ContentView.info({u'id': content_view['id']})
+    entities[u'content-view-id'] = content_view['id']
+    entities[u'content-view-version-id'] = (
+        content_view['versions'][-1]['id'])
+    return entities
+
+
+#: Entity pool shared by the test processes, with recipes for the commonly
+#: used entities.
+entity_pool = EntityPool()
+atexit.register(entity_pool.close)
+entity_pool.register('org', make_org)
+entity_pool.register(
+    'org_with_manifest', create_org_with_manifest, reset_org_with_manifest)
+entity_pool.register(
+    'synced_product', create_synced_product, reset_synced_product)
+entity_pool.register('published_content_view', create_published_content_view)
+entity_pool.register('rh_repo_org', setup_org_for_a_rh_repo)
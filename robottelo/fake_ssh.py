@@ -0,0 +1,261 @@
+# -*- encoding: utf-8 -*-
+"""Local SSH server which runs the received commands on Python callables.
+
+The server runs on a background thread of the current process, so the
+:mod:`robottelo.ssh` and :mod:`robottelo.cli` code paths can be exercised
+without a Satellite server::
+
+    def handler(command):
+        return u'some output', u'', 0
+
+    with FakeSSHServer(handler) as server:
+        settings.server.hostname = server.hostname
+        settings.server.ssh_port = server.port
+        ssh.command('ls')
+
+Any username and password or key is accepted. Only ``exec`` requests are
+supported, interactive shells are refused.
+
+:class:`HammerReplayHandler` answers hammer commands with recorded outputs,
+which allows measuring the CLI layer offline::
+
+    handler = HammerReplayHandler.from_file(
+        'tests/foreman/data/hammer_outputs.json', latency=0.05)
+    with FakeSSHServer(handler) as server:
+        ...
+"""
+import json
+import logging
+import re
+import socket
+import threading
+import time
+
+import paramiko
+import six
+
+logger = logging.getLogger(__name__)
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    """Accept any authentication and run exec requests on ``server``."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def get_allowed_auths(self, username):
+        return 'password,publickey'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        # Run the command on its own thread so the transport thread answers
+        # the request and keeps serving the other channels meanwhile
+        thread = threading.Thread(
+            target=self.server.run_command, args=(channel, command))
+        thread.daemon = True
+        thread.start()
+        return True
+
+
+class FakeSSHServer(object):
+    """SSH server which answers each command with the result of ``handler``.
+
+    :param handler: A callable receiving the command text and returning a
+        ``(stdout, stderr, return_code)`` tuple.
+    :param str hostname: The address to listen on.
+    :param int port: The port to listen on, a free port is picked by default.
+    :param host_key: The server ``paramiko.PKey``, a new RSA key is generated
+        by default.
+    """
+
+    #: Host key shared by the servers created without a key, generating a
+    #: key is slow.
+    _default_host_key = None
+
+    def __init__(self, handler, hostname='127.0.0.1', port=0, host_key=None):
+        self.handler = handler
+        self.hostname = hostname
+        self.port = port
+        if host_key is None:
+            if FakeSSHServer._default_host_key is None:
+                FakeSSHServer._default_host_key = paramiko.RSAKey.generate(
+                    2048)
+            host_key = FakeSSHServer._default_host_key
+        self.host_key = host_key
+        self.commands = 0
+        self._lock = threading.Lock()
+        self._request_lock = threading.Lock()
+        self._socket = None
+        self._thread = None
+        self._transports = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Listen for connections on a background thread."""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.hostname, self.port))
+        self._socket.listen(100)
+        self.port = self._socket.getsockname()[1]
+        self._thread = threading.Thread(target=self._accept)
+        self._thread.daemon = True
+        self._thread.start()
+        logger.debug('Fake SSH server listening on port %s', self.port)
+
+    def stop(self):
+        """Stop listening and close all connections."""
+        if self._socket is None:
+            return
+        self._socket.close()
+        self._socket = None
+        with self._lock:
+            transports, self._transports = self._transports, []
+        for transport in transports:
+            transport.close()
+
+    def _accept(self):
+        """Start a SSH transport for each new connection."""
+        while self._socket is not None:
+            try:
+                sock, _ = self._socket.accept()
+            except (socket.error, AttributeError):
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(self.host_key)
+            try:
+                transport.start_server(server=_ServerInterface(self))
+            except paramiko.SSHException as err:
+                logger.debug('Fake SSH server negotiation failed: %s', err)
+                continue
+            # sessions are accepted by the transport thread
+            with self._lock:
+                self._transports.append(transport)
+
+    def run_command(self, channel, command):
+        """Run ``command`` with the handler and send its result over
+        ``channel``.
+
+        The channel is closed once the exec request is answered, the client
+        would see the request fail otherwise. The transport thread handles
+        the messages in order, so it answered the exec request when the
+        reply to a global request sent afterwards is received.
+        """
+        if isinstance(command, six.binary_type):
+            command = command.decode('utf-8')
+        with self._lock:
+            self.commands += 1
+        try:
+            stdout, stderr, return_code = self.handler(command)
+        except Exception as err:
+            logger.exception('Fake SSH server handler failed')
+            stdout, stderr, return_code = u'', six.text_type(err), 255
+        if stdout:
+            channel.sendall(stdout.encode('utf-8'))
+        if stderr:
+            channel.sendall_stderr(stderr.encode('utf-8'))
+        channel.send_exit_status(return_code)
+        channel.shutdown_write()
+        # Global requests share the transport completion event
+        with self._request_lock:
+            channel.get_transport().global_request(
+                'keepalive@robottelo', wait=True)
+        channel.close()
+
+
+class HammerReplayHandler(object):
+    """:class:`FakeSSHServer` handler which replays recorded hammer outputs.
+
+    Each recording is a dictionary with the following keys:
+
+    ``command``
+        The hammer command and subcommand, e.g. ``organization info``.
+    ``output_format``
+        Optional, the ``--output`` the recording answers: ``csv``, ``json``
+        or none for the default base output.
+    ``options``
+        Optional, a dictionary of options the command must have to get this
+        recording, e.g. ``{"id": "1"}``. The recording with most matching
+        options wins.
+    ``stdout``, ``stderr`` and ``return_code``
+        Optional, the recorded result, defaults to an empty successful one.
+    ``latency``
+        Optional, overrides the handler ``latency`` for this recording.
+
+    Commands without a recording fail with the hammer usage error code.
+
+    :param recordings: A list of recordings.
+    :param float latency: Seconds to wait before answering each command, to
+        simulate the server processing time.
+    """
+
+    #: Matches the hammer command line built by :class:`robottelo.cli.base.
+    #: Base`, the command, subcommand and options follow it.
+    _prefix_regex = re.compile(
+        r'\bhammer -v -u \S+ -p \S+ +(?:--output=(?P<output_format>\S+) )?')
+    _option_regex = re.compile(r'--([\w-]+)(?:="([^"]*)")?')
+
+    def __init__(self, recordings, latency=0):
+        self.latency = latency
+        self._recordings = {}
+        for recording in recordings:
+            key = (recording['command'], recording.get('output_format'))
+            self._recordings.setdefault(key, []).append(recording)
+        for candidates in self._recordings.values():
+            candidates.sort(key=lambda rec: -len(rec.get('options', {})))
+
+    @classmethod
+    def from_file(cls, path, latency=0):
+        """Create a handler replaying the recordings of a JSON file."""
+        with open(path) as fixture:
+            return cls(json.load(fixture), latency)
+
+    def find(self, command):
+        """Return the recording which answers ``command`` or ``None``."""
+        match = self._prefix_regex.search(command)
+        if match is None:
+            return None
+        rest = command[match.end():]
+        name = rest.split(u' --', 1)[0].strip()
+        options = dict(
+            (option.group(1), True if option.group(2) is None
+             else option.group(2))
+            for option in self._option_regex.finditer(rest)
+        )
+        for recording in self._recordings.get(
+                (name, match.group('output_format')), []):
+            expected = recording.get('options', {})
+            if all(options.get(key) == value
+                   for key, value in expected.items()):
+                return recording
+        return None
+
+    def __call__(self, command):
+        recording = self.find(command)
+        if recording is None:
+            return u'', u'Error: no recorded output for "{0}"'.format(
+                command), 64
+        latency = recording.get('latency', self.latency)
+        if latency:
+            time.sleep(latency)
+        return (
+            recording.get('stdout', u''),
+            recording.get('stderr', u''),
+            recording.get('return_code', 0),
+        )
@@ -7,11 +7,18 @@ server.
 Make sure to configure the ``compute_resources`` section on the configuration
 file. Also make sure that the ``vlan_networking`` section is properly
 configured.
+
+Discovery scale tests can create many guests at once with
+:class:`LibvirtGuestFleet`.
 """
 import logging
 import os
+import threading
+import time
 
 from fauxfactory import gen_mac
+from multiprocessing.pool import ThreadPool
+from nailgun import entities
 from robottelo import ssh
 from robottelo.config import settings
 
@@ -29,6 +36,37 @@ def _gen_mac_for_libvirt():
         raise ValueError('Unable to generate a valid MAC address')
 
 
+class MACAllocator(object):
+    """Generates MAC addresses for libvirt guests which are never handed out
+    twice, so guests created at the same time do not collide.
+
+    :param used: Optional MAC addresses which must not be allocated, like
+        the ones of the guests already on the libvirt host.
+    """
+
+    def __init__(self, used=()):
+        self._used = set(mac.lower() for mac in used)
+        self._lock = threading.Lock()
+
+    def allocate(self):
+        """Return a new MAC address."""
+        with self._lock:
+            while True:
+                mac = _gen_mac_for_libvirt().lower()
+                if mac not in self._used:
+                    self._used.add(mac)
+                    return mac
+
+    def reserve(self, mac):
+        """Mark an externally chosen ``mac`` as used."""
+        with self._lock:
+            self._used.add(mac.lower())
+
+
+#: MAC allocator shared by all the guests of the process.
+mac_allocator = MACAllocator()
+
+
 class LibvirtGuestError(Exception):
     """Exception raised for failed virtual guests on external libvirt"""
 
@@ -67,7 +105,10 @@ class LibvirtGuest(object):
         else:
             self.image_dir = image_dir
         if mac is None:
-            self.mac = _gen_mac_for_libvirt()
+            self.mac = mac_allocator.allocate()
+        else:
+            self.mac = mac
+            mac_allocator.reserve(mac)
         if bridge is None:
             self.bridge = settings.vlan_networking.bridge
         else:
@@ -97,6 +138,16 @@ class LibvirtGuest(object):
         if self._created:
             return
 
+        result = ssh.command(self._create_command(), self.libvirt_server)
+
+        if result.return_code != 0:
+            raise LibvirtGuestError(
+                u'Failed to run virt-install: {0}'.format(result.stderr))
+
+        self._created = True
+
+    def _create_command(self):
+        """Return the virt-install command creating the guest."""
         command_args = [
             'virt-install',
             '--hvm',
@@ -123,7 +174,7 @@ class LibvirtGuest(object):
             command_args.append('--cdrom={0}'.format(boot_iso_dir))
 
         if self.extra_nic:
-            nic_mac = _gen_mac_for_libvirt()
+            nic_mac = mac_allocator.allocate()
             command_args.append('--network=bridge:{vm_bridge}')
             command_args.append('--mac={0}'.format(nic_mac))
 
@@ -136,7 +187,7 @@ class LibvirtGuest(object):
                     .format(self.libvirt_server))
 
         self.hostname = u'{0}.{1}'.format(self.guest_name, self._domain)
-        command = u' '.join(command_args).format(
+        return u' '.join(command_args).format(
             vm_bridge=self.bridge,
             vm_mac=self.mac,
             vm_name=self.hostname,
@@ -145,32 +196,22 @@ class LibvirtGuest(object):
             image_name=u'{0}/{1}.img'.format(self.image_dir, self.hostname)
         )
 
-        result = ssh.command(command, self.libvirt_server)
-
-        if result.return_code != 0:
-            raise LibvirtGuestError(
-                u'Failed to run virt-install: {0}'.format(result.stderr))
-
-        self._created = True
+    def _destroy_commands(self):
+        """Return the commands destroying the guest and its image."""
+        image_name = u'{0}.img'.format(self.hostname)
+        return [
+            u'virsh destroy {0}'.format(self.hostname),
+            u'virsh undefine {0}'.format(self.hostname),
+            u'rm {0}'.format(os.path.join(self.image_dir, image_name)),
+        ]
 
     def destroy(self):
         """Destroys the virtual machine on the provisioning server"""
         if not self._created:
             return
 
-        ssh.command(
-            u'virsh destroy {0}'.format(self.hostname),
-            hostname=self.libvirt_server
-        )
-        ssh.command(
-            u'virsh undefine {0}'.format(self.hostname),
-            hostname=self.libvirt_server
-        )
-        image_name = u'{0}.img'.format(self.hostname)
-        ssh.command(
-            u'rm {0}'.format(os.path.join(self.image_dir, image_name)),
-            hostname=self.libvirt_server
-        )
+        for command in self._destroy_commands():
+            ssh.command(command, hostname=self.libvirt_server)
 
     def attach_nic(self):
         """Add a new NIC to existing host"""
@@ -178,7 +219,7 @@ class LibvirtGuest(object):
             raise LibvirtGuestError(
                 'The virtual guest should be created before updating it'
             )
-        nic_mac = _gen_mac_for_libvirt()
+        nic_mac = mac_allocator.allocate()
         command_args = [
             'virsh attach-interface',
             '--domain={vm_name}',
@@ -207,3 +248,185 @@ class LibvirtGuest(object):
 
     def __exit__(self, *exc):
         self.destroy()
+
+
+def discovered_guests(guests):
+    """Return the ``guests`` which were discovered by the Satellite.
+
+    The discovered hosts are named after their MAC address like the guests,
+    so a single search covers all of them.
+    """
+    results = entities.DiscoveredHost().search_json(query={
+        'search': u'name ^ ({0})'.format(
+            u','.join(guest.guest_name for guest in guests)),
+        'per_page': len(guests),
+    })['results']
+    names = set(host['name'] for host in results)
+    return [guest for guest in guests if guest.guest_name in names]
+
+
+def running_guests(guests):
+    """Return the ``guests`` which are running on the libvirt server."""
+    results = ssh.batch_command(
+        [u'virsh domstate {0}'.format(guest.hostname) for guest in guests],
+        hostname=guests[0].libvirt_server
+    )
+    return [
+        guest
+        for guest, result in zip(guests, results)
+        if result.return_code == 0 and u'running' in result.stdout
+    ]
+
+
+class LibvirtGuestFleet(object):
+    """Manages many libvirt guests at once for discovery scale tests.
+
+    The guests are created in parallel, each thread sending its share of
+    virt-install commands in a single SSH round trip, and destroyed with a
+    single batch of commands::
+
+        with LibvirtGuestFleet(20, boot_iso=True) as fleet:
+            fleet.wait_until_ready()
+            ...
+        logger.info('Fleet timings: %s', fleet.timings)
+
+    The guests get distinct MAC addresses from :data:`mac_allocator`.
+
+    :param int count: The number of guests.
+    :param int parallel: Number of threads creating the guests.
+    :param kwargs: Arguments of the :class:`LibvirtGuest` guests.
+    """
+
+    #: Seconds a single batch of commands may stay silent
+    command_timeout = 300
+
+    #: Maximum seconds to sleep between two readiness polls
+    poll_max_delay = 10
+
+    def __init__(self, count, parallel=4, **kwargs):
+        self.guests = [LibvirtGuest(**kwargs) for _ in range(count)]
+        self.parallel = parallel
+        #: Seconds spent on each phase: ``create``, ``ready`` and
+        #: ``destroy``
+        self.timings = {}
+        #: Seconds each guest took to be ready after the fleet was created,
+        #: by guest name
+        self.ready_times = {}
+
+    @property
+    def created(self):
+        """The created guests."""
+        return [guest for guest in self.guests if guest._created]
+
+    def _create_batch(self, guests):
+        """Create ``guests`` with a single batch of virt-install commands.
+
+        :return: The errors of the guests which could not be created.
+        """
+        try:
+            results = ssh.batch_command(
+                [guest._create_command() for guest in guests],
+                hostname=guests[0].libvirt_server,
+                timeout=self.command_timeout,
+            )
+        except Exception as err:
+            # Any of the commands may have run before the failure, so all
+            # the guests are destroyed
+            for guest in guests:
+                guest._created = True
+            return [err]
+        errors = []
+        for guest, result in zip(guests, results):
+            if result.return_code == 0:
+                guest._created = True
+            else:
+                errors.append(result.stderr)
+        return errors
+
+    def create(self):
+        """Create all the guests.
+
+        :raises robottelo.libvirt_discovery.LibvirtGuestError: If any guest
+            could not be created, all the guests are destroyed then.
+        """
+        start = time.time()
+        pending = [guest for guest in self.guests if not guest._created]
+        batches = [
+            pending[index::self.parallel] for index in range(self.parallel)]
+        batches = [batch for batch in batches if batch]
+        errors = []
+        if batches:
+            pool = ThreadPool(len(batches))
+            try:
+                for batch_errors in pool.map(self._create_batch, batches):
+                    errors.extend(batch_errors)
+            finally:
+                pool.close()
+                pool.join()
+        self.timings['create'] = time.time() - start
+        if errors:
+            self.destroy()
+            raise LibvirtGuestError(
+                u'Failed to run virt-install for {0} guests: {1}'
+                .format(len(errors), errors[0]))
+
+    def wait_until_ready(self, check=discovered_guests, timeout=600):
+        """Poll all the guests at once until they are ready, sleeping
+        between polls with an exponential backoff.
+
+        :param check: A callable receiving the list of guests not ready yet
+            and returning the ones which became ready. Defaults to
+            :func:`discovered_guests`, :func:`running_guests` is also
+            available.
+        :param int timeout: Seconds to wait for all the guests.
+        :raises robottelo.libvirt_discovery.LibvirtGuestError: If some
+            guests are not ready after ``timeout`` seconds.
+        """
+        start = time.time()
+        pending = self.created
+        delay = 1
+        while pending:
+            ready = check(pending)
+            now = time.time()
+            for guest in ready:
+                self.ready_times[guest.guest_name] = now - start
+            pending = [guest for guest in pending if guest not in ready]
+            remaining = start + timeout - now
+            if not pending:
+                break
+            if remaining <= 0:
+                self.timings['ready'] = now - start
+                raise LibvirtGuestError(
+                    u'{0} of {1} guests were not ready after {2} seconds'
+                    .format(len(pending), len(self.guests), timeout))
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.poll_max_delay)
+        self.timings['ready'] = time.time() - start
+
+    def destroy(self):
+        """Destroy all the created guests with a single batch of
+        commands.
+        """
+        start = time.time()
+        guests = self.created
+        if guests:
+            commands = []
+            for guest in guests:
+                commands.extend(guest._destroy_commands())
+            try:
+                ssh.batch_command(
+                    commands,
+                    hostname=guests[0].libvirt_server,
+                    timeout=self.command_timeout,
+                )
+            finally:
+                for guest in guests:
+                    guest._created = False
+        self.timings['destroy'] = time.time() - start
+
+    def __enter__(self):
+        self.create()
+        return self
+
+    def __exit__(self, *exc):
+        self.destroy()
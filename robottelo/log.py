@@ -1,45 +1,311 @@
 """Utilities to help work with log files"""
+import bisect
+import calendar
+import mmap
 import os
 import re
+import six
+import tempfile
 
+from array import array
+from contextlib import contextmanager
 from robottelo import ssh
 from robottelo.config.base import get_project_root
+from six.moves import shlex_quote
 
 LOGS_DATA_DIR = os.path.join(get_project_root(), 'data', 'logs')
 
+#: Matches the timestamps of the Satellite logs lines, like the
+#: ``2017-03-01 10:11:12`` of production.log or the ``2017-03-01T10:11:12``
+#: of the installer logs.
+TIMESTAMP_RE = re.compile(
+    br'(\d{4})-(\d\d)-(\d\d)[ T](\d\d):(\d\d):(\d\d)')
+
+#: Number of bytes at the beginning of a line searched for its timestamp.
+TIMESTAMP_SEARCH_LENGTH = 64
+
+#: Size of the chunks copied from the remote log.
+CHUNK_SIZE = 1024 * 1024
+
+
+def _seconds(value):
+    """Return a naive ``datetime`` as seconds, the unit of the timestamps
+    index.
+    """
+    return calendar.timegm(value.timetuple()) + value.microsecond / 1e6
+
 
 class LogFile(object):
     """
     References a remote log file. The log file will be downloaded to allow
     operate on it using python
+
+    The local copy is memory-mapped and indexed by line and timestamp, so
+    :meth:`lines` and :meth:`filter` can be limited to a time window. Lines
+    without a timestamp, like tracebacks, take the timestamp of the previous
+    line. Lines appended to the remote log are fetched by :meth:`update`,
+    which only copies the new bytes::
+
+        with LogFile('/var/log/foreman/production.log', tail=True) as log:
+            # do something on the server
+            log.update()
+            errors = log.filter(r'\\[E\\]')
+
+    Every instance keeps its own local copy in ``LOGS_DATA_DIR``, which is
+    removed by :meth:`close`. A last line without a trailing newline is only
+    indexed once the remote log stops growing, and is indexed again by the
+    next :meth:`update` if more bytes were appended to it.
+
+    :param str remote_path: The remote log path.
+    :param str pattern: The default pattern of :meth:`filter`.
+    :param bool tail: Skip the current contents of the remote log, only the
+        lines appended later are fetched.
+    :param str hostname: The server hostname, defaults to the configured
+        one.
     """
 
-    def __init__(self, remote_path, pattern=None):
+    def __init__(self, remote_path, pattern=None, tail=False, hostname=None):
         self.remote_path = remote_path
         self.pattern = pattern
+        self.hostname = hostname
 
         if not os.path.isdir(LOGS_DATA_DIR):
             os.makedirs(LOGS_DATA_DIR)
-        self.local_path = os.path.join(LOGS_DATA_DIR,
-                                       os.path.basename(remote_path))
-        ssh.download_file(remote_path, self.local_path)
-        with open(self.local_path) as file_:
-            self.data = file_.readlines()
+        handle, self.local_path = tempfile.mkstemp(
+            prefix=os.path.basename(remote_path) + '.', dir=LOGS_DATA_DIR)
+        os.close(handle)
+        self._map = None
+        self._reset(0)
+        try:
+            if tail:
+                with self._sftp() as sftp:
+                    self._reset(sftp.stat(self.remote_path).st_size)
+            else:
+                self.update()
+        except Exception:
+            self.close()
+            raise
+
+    @contextmanager
+    def _sftp(self):
+        """Yield a SFTP client on a pooled connection."""
+        with ssh.connection_pool.connection(
+                hostname=self.hostname) as connection:
+            sftp = connection.open_sftp()
+            try:
+                yield sftp
+            finally:
+                sftp.close()
+
+    def _reset(self, offset):
+        """Empty the local copy and start copying from the remote
+        ``offset``.
+        """
+        self._close_map()
+        with open(self.local_path, 'wb'):
+            pass
+        #: Remote offset of the first byte of the local copy
+        self.start_offset = offset
+        #: Remote offset of the next byte to copy
+        self.offset = offset
+        self._line_offsets = array('l')
+        self._timestamps = array('d')
+        #: Local offset of the first byte not indexed as a complete line
+        self._indexed = 0
+        #: Local offset of the end of the last indexed line
+        self._end = 0
+        #: Timestamp of the last complete line
+        self._last_timestamp = 0.0
+        #: Whether the last indexed line has no trailing newline yet
+        self._partial = False
+
+    def update(self):
+        """Copy the bytes appended to the remote log since the last update
+        and index the new lines. The local copy starts over when the remote
+        log was rotated or truncated.
+
+        :return: The number of new lines.
+        """
+        with self._sftp() as sftp:
+            size = sftp.stat(self.remote_path).st_size
+            if size < self.offset:
+                self._reset(0)
+            previous = len(self)
+            if size > self.offset:
+                remote_file = sftp.open(self.remote_path, 'rb')
+                try:
+                    remote_file.seek(self.offset)
+                    remote_file.prefetch(size)
+                    with open(self.local_path, 'ab') as local_file:
+                        while self.offset < size:
+                            chunk = remote_file.read(
+                                min(CHUNK_SIZE, size - self.offset))
+                            if not chunk:
+                                break
+                            local_file.write(chunk)
+                            self.offset += len(chunk)
+                finally:
+                    remote_file.close()
+                # The last line is complete if nothing is being appended
+                final = sftp.stat(self.remote_path).st_size == self.offset
+            else:
+                final = True
+        self._index(final)
+        return len(self) - previous
+
+    def _close_map(self):
+        """Close the memory map of the local copy."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _index(self, final=False):
+        """Map the local copy and index its new complete lines.
 
-    def filter(self, pattern=None):
+        :param bool final: Also index the last line if it has no trailing
+            newline.
+        """
+        self._close_map()
+        if os.path.getsize(self.local_path):
+            with open(self.local_path, 'rb') as local_file:
+                self._map = mmap.mmap(
+                    local_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map is None:
+            return
+        if self._partial:
+            # The last line may have grown since it was indexed
+            self._line_offsets.pop()
+            self._timestamps.pop()
+            self._partial = False
+        position = self._indexed
+        while True:
+            newline = self._map.find(b'\n', position)
+            if newline < 0:
+                break
+            # Keep the index sorted even if the log has lines written out
+            # of order
+            self._last_timestamp = max(
+                self._last_timestamp, self._timestamp(position, newline))
+            self._line_offsets.append(position)
+            self._timestamps.append(self._last_timestamp)
+            position = newline + 1
+        self._indexed = self._end = position
+        if final and position < len(self._map):
+            self._line_offsets.append(position)
+            self._timestamps.append(max(
+                self._last_timestamp,
+                self._timestamp(position, len(self._map))
+            ))
+            self._partial = True
+            self._end = len(self._map)
+
+    def _timestamp(self, start, end):
+        """Return the timestamp of the line between the ``start`` and
+        ``end`` local offsets, ``0`` if it has none.
+        """
+        match = TIMESTAMP_RE.search(
+            self._map[start:min(end, start + TIMESTAMP_SEARCH_LENGTH)])
+        if match is None:
+            return 0
+        return calendar.timegm(
+            tuple(int(group) for group in match.groups()) + (0, 0, 0))
+
+    def __len__(self):
+        return len(self._line_offsets)
+
+    def _line(self, index):
+        """Return the line at ``index`` of the index."""
+        start = self._line_offsets[index]
+        if index + 1 < len(self._line_offsets):
+            end = self._line_offsets[index + 1]
+        else:
+            end = self._end
+        return self._map[start:end].decode('utf-8', 'replace')
+
+    def _window(self, since=None, until=None):
+        """Return the range of the line indexes of the lines logged between
+        ``since`` and ``until``.
+        """
+        first = 0
+        last = len(self._line_offsets)
+        if since is not None:
+            first = bisect.bisect_left(self._timestamps, _seconds(since))
+        if until is not None:
+            last = bisect.bisect_right(self._timestamps, _seconds(until))
+        return six.moves.range(first, last)
+
+    def lines(self, since=None, until=None):
+        """Iterate over the lines of the local copy.
+
+        :param datetime.datetime since: Skip the lines logged before it.
+        :param datetime.datetime until: Skip the lines logged after it.
+        """
+        for index in self._window(since, until):
+            yield self._line(index)
+
+    @property
+    def data(self):
+        """The list of the lines of the local copy."""
+        return list(self.lines())
+
+    def filter(self, pattern=None, since=None, until=None, remote=False):
         """
         Filter the log file using the pattern argument or object's pattern
+
+        :param datetime.datetime since: Skip the lines logged before it.
+        :param datetime.datetime until: Skip the lines logged after it.
+        :param bool remote: Run ``grep -P`` on the server instead of
+            filtering the local copy, only the matching lines are
+            transferred. All the remote lines since the start of the local
+            copy are filtered, including the ones not fetched yet, and the
+            time window is not supported.
         """
 
         if pattern is None:
             pattern = self.pattern
 
+        if remote:
+            if since is not None or until is not None:
+                raise ValueError('Remote filter has no time window')
+            return self._remote_filter(pattern)
+
         compiled = re.compile(pattern)
 
         result = []
 
-        for line in self.data:
+        for line in self.lines(since, until):
             if compiled.search(line) is not None:
                 result.append(line)
 
         return result
+
+    def _remote_filter(self, pattern):
+        """Filter the remote log with ``grep`` on the server."""
+        grep = u'grep -P -e {0}'.format(shlex_quote(pattern))
+        path = shlex_quote(self.remote_path)
+        if self.start_offset:
+            cmd = u'set -o pipefail; tail -c +{0} {1} | {2}'.format(
+                self.start_offset + 1, path, grep)
+        else:
+            cmd = u'{0} {1}'.format(grep, path)
+        result = ssh.command(
+            cmd, hostname=self.hostname, output_format='plain', timeout=120)
+        if result.return_code == 1:
+            return []
+        if result.return_code != 0:
+            raise IOError(
+                u'Could not filter {0}: {1}'.format(
+                    self.remote_path, result.stderr))
+        return result.stdout.splitlines(True)
+
+    def close(self):
+        """Release the memory map and remove the local copy."""
+        self._close_map()
+        if os.path.exists(self.local_path):
+            os.remove(self.local_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
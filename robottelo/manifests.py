@@ -1,32 +1,317 @@
-"""Manifest clonning tools.."""
+"""Manifest clonning tools.
+
+Cloning a manifest means changing its consumer ``uuid`` and signing it
+again, which :class:`ManifestCloner` does without recompressing the
+unchanged template members. The template and the signing key are cached on
+disk, shared by all the test processes, and cloned manifests are prepared
+in background so :func:`clone` returns immediately.
+"""
+import hashlib
 import json
+import logging
+import os
 import requests
 import six
+import struct
+import tempfile
+import threading
 import time
 import uuid
 import zipfile
+import zlib
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding
 from robottelo.config import settings
+from six.moves import queue
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _cache_dir():
+    """Return the manifest cache directory, creating it if needed."""
+    cache_dir = settings.fake_manifest.cache_dir or os.path.join(
+        tempfile.gettempdir(), 'robottelo_manifests')
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            # Created by another process meanwhile
+            if not os.path.isdir(cache_dir):
+                raise
+    return cache_dir
+
+
+def _write_atomic(path, content):
+    """Write ``content`` bytes to ``path`` so other processes never read a
+    partially written file.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as temp_file:
+        temp_file.write(content)
+    os.rename(temp_path, path)
+
+
+def cached_download(url, cache_dir=None, max_age=None):
+    """Download ``url`` through a disk cache.
+
+    A cached copy younger than ``max_age`` seconds is used as is. An older
+    copy is revalidated with a conditional request using its ``ETag`` and
+    ``Last-Modified`` headers, and is also used when the server can not be
+    reached.
+
+    :param str url: The URL to download.
+    :param str cache_dir: The cache directory, defaults to the
+        ``[fake_manifest] cache_dir`` setting.
+    :param int max_age: Defaults to the ``[fake_manifest] cache_max_age``
+        setting.
+    :return: The downloaded content.
+    :rtype: bytes
+    """
+    if cache_dir is None:
+        cache_dir = _cache_dir()
+    if max_age is None:
+        max_age = settings.fake_manifest.cache_max_age or 0
+    path = os.path.join(
+        cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+    try:
+        with open(path, 'rb') as cached_file:
+            content = cached_file.read()
+        with open(path + '.json') as meta_file:
+            meta = json.load(meta_file)
+        age = time.time() - os.path.getmtime(path)
+    except (IOError, OSError, ValueError):
+        content = meta = None
+    if content is not None and age < max_age:
+        return content
+
+    headers = {}
+    if meta is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        response = requests.get(url, headers=headers)
+    except requests.RequestException as err:
+        if content is None:
+            raise
+        LOGGER.warning('Using cached %s, download failed: %s', url, err)
+        return content
+    if response.status_code == 304 and content is not None:
+        os.utime(path, None)
+        return content
+    response.raise_for_status()
+    content = response.content
+    _write_atomic(path + '.json', json.dumps({
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'url': url,
+    }).encode('utf-8'))
+    _write_atomic(path, content)
+    return content
+
+
+def _dos_date_time(date_time):
+    """Return the MS-DOS ``(time, date)`` of a zip member ``date_time``."""
+    return (
+        date_time[3] << 11 | date_time[4] << 5 | date_time[5] // 2,
+        (date_time[0] - 1980) << 9 | date_time[1] << 5 | date_time[2],
+    )
+
+
+def _raw_members(data):
+    """Return the members of the ``data`` zip archive with their raw local
+    entries, the local header followed by the compressed data.
+
+    :return: A list of ``(ZipInfo, bytes)`` tuples.
+    """
+    members = []
+    for info in zipfile.ZipFile(six.BytesIO(data)).infolist():
+        start = info.header_offset
+        header = struct.unpack(
+            zipfile.structFileHeader,
+            data[start:start + zipfile.sizeFileHeader]
+        )
+        end = (start + zipfile.sizeFileHeader + header[10] + header[11] +
+               info.compress_size)
+        if info.flag_bits & 0x08:
+            # Data descriptor, its signature is optional
+            end += 16 if data[end:end + 4] == b'PK\x07\x08' else 12
+        members.append((info, data[start:end]))
+    return members
+
+
+class _ZipBuilder(object):
+    """Build a zip archive from new members and raw members of other
+    archives, which are copied without being decompressed.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._central_directory = []
+        self._offset = 0
+
+    def add_raw(self, info, raw):
+        """Add a member returned by :func:`_raw_members`."""
+        filename = info.filename.encode('utf-8')
+        dos_time, dos_date = _dos_date_time(info.date_time)
+        self._central_directory.append(struct.pack(
+            zipfile.structCentralDir,
+            zipfile.stringCentralDir,
+            info.create_version, info.create_system,
+            info.extract_version, info.reserved,
+            info.flag_bits, info.compress_type, dos_time, dos_date,
+            info.CRC, info.compress_size, info.file_size,
+            len(filename), 0, 0, 0,
+            info.internal_attr, info.external_attr, self._offset,
+        ) + filename)
+        self._entries.append(raw)
+        self._offset += len(raw)
+
+    def add(self, name, data, compress_type=zipfile.ZIP_DEFLATED):
+        """Add a new member named ``name`` with ``data`` bytes."""
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = compress_type
+        info.external_attr = 0o600 << 16
+        info.CRC = zlib.crc32(data) & 0xffffffff
+        info.file_size = len(data)
+        if compress_type == zipfile.ZIP_DEFLATED:
+            compressor = zlib.compressobj(
+                zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            data = compressor.compress(data) + compressor.flush()
+        info.compress_size = len(data)
+        self.add_raw(info, info.FileHeader() + data)
+
+    def getvalue(self):
+        """Return the archive bytes."""
+        central_directory = b''.join(self._central_directory)
+        return b''.join(self._entries) + central_directory + struct.pack(
+            zipfile.structEndArchive,
+            zipfile.stringEndArchive,
+            0, 0,
+            len(self._central_directory), len(self._central_directory),
+            len(central_directory), self._offset, 0,
+        )
 
 
 class ManifestCloner(object):
-    """Manifest clonning utility class."""
-    def __init__(self, template=None, signing_key=None):
+    """Manifest clonning utility class.
+
+    :param bytes template: The manifest template, downloaded from the
+        ``[fake_manifest] url`` setting when not provided.
+    :param bytes signing_key: The PEM signing key, downloaded from the
+        ``[fake_manifest] key_url`` setting when not provided.
+    :param int pool_size: Number of cloned manifests prepared in background,
+        defaults to the ``[fake_manifest] pool_size`` setting. ``0``
+        disables the background pool.
+    """
+    def __init__(self, template=None, signing_key=None, pool_size=None):
         self.template = template
         self.signing_key = signing_key
+        self.pool_size = pool_size
+        self.private_key = None
+        self._consumer_members = None
+        self._consumer_data = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self._filler = None
 
     def _download_manifest_info(self):
         """Download and cache the manifest information."""
-        self.template = requests.get(settings.fake_manifest.url).content
-        self.signing_key = requests.get(settings.fake_manifest.key_url).content
-        self.private_key = serialization.load_pem_private_key(
-            self.signing_key,
-            password=None,
-            backend=default_backend()
+        if self.template is None:
+            self.template = cached_download(settings.fake_manifest.url)
+        if self.signing_key is None:
+            self.signing_key = cached_download(
+                settings.fake_manifest.key_url)
+
+    def _prepare(self):
+        """Load the signing key and split the template consumer export, once
+        for all the clones.
+        """
+        with self._lock:
+            if self._consumer_members is not None:
+                return
+            if self.signing_key is None or self.template is None:
+                self._download_manifest_info()
+            self.private_key = serialization.load_pem_private_key(
+                self.signing_key,
+                password=None,
+                backend=default_backend()
+            )
+            template_zip = zipfile.ZipFile(six.BytesIO(self.template))
+            consumer_export = template_zip.read('consumer_export.zip')
+            consumer_members = []
+            for info, raw in _raw_members(consumer_export):
+                if info.filename == 'export/consumer.json':
+                    self._consumer_data = json.loads(zipfile.ZipFile(
+                        six.BytesIO(consumer_export)
+                    ).read(info).decode('utf-8'))
+                else:
+                    consumer_members.append((info, raw))
+            self._consumer_members = consumer_members
+
+    def _clone(self):
+        """Build a cloned manifest."""
+        self._prepare()
+        # Generate a new consumer_export.zip changing the consumer uuid,
+        # the other members are copied as they are.
+        consumer_export = _ZipBuilder()
+        for info, raw in self._consumer_members:
+            consumer_export.add_raw(info, raw)
+        consumer_data = dict(
+            self._consumer_data, uuid=six.text_type(uuid.uuid1()))
+        consumer_export.add(
+            'export/consumer.json',
+            json.dumps(consumer_data).encode('utf-8')
+        )
+        consumer_export = consumer_export.getvalue()
+
+        # Generate a new manifest.zip with the generated consumer_export.zip
+        # and its signature, both are stored as they would not shrink.
+        manifest = _ZipBuilder()
+        manifest.add(
+            'consumer_export.zip', consumer_export, zipfile.ZIP_STORED)
+        manifest.add(
+            'signature',
+            self.private_key.sign(
+                consumer_export, padding.PKCS1v15(), hashes.SHA256()),
+            zipfile.ZIP_STORED
         )
+        return six.BytesIO(manifest.getvalue())
+
+    def _fill(self):
+        """Keep the pool full of cloned manifests."""
+        while True:
+            try:
+                manifest = self._clone()
+            except Exception:
+                LOGGER.exception('Failed to prepare a cloned manifest')
+                with self._lock:
+                    self._filler = None
+                return
+            self._pool.put(manifest)
+
+    def _start_filler(self):
+        """Start the background thread filling the pool, if needed."""
+        pool_size = self.pool_size
+        if pool_size is None:
+            pool_size = settings.fake_manifest.pool_size or 0
+        if pool_size <= 0:
+            return False
+        with self._lock:
+            if self._pool is None:
+                self._pool = queue.Queue(pool_size)
+            if self._filler is None:
+                self._filler = threading.Thread(target=self._fill)
+                self._filler.daemon = True
+                self._filler.start()
+        return True
+
+    def warm(self):
+        """Start preparing cloned manifests in background."""
+        self._start_filler()
 
     def clone(self):
         """Clones a RedHat-manifest file.
@@ -36,59 +321,19 @@ class ManifestCloner(object):
         candlepin server in order to accept uploading the cloned
         manifest.
 
+        A manifest prepared by the background pool is returned when
+        available, otherwise it is cloned right away.
+
         :return: A file-like object (``BytesIO`` on Python 3 and
             ``StringIO`` on Python 2) with the contents of the cloned
             manifest.
         """
-        if self.signing_key is None or self.template is None:
-            self._download_manifest_info()
-
-        template_zip = zipfile.ZipFile(six.BytesIO(self.template))
-        # Extract the consumer_export.zip from the template manifest.
-        consumer_export_zip = zipfile.ZipFile(
-            six.BytesIO(template_zip.read('consumer_export.zip')))
-
-        # Generate a new consumer_export.zip file changing the consumer
-        # uuid.
-        consumer_export = six.BytesIO()
-        with zipfile.ZipFile(consumer_export, 'w') as new_consumer_export_zip:
-            for name in consumer_export_zip.namelist():
-                if name == 'export/consumer.json':
-                    consumer_data = json.loads(
-                        consumer_export_zip.read(name).decode('utf-8'))
-                    consumer_data['uuid'] = six.text_type(uuid.uuid1())
-                    new_consumer_export_zip.writestr(
-                        name,
-                        json.dumps(consumer_data)
-                    )
-                else:
-                    new_consumer_export_zip.writestr(
-                        name,
-                        consumer_export_zip.read(name)
-                    )
-
-        # Generate a new manifest.zip file with the generated
-        # consumer_export.zip and new signature.
-        manifest = six.BytesIO()
-        with zipfile.ZipFile(
-                manifest, 'w', zipfile.ZIP_DEFLATED) as manifest_zip:
-            consumer_export.seek(0)
-            manifest_zip.writestr(
-                'consumer_export.zip',
-                consumer_export.read()
-            )
-            consumer_export.seek(0)
-            signer = self.private_key.signer(
-                padding.PKCS1v15(), hashes.SHA256())
-            signer.update(consumer_export.read())
-            manifest_zip.writestr(
-                'signature',
-                signer.finalize()
-            )
-        # Make sure that the file-like object is at the beginning and
-        # ready to be read.
-        manifest.seek(0)
-        return manifest
+        if self._start_filler():
+            try:
+                return self._pool.get_nowait()
+            except queue.Empty:
+                pass
+        return self._clone()
 
     def original(self):
         """Returns the original manifest as a file-like object.
@@ -0,0 +1,202 @@
+"""Asyncio utilities for writing Candlepin tests
+
+Asyncio counterparts of :class:`robottelo.performance.candlepin.Candlepin`
+and of the register by activation-key, register and attach and deletion
+threads of :mod:`robottelo.performance.thread`. Each simulated client is a
+coroutine instead of an OS thread, so thousands of clients can be simulated
+from a single process::
+
+    time_result_dict = run(register_activation_key(
+        ak_name, default_org, vm_list, num_iterations))
+
+The workloads return the timing results with the same layout of the thread
+ones, a dictionary mapping ``thread-N`` to the list of timings of the Nth
+client, so they can be written with the same statistics utilities.
+
+Requires Python 3.5 or later, see :mod:`robottelo.async_ssh`.
+"""
+import asyncio
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from robottelo import async_ssh
+from robottelo.config import settings
+from robottelo.performance.candlepin import Candlepin
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncCandlepin(object):
+    """Measures performance of RH Satellite 6 Candlepin Subscription
+    functionality with asyncio clients
+    """
+
+    @classmethod
+    async def single_register_activation_key(
+            cls, ak_name, default_org, vm_ip):
+        """Subscribe VM to Satellite by Register + ActivationKey"""
+        await async_ssh.command('subscription-manager clean', hostname=vm_ip)
+        result = await async_ssh.command(
+            'time -p subscription-manager register --activationkey={0} '
+            '--org={1}'.format(ak_name, default_org),
+            hostname=vm_ip
+        )
+
+        if result.return_code != 0:
+            LOGGER.error('Fail to subscribe {0} by ak!'.format(vm_ip))
+        else:
+            LOGGER.info('Subscribe client {0} successfully'.format(vm_ip))
+        return Candlepin.get_real_time(result.stderr)
+
+    @classmethod
+    async def single_register_attach(
+            cls, sub_id, default_org, environment, vm_ip):
+        """Subscribe VM to Satellite by Register + Attach"""
+        await async_ssh.command('subscription-manager clean', hostname=vm_ip)
+
+        time_reg = await cls.sub_mgr_register_authentication(
+            default_org, environment, vm_ip)
+
+        time_att = await cls.sub_mgr_attach(sub_id, vm_ip)
+        return (time_reg, time_att)
+
+    @classmethod
+    async def sub_mgr_register_authentication(
+            cls, default_org, environment, vm_ip):
+        """subscription-manager register -u -p --org --environment"""
+        result = await async_ssh.command(
+            'time -p subscription-manager register --username={0} '
+            '--password={1} '
+            '--org={2} '
+            '--environment={3}'
+            .format(
+                settings.server.admin_username,
+                settings.server.admin_password,
+                default_org,
+                environment
+            ),
+            hostname=vm_ip
+        )
+
+        if result.return_code != 0:
+            LOGGER.error(
+                'Fail to register client {0} by sub-mgr!'.format(vm_ip)
+            )
+        else:
+            LOGGER.info('Register client {0} successfully'.format(vm_ip))
+        return Candlepin.get_real_time(result.stderr)
+
+    @classmethod
+    async def sub_mgr_attach(cls, pool_id, vm_ip):
+        """subscription-manager attach --pool=pool_id"""
+        result = await async_ssh.command(
+            'time -p subscription-manager attach --pool={0}'.format(pool_id),
+            hostname=vm_ip
+        )
+
+        if result.return_code != 0:
+            LOGGER.error('Fail to attach client {0}'.format(vm_ip))
+        else:
+            LOGGER.info('Attach client {0} successfully'.format(vm_ip))
+        return Candlepin.get_real_time(result.stderr)
+
+
+async def register_activation_key(
+        ak_name, default_org, vm_list, num_iterations):
+    """Register each vm of ``vm_list`` ``num_iterations`` times by
+    activation key, all the vms at the same time.
+
+    :return: A dictionary mapping ``thread-N`` to the registration timings
+        of the Nth vm.
+    """
+    time_result_dict = {
+        'thread-{0}'.format(i): [] for i in range(len(vm_list))}
+
+    async def client(thread_name, vm_ip):
+        for i in range(num_iterations):
+            LOGGER.debug(
+                '{0}: register with ak {1} on {2} attempt {3}'
+                .format(thread_name, ak_name, vm_ip, i))
+            time_result_dict[thread_name].append(
+                await AsyncCandlepin.single_register_activation_key(
+                    ak_name, default_org, vm_ip))
+
+    await asyncio.gather(*(
+        client('thread-{0}'.format(i), vm_ip)
+        for i, vm_ip in enumerate(vm_list)
+    ))
+    return time_result_dict
+
+
+async def register_attach(
+        sub_id, default_org, environment, vm_list, num_iterations):
+    """Register and attach each vm of ``vm_list`` ``num_iterations`` times,
+    all the vms at the same time.
+
+    :return: A tuple with the register and the attach timings dictionaries,
+        each mapping ``thread-N`` to the timings of the Nth vm.
+    """
+    time_result_dict_register = {
+        'thread-{0}'.format(i): [] for i in range(len(vm_list))}
+    time_result_dict_attach = {
+        'thread-{0}'.format(i): [] for i in range(len(vm_list))}
+
+    async def client(thread_name, vm_ip):
+        for i in range(num_iterations):
+            LOGGER.debug(
+                '{0}: register with subscription {1} on vm {2} attempt {3}'
+                .format(thread_name, sub_id, vm_ip, i))
+            time_reg, time_att = await AsyncCandlepin.single_register_attach(
+                sub_id, default_org, environment, vm_ip)
+            time_result_dict_register[thread_name].append(time_reg)
+            time_result_dict_attach[thread_name].append(time_att)
+
+    await asyncio.gather(*(
+        client('thread-{0}'.format(i), vm_ip)
+        for i, vm_ip in enumerate(vm_list)
+    ))
+    return time_result_dict_register, time_result_dict_attach
+
+
+async def delete(uuid_lists, max_workers=100):
+    """Delete the hosts of each list of ``uuid_lists``, all the lists at the
+    same time.
+
+    The deletions are made by the REST API with blocking ``requests`` calls,
+    which are run on a pool of ``max_workers`` threads.
+
+    :return: A dictionary mapping ``thread-N`` to the deletion timings of
+        the Nth list.
+    """
+    loop = asyncio.get_event_loop()
+    time_result_dict = {
+        'thread-{0}'.format(i): [] for i in range(len(uuid_lists))}
+
+    async def client(thread_id, uuid_list):
+        thread_name = 'thread-{0}'.format(thread_id)
+        for idx, uuid in enumerate(uuid_list):
+            if uuid == '':
+                continue
+            LOGGER.debug(
+                'deletion attempt # {0} in thread {1}-uuid: {2}'
+                .format(idx, thread_id, uuid))
+            time_result_dict[thread_name].append(await loop.run_in_executor(
+                executor, Candlepin.single_delete, uuid, thread_id))
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        await asyncio.gather(*(
+            client(i, uuid_list) for i, uuid_list in enumerate(uuid_lists)))
+    return time_result_dict
+
+
+def run(workload):
+    """Run a ``workload`` coroutine until it is complete and close the
+    pooled connections.
+
+    :return: The ``workload`` result.
+    """
+    loop = asyncio.get_event_loop()
+    try:
+        return loop.run_until_complete(workload)
+    finally:
+        async_ssh.connection_pool.close_all()
@@ -0,0 +1,284 @@
+"""Multi-process load generator for performance tests
+
+Spreads simulated clients across worker processes, so the test driver does
+not become the bottleneck and the measured latency reflects the server::
+
+    generator = LoadGenerator(processes=4)
+    result = generator.run(
+        Candlepin.single_register_activation_key,
+        [[(ak_name, org, vm_ip)] * 100 for vm_ip in vm_list]
+    )
+    result.values['thread-0']  # values returned by the first client calls
+    result.latencies.histogram().percentiles(50, 99)
+
+Two modes are supported:
+
+closed loop
+    The default, each client makes its calls one after the other, waiting
+    for a call to finish before making the next one. The clients of a worker
+    process run on threads.
+
+open loop
+    When ``rate`` is given, the calls are started at a fixed arrival rate
+    whatever the time the previous calls take. The latency of a call is
+    measured from its scheduled start, so the time spent waiting for a free
+    worker thread is accounted for.
+
+The load can be ramped up in ``ramp_steps`` steps of ``ramp_interval``
+seconds: on closed loop a group of clients is started at each step, on open
+loop the arrival rate is increased at each step.
+
+The workers send the result of each call to the parent process through a
+queue. The called function and its arguments must be picklable on
+platforms which spawn processes instead of forking them.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+
+from multiprocessing.pool import ThreadPool
+from robottelo import ssh
+from robottelo.performance.stat import LatencyRecorder
+from six.moves.queue import Empty
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _reset_connection_pool():
+    """Replace the SSH connection pool inherited from the parent process.
+
+    The inherited connections share their sockets with the parent one and
+    their transport threads do not exist in a forked process.
+    """
+    ssh.connection_pool = ssh.SSHConnectionPool(
+        ssh.connection_pool.max_per_host,
+        ssh.connection_pool.max_idle_time,
+    )
+
+
+def _call(queue, client, index, func, args, scheduled=None):
+    """Call ``func`` and put its result on ``queue``.
+
+    The result is a ``(client, index, start, latency, value, error)`` tuple,
+    ``error`` is ``None`` when the call succeeded.
+    """
+    start = time.time() if scheduled is None else scheduled
+    try:
+        value = func(*args)
+    except Exception as err:
+        LOGGER.error('Client %s call %s failed: %s', client, index, err)
+        queue.put((client, index, start, time.time() - start, None,
+                   repr(err)))
+    else:
+        queue.put((client, index, start, time.time() - start, value, None))
+
+
+def _run_client(queue, client, func, calls, start):
+    """Make the ``calls`` of a client one after the other, from ``start``."""
+    delay = start - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    for index, args in enumerate(calls):
+        _call(queue, client, index, func, args)
+
+
+def _closed_loop_worker(queue, func, clients):
+    """Run the ``clients`` of a worker process on threads.
+
+    :param clients: A list of ``(client, calls, start)`` tuples.
+    """
+    _reset_connection_pool()
+    try:
+        threads = [
+            threading.Thread(
+                target=_run_client,
+                args=(queue, client, func, calls, start)
+            )
+            for client, calls, start in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        ssh.connection_pool.close_all()
+        queue.put(None)
+
+
+def _open_loop_worker(queue, func, calls, concurrency):
+    """Start the ``calls`` of a worker process at their scheduled time.
+
+    :param calls: A list of ``(client, index, args, scheduled)`` tuples
+        sorted by scheduled time.
+    :param int concurrency: Number of threads making the calls.
+    """
+    _reset_connection_pool()
+    pool = ThreadPool(concurrency)
+    try:
+        for client, index, args, scheduled in calls:
+            delay = scheduled - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            pool.apply_async(
+                _call, (queue, client, index, func, args, scheduled))
+        pool.close()
+        pool.join()
+    finally:
+        pool.terminate()
+        ssh.connection_pool.close_all()
+        queue.put(None)
+
+
+class LoadResult(object):
+    """Results of a :meth:`LoadGenerator.run`.
+
+    :param int clients: The number of clients.
+    :param float window: The :class:`robottelo.performance.stat.
+        LatencyRecorder` window.
+    """
+
+    def __init__(self, clients, window=None):
+        #: Values returned by the calls of each client, by ``thread-N``
+        #: name, in the calls order. The failed calls are skipped.
+        self.values = {}
+        #: ``(client, call index, error)`` of the failed calls
+        self.errors = []
+        #: Latencies of the successful calls
+        self.latencies = LatencyRecorder(window=window)
+        self._values = dict((client, []) for client in range(clients))
+
+    def add(self, client, index, start, latency, value, error):
+        """Add the result of a call."""
+        if error is not None:
+            self.errors.append((client, index, error))
+            return
+        self._values[client].append((index, value))
+        self.latencies.record(latency, timestamp=start)
+
+    def finish(self):
+        """Sort the values of each client by call index."""
+        for client, values in self._values.items():
+            self.values['thread-{0}'.format(client)] = [
+                value for _, value in sorted(values, key=lambda x: x[0])]
+
+
+class LoadGenerator(object):
+    """Makes calls on behalf of many clients from worker processes.
+
+    :param int processes: Maximum number of worker processes, defaults to
+        the number of CPUs.
+    :param float rate: Calls started per second on open loop mode, ``None``
+        for closed loop mode.
+    :param int concurrency: Number of threads of each worker process making
+        the open loop calls.
+    :param int ramp_steps: Number of steps the load is ramped up in.
+    :param float ramp_interval: Seconds between two ramp steps.
+    :param float window: Seconds of each time window of the latencies.
+    :param float start_delay: Seconds given to the workers to start before
+        the first call, so all the clients start together.
+    """
+
+    def __init__(self, processes=None, rate=None, concurrency=10,
+                 ramp_steps=1, ramp_interval=0, window=None, start_delay=1):
+        if rate is not None and rate <= 0:
+            raise ValueError('The arrival rate must be positive')
+        self.processes = processes or multiprocessing.cpu_count()
+        self.rate = rate
+        self.concurrency = concurrency
+        self.ramp_steps = max(ramp_steps, 1)
+        self.ramp_interval = ramp_interval
+        self.window = window
+        self.start_delay = start_delay
+
+    def _schedule(self, count, start):
+        """Return the start times of ``count`` open loop calls."""
+        schedule = []
+        elapsed = 0.0
+        for _ in range(count):
+            schedule.append(start + elapsed)
+            step = self.ramp_steps
+            if self.ramp_interval:
+                step = min(
+                    int(elapsed // self.ramp_interval) + 1, self.ramp_steps)
+            elapsed += float(self.ramp_steps) / (self.rate * step)
+        return schedule
+
+    def _closed_loop_workers(self, func, clients, start):
+        """Return the arguments of each closed loop worker process."""
+        processes = min(self.processes, len(clients))
+        workers = [[] for _ in range(processes)]
+        for client, calls in enumerate(clients):
+            step = client * self.ramp_steps // len(clients)
+            workers[client % processes].append(
+                (client, calls, start + step * self.ramp_interval))
+        return [
+            (_closed_loop_worker, (func, worker_clients))
+            for worker_clients in workers
+        ]
+
+    def _open_loop_workers(self, func, clients, start):
+        """Return the arguments of each open loop worker process."""
+        # Interleave the clients calls, so they all progress together
+        calls = [
+            (client, index, client_calls[index])
+            for index in range(max(len(client_calls)
+                                   for client_calls in clients))
+            for client, client_calls in enumerate(clients)
+            if index < len(client_calls)
+        ]
+        processes = min(self.processes, len(calls))
+        workers = [[] for _ in range(processes)]
+        schedule = self._schedule(len(calls), start)
+        for position, (call, scheduled) in enumerate(zip(calls, schedule)):
+            workers[position % processes].append(call + (scheduled,))
+        return [
+            (_open_loop_worker, (func, worker_calls, self.concurrency))
+            for worker_calls in workers
+        ]
+
+    def run(self, func, clients):
+        """Make the calls of all the clients and wait for them to finish.
+
+        :param func: The function called, its return value is kept on
+            :attr:`LoadResult.values`.
+        :param clients: A list with the list of the arguments tuples of the
+            calls of each client.
+        :return: A :class:`LoadResult`.
+        """
+        result = LoadResult(len(clients), self.window)
+        if not any(clients):
+            result.finish()
+            return result
+        start = time.time() + self.start_delay
+        result.latencies.start = start
+        if self.rate is None:
+            workers = self._closed_loop_workers(func, clients, start)
+        else:
+            workers = self._open_loop_workers(func, clients, start)
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=target, args=(queue,) + args)
+            for target, args in workers
+        ]
+        for process in processes:
+            process.daemon = True
+            process.start()
+        LOGGER.debug('Started %s load worker processes', len(processes))
+        finished = 0
+        while finished < len(processes):
+            try:
+                message = queue.get(timeout=1)
+            except Empty:
+                if not any(process.is_alive() for process in processes):
+                    LOGGER.error('Load worker processes exited early')
+                    break
+                continue
+            if message is None:
+                finished += 1
+            else:
+                result.add(*message)
+        for process in processes:
+            process.join()
+        result.finish()
+        return result
@@ -0,0 +1,191 @@
+"""Bulk registration of synthetic content hosts
+
+Registers thousands of fake consumers straight through the Candlepin API
+exposed by the Satellite under ``/rhsm``, without any virtual machine, to
+measure the registration performance::
+
+    registration = BulkRegistration(org['label'], activation_key=ak['name'])
+    uuids = registration.register(5000)
+    LOGGER.info(registration.stats())
+    registration.unregister(uuids)
+
+Each consumer facts are generated by
+:class:`robottelo.system_facts.SystemFacts`, which share a single template.
+The requests are sent by a pool of threads sharing a connection-pooled HTTP
+session, and the latency of each successful request is recorded by a
+:class:`robottelo.performance.stat.LatencyRecorder` per operation.
+"""
+import json
+import logging
+import requests
+import threading
+import time
+
+from multiprocessing.pool import ThreadPool
+from robottelo.config import settings
+from robottelo.performance.stat import LatencyHistogram, LatencyRecorder
+from robottelo.system_facts import SystemFacts
+from six.moves.urllib.parse import urljoin
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BulkRegistration(object):
+    """Registers synthetic consumers on an organization.
+
+    :param str org: The organization label.
+    :param str activation_key: The activation key name, the consumers are
+        registered with the admin credentials when not provided.
+    :param int workers: Number of requests sent at the same time.
+    :param str url: The Satellite URL, defaults to the configured one.
+    """
+
+    def __init__(self, org, activation_key=None, workers=20, url=None):
+        self.org = org
+        self.activation_key = activation_key
+        self.workers = workers
+        self.url = url or settings.server.get_url()
+        self.session = requests.Session()
+        self.session.verify = False
+        self.session.headers['Content-Type'] = 'application/json'
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        #: :class:`robottelo.performance.stat.LatencyRecorder` of the
+        #: successful requests, by operation
+        self.latencies = {}
+        #: Number of requests and of failed requests, by operation
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def _record(self, operation, start, status):
+        """Record a request started at ``start``, the ``status`` code is
+        ``None`` when the request raised.
+        """
+        latency = time.time() - start
+        failed = status is None or status >= 400
+        with self._lock:
+            if operation not in self.latencies:
+                self.latencies[operation] = LatencyRecorder()
+                self.counts[operation] = {'requests': 0, 'failed': 0}
+            recorder = self.latencies[operation]
+            counts = self.counts[operation]
+            counts['requests'] += 1
+            if failed:
+                counts['failed'] += 1
+        if not failed:
+            recorder.record(latency, timestamp=start)
+
+    def _map(self, func, items):
+        """Call ``func`` with each of ``items`` on the worker threads."""
+        pool = ThreadPool(self.workers)
+        try:
+            return pool.map(func, items, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    def register_one(self, facts):
+        """Register a consumer.
+
+        :param robottelo.system_facts.SystemFacts facts: The consumer facts.
+        :return: The consumer uuid or ``None`` if it was not registered.
+        """
+        params = {'owner': self.org}
+        auth = None
+        if self.activation_key is not None:
+            params['activation_keys'] = self.activation_key
+        else:
+            auth = settings.server.get_credentials()
+        body = u'{{"name": {0}, "type": "system", "facts": {1}}}'.format(
+            json.dumps(facts['network.hostname']), facts.to_json())
+        start = time.time()
+        try:
+            response = self.session.post(
+                urljoin(self.url, '/rhsm/consumers'),
+                params=params,
+                data=body.encode('utf-8'),
+                auth=auth,
+            )
+        except requests.RequestException as err:
+            self._record('register', start, None)
+            LOGGER.error('Failed to register %s: %s',
+                         facts['network.hostname'], err)
+            return None
+        self._record('register', start, response.status_code)
+        if response.status_code != 200:
+            LOGGER.error('Failed to register %s: %s',
+                         facts['network.hostname'], response.content)
+            return None
+        return response.json()['uuid']
+
+    def register(self, count, name=u'{0}-{1}.example.net', prefix=None):
+        """Register ``count`` consumers with random facts.
+
+        :param str name: The consumer names format, receiving the ``prefix``
+            and the consumer index.
+        :param str prefix: Defaults to a timestamp.
+        :return: The list of the uuids of the registered consumers, with
+            ``None`` for the failed ones.
+        """
+        if prefix is None:
+            prefix = u'bulk{0}'.format(int(time.time()))
+        return self._map(
+            lambda index: self.register_one(
+                SystemFacts.generate(name.format(prefix, index))),
+            range(count)
+        )
+
+    def unregister_one(self, uuid):
+        """Delete a consumer.
+
+        :return: Whether the consumer was deleted.
+        """
+        start = time.time()
+        try:
+            response = self.session.delete(
+                urljoin(self.url, '/rhsm/consumers/{0}'.format(uuid)),
+                auth=settings.server.get_credentials(),
+            )
+        except requests.RequestException as err:
+            self._record('unregister', start, None)
+            LOGGER.error('Failed to unregister %s: %s', uuid, err)
+            return False
+        self._record('unregister', start, response.status_code)
+        if response.status_code not in (200, 204):
+            LOGGER.error(
+                'Failed to unregister %s: %s', uuid, response.content)
+            return False
+        return True
+
+    def unregister(self, uuids):
+        """Delete the consumers of ``uuids``, skipping the ``None`` ones.
+
+        :return: The number of deleted consumers.
+        """
+        return sum(self._map(
+            self.unregister_one, [uuid for uuid in uuids if uuid]))
+
+    def histogram(self, operation='register'):
+        """Return the latency histogram of the successful requests of an
+        ``operation``.
+
+        :rtype: robottelo.performance.stat.LatencyHistogram
+        """
+        recorder = self.latencies.get(operation)
+        if recorder is None:
+            return LatencyHistogram()
+        return recorder.histogram()
+
+    def stats(self):
+        """Return the number of requests and failed requests of each
+        operation, with the latency statistics of
+        :meth:`robottelo.performance.stat.LatencyHistogram.stats` of its
+        successful requests.
+        """
+        stats = {}
+        for operation, counts in list(self.counts.items()):
+            stats[operation] = self.histogram(operation).stats()
+            stats[operation].update(counts)
+        return stats
@@ -1,43 +1,262 @@
-"""Test utilities for writing csv files"""
+"""Test utilities for writing csv files
+
+The statistics are computed by :class:`LatencyHistogram`, a streaming
+histogram which keeps bounded memory whatever the number of timings, and
+:class:`LatencyRecorder` collects the timings of many threads::
+
+    recorder = LatencyRecorder(window=60)
+    # on each thread
+    recorder.record(latency)
+    # once done
+    recorder.histogram().percentiles(50, 90, 99, 99.9)
+    for start, histogram in recorder.windows():
+        ...
+
+"""
 import csv
+import math
+import threading
+import time
 
-try:
-    import numpy
-except ImportError:
-    numpy = None
 
+class LatencyHistogram(object):
+    """Streaming histogram of latencies.
 
-def generate_stat_for_concurrent_thread(
-        thread_name,
-        time_list,
-        stat_file_name,
-        bucket_size,
-        num_buckets):
-    """statistics computing utility for Candlepin tests"""
-    # check empty case: empty bucket has no need to compute stat
+    Values are counted in logarithmic buckets, so the percentiles are
+    accurate within ``precision`` relative error while the memory only
+    depends on the range of the values: about 600 buckets cover one
+    microsecond to one hour with the default precision. The count, minimum,
+    maximum, mean and standard deviation are exact.
+
+    Histograms with the same ``precision`` can be merged, e.g. the ones
+    recorded by different threads or processes.
+
+    :param values: Optional initial values.
+    :param float precision: The relative error of the percentiles.
+    :param float lowest: Values below it are counted as ``lowest``.
+    """
+
+    def __init__(self, values=(), precision=0.01, lowest=1e-6):
+        self.precision = precision
+        self.lowest = lowest
+        self._gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self._gamma)
+        #: Number of values of each bucket, by bucket index
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self._squares = 0.0
+        self.min = None
+        self.max = None
+        for value in values:
+            self.record(value)
+
+    def _index(self, value):
+        """Return the bucket index of ``value``."""
+        return int(math.ceil(
+            math.log(max(value, self.lowest)) / self._log_gamma))
+
+    def _value(self, index):
+        """Return the value representing the ``index`` bucket."""
+        return 2 * self._gamma ** index / (self._gamma + 1)
 
-    if numpy is None:
-        # numpy was removed from requirements to save build time
-        raise RuntimeError(
-            "Dependency `numpy` is not installed!"
-            " run `pip install numpy` in CI script"
+    def record(self, value, count=1):
+        """Record ``count`` occurrences of ``value``."""
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self._squares += value * value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the values of the ``other`` histogram.
+
+        :return: This histogram.
+        :raises ValueError: If the histograms precisions differ.
+        """
+        if (other.precision, other.lowest) != (self.precision, self.lowest):
+            raise ValueError('Can not merge histograms of different precision')
+        for index, count in list(other.counts.items()):
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self._squares += other._squares
+        for value in (other.min, other.max):
+            if value is not None:
+                if self.min is None or value < self.min:
+                    self.min = value
+                if self.max is None or value > self.max:
+                    self.max = value
+        return self
+
+    @property
+    def mean(self):
+        """The mean of the values."""
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self):
+        """The population standard deviation of the values."""
+        if not self.count:
+            return None
+        mean = self.mean
+        return math.sqrt(max(self._squares / self.count - mean * mean, 0))
+
+    def percentiles(self, *percents):
+        """Return the percentiles of the values, in a single pass over the
+        buckets.
+
+        :param percents: Percentages between 0 and 100.
+        :return: A list with a value for each percentage, ``None`` values if
+            the histogram is empty.
+        """
+        if not self.count:
+            return [None] * len(percents)
+        ranks = sorted(
+            (percent * (self.count - 1) / 100.0, position)
+            for position, percent in enumerate(percents)
         )
+        results = [None] * len(percents)
+        indexes = sorted(self.counts)
+        seen = 0
+        bucket = 0
+        for rank, position in ranks:
+            if rank <= 0:
+                results[position] = self.min
+                continue
+            if rank >= self.count - 1:
+                results[position] = self.max
+                continue
+            while seen + self.counts[indexes[bucket]] <= rank:
+                seen += self.counts[indexes[bucket]]
+                bucket += 1
+            results[position] = min(
+                max(self._value(indexes[bucket]), self.min), self.max)
+        return results
 
-    if bucket_size == 0:
-        return
-    else:
-        num_buckets = len(time_list)/bucket_size
+    def percentile(self, percent):
+        """Return a percentile of the values."""
+        return self.percentiles(percent)[0]
 
-    return_stat = {}
+    @property
+    def median(self):
+        """The median of the values."""
+        return self.percentile(50)
 
-    # create list of bucket series
-    buckets = ['{0}-{1}'.format(bucket_size * i + 1, bucket_size * (i + 1))
-               for i in range(num_buckets)]
+    def stats(self):
+        """Return the ``count``, ``min``, ``median``, ``mean``, ``max``,
+        ``std`` and the ``p90``, ``p95``, ``p99`` and ``p99.9``
+        percentiles.
+        """
+        p50, p90, p95, p99, p999 = self.percentiles(50, 90, 95, 99, 99.9)
+        return {
+            'count': self.count,
+            'min': self.min,
+            'median': p50,
+            'mean': self.mean,
+            'max': self.max,
+            'std': self.std,
+            'p90': p90,
+            'p95': p95,
+            'p99': p99,
+            'p99.9': p999,
+        }
+
+
+class LatencyRecorder(object):
+    """Records latencies from many threads.
+
+    Each thread records into its own histograms, so recording only takes a
+    lock the first time a thread records. The histograms are merged when
+    the results are read.
+
+    :param float window: Length in seconds of the time windows the values
+        are grouped by, ``None`` to keep all the values together.
+    :param float precision: The :class:`LatencyHistogram` precision.
+    """
+
+    def __init__(self, window=None, precision=0.01):
+        self.window = window
+        self.precision = precision
+        self.start = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_histograms = []
 
+    def _own_histograms(self):
+        """Return the histograms of the current thread, by window."""
+        histograms = getattr(self._local, 'histograms', None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+            with self._lock:
+                self._thread_histograms.append(histograms)
+        return histograms
+
+    def record(self, value, timestamp=None):
+        """Record a latency.
+
+        :param float value: The latency in seconds.
+        :param float timestamp: When the latency was measured, used to find
+            its time window, defaults to now.
+        """
+        window = 0
+        if self.window is not None:
+            if timestamp is None:
+                timestamp = time.time()
+            window = int((timestamp - self.start) // self.window)
+        histograms = self._own_histograms()
+        histogram = histograms.get(window)
+        if histogram is None:
+            histogram = histograms[window] = LatencyHistogram(
+                precision=self.precision)
+        histogram.record(value)
+
+    def windows(self):
+        """Return the histograms of all the threads merged by time window.
+
+        :return: A list of ``(window start, histogram)`` tuples sorted by
+            time, the start is in seconds since the recorder creation.
+        """
+        with self._lock:
+            thread_histograms = list(self._thread_histograms)
+        merged = {}
+        for histograms in thread_histograms:
+            for window, histogram in list(histograms.items()):
+                if window not in merged:
+                    merged[window] = LatencyHistogram(
+                        precision=self.precision)
+                merged[window].merge(histogram)
+        return [
+            (window * (self.window or 0), merged[window])
+            for window in sorted(merged)
+        ]
+
+    def histogram(self):
+        """Return the histogram of all the recorded latencies."""
+        histogram = LatencyHistogram(precision=self.precision)
+        for _, window in self.windows():
+            histogram.merge(window)
+        return histogram
+
+
+def write_histogram_stat(name, histograms, stat_file_name):
+    """Write the statistics of each histogram as a row of a csv file.
+
+    :param str name: The title row.
+    :param histograms: A list of ``(label, LatencyHistogram)`` tuples.
+    :param str stat_file_name: The csv file, the rows are appended.
+    :return: A dictionary mapping the position of each histogram to its
+        ``(min, median, max, std)``.
+    """
+    return_stat = {}
     with open(stat_file_name, 'a') as handler:
         writer = csv.writer(handler)
         writer.writerow([])
-        writer.writerow(['{0}'.format(thread_name)])
+        writer.writerow(['{0}'.format(name)])
         writer.writerow([
             'bucket',
             'min',
@@ -49,44 +268,61 @@ def generate_stat_for_concurrent_thread(
             '95%',
             '99%'
         ])
-        for i, bucket in enumerate(buckets):
-            # slice the given time-list into buckets
-            time_list_slice = time_list[bucket_size * i:bucket_size * (i + 1)]
-
-            # variables for generating graphs only
-            gmin = numpy.amin(time_list_slice)
-            gmean = numpy.mean(time_list_slice)
-            gmedian = numpy.median(time_list_slice)
-            gmax = numpy.amax(time_list_slice)
-            gstd = numpy.std(time_list_slice)
-
+        for i, (label, histogram) in enumerate(histograms):
+            stats = histogram.stats()
             writer.writerow([
-                bucket,
-                gmin,
-                gmedian,
-                gmean,
-                gmax,
-                gstd,
-                numpy.percentile(time_list_slice, 90),
-                numpy.percentile(time_list_slice, 95),
-                numpy.percentile(time_list_slice, 99)
+                label,
+                stats['min'],
+                stats['median'],
+                stats['mean'],
+                stats['max'],
+                stats['std'],
+                stats['p90'],
+                stats['p95'],
+                stats['p99'],
             ])
 
             # update a dictionary with key as each bucket and values as stat
-            return_stat.update({i: (gmin, gmedian, gmax, gstd)})
-        return return_stat
+            return_stat[i] = (
+                stats['min'], stats['median'], stats['max'], stats['std'])
+    return return_stat
+
+
+def generate_stat_for_concurrent_thread(
+        thread_name,
+        time_list,
+        stat_file_name,
+        bucket_size,
+        num_buckets):
+    """statistics computing utility for Candlepin tests"""
+    # check empty case: empty bucket has no need to compute stat
+    if bucket_size == 0:
+        return
+    else:
+        num_buckets = len(time_list) // bucket_size
+
+    # create list of bucket series
+    histograms = [
+        (
+            '{0}-{1}'.format(bucket_size * i + 1, bucket_size * (i + 1)),
+            # slice the given time-list into buckets
+            LatencyHistogram(
+                time_list[bucket_size * i:bucket_size * (i + 1)]),
+        )
+        for i in range(num_buckets)
+    ]
+    return write_histogram_stat(thread_name, histograms, stat_file_name)
 
 
 def generate_stat_for_pulp_sync(index, time_list, stat_file_name):
     """statistics computing utility for Pulp synchronization tests"""
+    histogram = LatencyHistogram(time_list)
+    sync_min = histogram.min
+    sync_median = histogram.median
+    sync_max = histogram.max
+    sync_std = histogram.std
     with open(stat_file_name, 'a') as handler:
         writer = csv.writer(handler)
-
-        sync_min = numpy.amin(time_list)
-        sync_median = numpy.median(time_list)
-        sync_max = numpy.amax(time_list)
-        sync_std = numpy.std(time_list)
-
         writer.writerow([
             'test-{0}-threads'.format(index),
             sync_min,
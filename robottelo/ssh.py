@@ -1,10 +1,22 @@
-"""Utility module to handle the shared ssh connection."""
+"""Utility module to handle the shared ssh connection.
+
+The asyncio transport lives in :mod:`robottelo.async_ssh`, apart from this
+module, because it uses the Python 3.5 ``async``/``await`` syntax and this
+module must still import on Python 2.7 and 3.4.
+"""
+import atexit
 import base64
+import json
 import logging
 import os
 import paramiko
 import re
+import select
 import six
+import socket
+import threading
+import time
+import uuid
 
 from contextlib import contextmanager
 from robottelo.cli import hammer
@@ -14,8 +26,10 @@ logger = logging.getLogger(__name__)
 
 
 def decode_to_utf8(text):  # pragma: no cover
-    """In python 3 all strings are already unicode, no need to decode"""
-    if six.PY2:
+    """Decode the bytes read from a channel, strings which are already
+    unicode are returned as they are.
+    """
+    if isinstance(text, six.binary_type):
         return text.decode('utf-8')
     return text
 
@@ -73,9 +87,14 @@ def _call_paramiko_sshclient():  # pragma: no cover
     return SSHClient()
 
 
-def get_client(hostname=None, username=None, password=None,
-               key_filename=None, timeout=10):
-    """Returns a SSH client connected to given hostname"""
+def _get_credentials(hostname=None, username=None, password=None,
+                     key_filename=None):
+    """Fill the missing connection arguments from the ``server``
+    configuration section.
+
+    :return: A ``(hostname, username, password, key_filename)`` tuple.
+    :rtype: tuple
+    """
     if hostname is None:
         hostname = settings.server.hostname
     if username is None:
@@ -84,19 +103,219 @@ def get_client(hostname=None, username=None, password=None,
         key_filename = settings.server.ssh_key
     if password is None:
         password = settings.server.ssh_password
+    return hostname, username, password, key_filename
+
+
+def get_client(hostname=None, username=None, password=None,
+               key_filename=None, timeout=10):
+    """Returns a SSH client connected to given hostname"""
+    hostname, username, password, key_filename = _get_credentials(
+        hostname, username, password, key_filename)
     client = _call_paramiko_sshclient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     client.connect(
         hostname=hostname,
+        port=settings.server.ssh_port or 22,
         username=username,
         key_filename=key_filename,
         password=password,
         timeout=timeout
     )
+    sock = getattr(client.get_transport(), 'sock', None)
+    if isinstance(sock, socket.socket):
+        # commands are small request and response exchanges, do not let the
+        # Nagle's algorithm delay them waiting for acknowledgements
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     client._id = hex(id(client))
     return client
 
 
+class SSHConnectionPool(object):
+    """Thread safe pool of persistent SSH connections.
+
+    Connections are keyed by hostname, username, password and key filename,
+    so a connection is only reused with the same credentials it was opened
+    with. A borrowed connection is exclusive to the borrower until it is
+    returned to the pool, which happens automatically when using
+    :meth:`connection`::
+
+        with connection_pool.connection(hostname='example.com') as con:
+            execute_command('ls', con)
+
+    :param int max_per_host: Maximum number of connections (idle and
+        borrowed) kept open for a single key. Borrowers block until a
+        connection is returned when the limit is reached.
+    :param int max_idle_time: Seconds an idle connection is kept open before
+        being evicted from the pool.
+    """
+
+    #: Errors which indicate that a connection can no longer be trusted and
+    #: should not be returned to the pool.
+    connection_errors = (paramiko.SSHException, socket.error, EOFError)
+
+    def __init__(self, max_per_host=10, max_idle_time=300):
+        self.max_per_host = max_per_host
+        self.max_idle_time = max_idle_time
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self._idle = {}
+        self._in_use = {}
+        self._lock = threading.Condition()
+
+    @staticmethod
+    def _is_healthy(client):
+        """Check if the client transport is still active."""
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def _close(client):
+        """Close a client ignoring any error raised while closing it."""
+        try:
+            client.close()
+        except Exception as err:  # pragma: no cover
+            logger.debug(
+                'Error closing Paramiko client %s: %s',
+                getattr(client, '_id', None),
+                err
+            )
+
+    def _pop_expired(self):
+        """Remove and return all connections idle for too long.
+
+        Must be called while holding the pool lock.
+        """
+        expired = []
+        deadline = time.time() - self.max_idle_time
+        for key, idle in self._idle.items():
+            expired.extend(
+                client for client, last_used in idle if last_used < deadline)
+            self._idle[key] = [
+                item for item in idle if item[1] >= deadline]
+        return expired
+
+    def acquire(self, hostname=None, username=None, password=None,
+                key_filename=None, timeout=10):
+        """Borrow a connection from the pool, opening a new one if needed.
+
+        Arguments have the same meaning of the :func:`get_connection` ones.
+
+        :return: A tuple with the pool key and the borrowed client. Both must
+            be passed to :meth:`release` when the client is no longer needed.
+        """
+        key = _get_credentials(hostname, username, password, key_filename)
+        to_close = []
+        reconnect = False
+        client = None
+        with self._lock:
+            to_close.extend(self._pop_expired())
+            while client is None:
+                idle = self._idle.get(key)
+                while idle:
+                    candidate, _ = idle.pop()
+                    if self._is_healthy(candidate):
+                        client = candidate
+                        self.hits += 1
+                        break
+                    reconnect = True
+                    to_close.append(candidate)
+                if client is not None:
+                    break
+                if self._in_use.get(key, 0) < self.max_per_host:
+                    break
+                self._lock.wait()
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        for stale in to_close:
+            self._close(stale)
+        if client is not None:
+            return key, client
+        try:
+            client = get_client(*key, timeout=timeout)
+        except Exception:
+            with self._lock:
+                self._in_use[key] -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            if reconnect:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        logger.info('Instantiated pooled Paramiko client %s', client._id)
+        return key, client
+
+    def release(self, key, client, discard=False):
+        """Return a borrowed connection to the pool.
+
+        :param key: The pool key returned by :meth:`acquire`.
+        :param client: The client returned by :meth:`acquire`.
+        :param bool discard: Close the client instead of keeping it for reuse.
+        """
+        keep = not discard and self._is_healthy(client)
+        with self._lock:
+            self._in_use[key] -= 1
+            if keep:
+                self._idle.setdefault(key, []).append((client, time.time()))
+            self._lock.notify()
+        if not keep:
+            logger.info('Discarding pooled Paramiko client %s', client._id)
+            self._close(client)
+
+    @contextmanager
+    def connection(self, hostname=None, username=None, password=None,
+                   key_filename=None, timeout=10):
+        """Yield a pooled connection and return it to the pool afterwards.
+
+        The connection is discarded instead of returned if the ``with`` block
+        raises one of :attr:`connection_errors`.
+        """
+        key, client = self.acquire(
+            hostname, username, password, key_filename, timeout)
+        discard = False
+        try:
+            yield client
+        except self.connection_errors:
+            discard = True
+            raise
+        finally:
+            self.release(key, client, discard)
+
+    def close_all(self):
+        """Close all idle connections.
+
+        Borrowed connections are not affected and return to the pool when
+        released.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for clients in idle.values():
+            for client, _ in clients:
+                self._close(client)
+
+    def stats(self):
+        """Return the pool counters.
+
+        :return: A dict with the number of ``hits`` (reused connections),
+            ``misses`` (new connections), ``reconnects`` (connections reopened
+            after a broken one was found), ``idle`` and ``in_use`` connections.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'idle': sum(len(idle) for idle in self._idle.values()),
+                'in_use': sum(self._in_use.values()),
+            }
+
+
+#: Connection pool used by the module level helpers like :func:`command`.
+connection_pool = SSHConnectionPool()
+atexit.register(connection_pool.close_all)
+
+
 @contextmanager
 def get_connection(hostname=None, username=None, password=None,
                    key_filename=None, timeout=10):
@@ -177,9 +396,9 @@ def add_authorized_key(key, hostname=None, username=None, password=None,
     ssh_path = '~/.ssh'
     auth_file = os.path.join(ssh_path, 'authorized_keys')
 
-    with get_connection(hostname=hostname, username=username,
-                        password=password, key_filename=key_filename,
-                        timeout=timeout) as con:
+    with connection_pool.connection(
+            hostname=hostname, username=username, password=password,
+            key_filename=key_filename, timeout=timeout) as con:
 
         # ensure ssh directory exists
         execute_command('mkdir -p %s' % ssh_path, con)
@@ -209,9 +428,10 @@ def upload_file(local_file, remote_file, hostname=None):
     :param hostname: target machine hostname. If not provided will be used the
         ``server.hostname`` from the configuration.
     """
-    with get_connection(hostname=hostname) as connection:  # pragma: no cover
+    with connection_pool.connection(
+            hostname=hostname) as connection:  # pragma: no cover
+        sftp = connection.open_sftp()
         try:
-            sftp = connection.open_sftp()
             # Check if local_file is a file-like object and use the proper
             # paramiko function to upload it to the remote machine.
             if hasattr(local_file, 'read'):
@@ -229,9 +449,10 @@ def download_file(remote_file, local_file=None, hostname=None):
     """
     if local_file is None:  # pragma: no cover
         local_file = remote_file
-    with get_connection(hostname=hostname) as connection:  # pragma: no cover
+    with connection_pool.connection(
+            hostname=hostname) as connection:  # pragma: no cover
+        sftp = connection.open_sftp()
         try:
-            sftp = connection.open_sftp()
             sftp.get(remote_file, local_file)
         finally:
             sftp.close()
@@ -255,30 +476,239 @@ def command(cmd, hostname=None, output_format=None, username=None,
         connecting to the server. If it is ``None`` ``key_filename`` from
         configuration's ``server`` section will be used.
     :param int timeout: Time to wait for establish the connection.
+
+    The connection is borrowed from :data:`connection_pool` and kept open to
+    be reused by the next commands. The command itself has no timeout.
     """
     hostname = hostname or settings.server.hostname
-    with get_connection(hostname=hostname, username=username,
-                        password=password, key_filename=key_filename,
-                        timeout=timeout) as connection:
-        return execute_command(cmd, connection, output_format, timeout)
+    with connection_pool.connection(
+            hostname=hostname, username=username, password=password,
+            key_filename=key_filename, timeout=timeout) as connection:
+        return execute_command(cmd, connection, output_format)
+
+
+def batch_command(cmds, hostname=None, output_format=None, username=None,
+                  password=None, key_filename=None, timeout=10):
+    """Executes several independent SSH commands on remote hostname in a
+    single round trip.
+
+    All the commands are sent together on a single channel, each one
+    followed by delimiters which allow splitting the output and return code
+    of every command. The commands run one after another even if some of
+    them fail::
+
+        release, version = batch_command([
+            'cat /etc/redhat-release',
+            'rpm -q satellite',
+        ])
+
+    :param list cmds: The commands to run
+    :param str output_format: json, csv or None, applied to all the commands
+    :param str hostname: The hostname of the server to establish connection. If
+        it is ``None`` ``hostname`` from configuration's ``server`` section
+        will be used.
+    :param str username: The username to use when connecting. If it is ``None``
+        ``ssh_username`` from configuration's ``server`` section will be used.
+    :param str password: The password to use when connecting. If it is ``None``
+        ``ssh_password`` from configuration's ``server`` section will be used.
+        Should be applied only in case ``key_filename`` is not set
+    :param str key_filename: The path of the ssh private key to use when
+        connecting to the server. If it is ``None`` ``key_filename`` from
+        configuration's ``server`` section will be used.
+    :param int timeout: Time to wait for establish the connection.
+    :return: A list with a :class:`SSHCommandResult` for each command, in the
+        same order of ``cmds``.
+    :raises paramiko.SSHException: If the channel is closed before all the
+        commands finish.
+    """
+    cmds = [_encode_command(cmd) for cmd in cmds]
+    if not cmds:
+        return []
+    marker = _new_marker()
+    script = b''.join(_delimit_command(cmd, marker) for cmd in cmds)
+    logger.debug('>>> batch of %s commands:\n%s', len(cmds), script)
+    with connection_pool.connection(
+            hostname=hostname, username=username, password=password,
+            key_filename=key_filename, timeout=timeout) as connection:
+        _, stdout, stderr = connection.exec_command(script)
+        stdout.channel.recv_exit_status()
+        stdout = stdout.read()
+        stderr = stderr.read()
+    # split gives [stdout1, return_code1, stdout2, return_code2, ..., tail]
+    stdout = _stdout_delimiter(marker).split(stdout)
+    stderr = stderr.split(_stderr_delimiter(marker))
+    finished = min(len(stdout) // 2, len(stderr) - 1)
+    if finished < len(cmds):
+        raise paramiko.SSHException(
+            'Only {0} of {1} batched commands finished'.format(
+                finished, len(cmds)))
+    return [
+        _build_result(
+            stdout[2 * index],
+            stderr[index],
+            int(stdout[2 * index + 1]),
+            output_format
+        )
+        for index in range(len(cmds))
+    ]
+
+
+class SSHCommandStream(object):
+    """Lazily read the ``stdout`` lines of a running command.
+
+    Iterating over the stream yields the ``stdout`` lines, cleaned up the same
+    way :func:`execute_command` does for hammer commands, as soon as they are
+    received from the channel, so the whole output is never kept in memory.
+    ``stderr`` and ``return_code`` are set once all the lines are read::
+
+        stream = command_stream('hammer --output=csv host list')
+        for line in stream:
+            ...
+        stream.return_code
+
+    Stopping the iteration before the end (or calling :meth:`close`) closes
+    the channel, leaving ``stderr`` and ``return_code`` as ``None``.
+
+    :param channel: the ``paramiko.Channel`` running the command.
+    :param on_close: optional callable called with a boolean telling if the
+        connection must be discarded when the stream is closed.
+    """
+
+    #: Amount of bytes read from the channel at once.
+    chunk_size = 32768
+    _color_regex = re.compile(r'\x1b\[\d\d?m')
+
+    def __init__(self, channel, on_close=None):
+        self._channel = channel
+        self._on_close = on_close
+        self._lines = self._read_lines()
+        self._started = False
+        self._closed = False
+        self.stderr = None
+        self.return_code = None
+
+    def __iter__(self):
+        return self._lines
+
+    def close(self):
+        """Stop reading the output and close the channel."""
+        self._lines.close()
+        if not self._started:
+            # a generator which never started does not run its finally block
+            self._finish(discard=False)
+
+    def _finish(self, discard):
+        """Close the channel and hand the connection back, only once."""
+        if self._closed:
+            return
+        self._closed = True
+        self._channel.close()
+        if self._on_close is not None:
+            self._on_close(discard)
+
+    def _clean(self, line):
+        """Return the cleaned up line or ``None`` if it must be skipped."""
+        line = decode_to_utf8(line).replace('""', '')
+        if line.startswith('['):
+            return None
+        return self._color_regex.sub('', line)
+
+    def _read_lines(self):
+        """Generate the ``stdout`` lines as they arrive."""
+        self._started = True
+        channel = self._channel
+        discard = False
+        pending = b''
+        try:
+            while True:
+                data = channel.recv(self.chunk_size)
+                if not data:
+                    break
+                lines = (pending + data).split(b'\n')
+                pending = lines.pop()
+                for line in lines:
+                    line = self._clean(line)
+                    if line is not None:
+                        yield line
+            if pending:
+                line = self._clean(pending)
+                if line is not None:
+                    yield line
+            stderr = bytearray()
+            while True:
+                data = channel.recv_stderr(self.chunk_size)
+                if not data:
+                    break
+                stderr.extend(data)
+            self.return_code = channel.recv_exit_status()
+            self.stderr = self._color_regex.sub(
+                '', decode_to_utf8(bytes(stderr)))
+            if self.stderr:
+                logger.debug('<<< stderr\n%s', self.stderr)
+        except SSHConnectionPool.connection_errors:
+            discard = True
+            raise
+        finally:
+            self._finish(discard)
 
 
-def execute_command(cmd, connection, output_format=None, timeout=120):
+def command_stream(cmd, hostname=None, username=None, password=None,
+                   key_filename=None, timeout=10):
+    """Executes SSH command on remote hostname and returns a
+    :class:`SSHCommandStream` to lazily read its output.
+
+    The connection is borrowed from :data:`connection_pool` until the stream
+    is exhausted or closed. Arguments have the same meaning of the
+    :func:`command` ones, the output is read without timeout.
+    """
+    key, connection = connection_pool.acquire(
+        hostname, username, password, key_filename, timeout)
+    logger.debug('>>> %s', cmd)
+    try:
+        _, stdout, _ = connection.exec_command(cmd)
+    except SSHConnectionPool.connection_errors:
+        connection_pool.release(key, connection, discard=True)
+        raise
+    except Exception:
+        connection_pool.release(key, connection)
+        raise
+    return SSHCommandStream(
+        stdout.channel,
+        lambda discard: connection_pool.release(key, connection, discard)
+    )
+
+
+def execute_command(cmd, connection, output_format=None, timeout=None):
     """Execute a command via ssh in the given connection
 
     :param cmd: a command to be executed via ssh
     :param connection: SSH Paramiko client connection
     :param output_format: plain|json|csv|list valid only for hammer commands
-    :param timeout: defaults to 120
+    :param timeout: seconds to wait for each read of the command output
+        before raising ``socket.timeout``, defaults to ``None`` to wait until
+        the command finishes. Unrelated to the connection timeout.
     :return: SSHCommandResult
     """
     logger.debug('>>> %s', cmd)
-    _, stdout, stderr = connection.exec_command(cmd, timeout)
+    _, stdout, stderr = connection.exec_command(cmd, timeout=timeout)
 
     errorcode = stdout.channel.recv_exit_status()
 
     stdout = stdout.read()
     stderr = stderr.read()
+    return _build_result(stdout, stderr, errorcode, output_format)
+
+
+def _build_result(stdout, stderr, errorcode, output_format=None):
+    """Clean up the raw output of a command and build its
+    :class:`SSHCommandResult`.
+
+    :param stdout: raw contents of the command ``stdout``
+    :param stderr: raw contents of the command ``stderr``
+    :param errorcode: the command return code
+    :param output_format: plain|json|csv|list valid only for hammer commands
+    :return: SSHCommandResult
+    """
     # Remove escape code for colors displayed in the output
     regex = re.compile(r'\x1b\[\d\d?m')
     if stdout:
@@ -306,6 +736,384 @@ def execute_command(cmd, connection, output_format=None, timeout=120):
         stdout, stderr, errorcode, output_format)
 
 
+def _new_marker():
+    """Return a random marker to delimit the output of commands."""
+    return uuid.uuid4().hex.encode('ascii')
+
+
+def _encode_command(cmd):
+    """Return the command as bytes to be sent over the channel."""
+    if isinstance(cmd, six.text_type):
+        return cmd.encode('utf-8')
+    return cmd
+
+
+def _delimit_command(cmd, marker):
+    """Wrap a shell command so its output is followed by ``marker``.
+
+    The command runs in a subshell with ``stdin`` redirected from
+    ``/dev/null``. After it finishes the marker and the command return code
+    are printed on their own line on ``stdout`` and the marker alone on
+    ``stderr``, see :func:`_stdout_delimiter` and :func:`_stderr_delimiter`.
+
+    :param bytes cmd: the command to wrap
+    :param bytes marker: a marker which must not be part of the output
+    :rtype: bytes
+    """
+    return (
+        b'(' + cmd + b'\n) < /dev/null\n'
+        b'__rc=$?; printf "\\n%s %s\\n" ' + marker + b' "$__rc"; '
+        b'printf "\\n%s\\n" ' + marker + b' >&2\n'
+    )
+
+
+def _stdout_delimiter(marker):
+    """Return the regex matching the line appended to ``stdout`` by
+    :func:`_delimit_command`, the return code is the ``return_code`` group.
+    """
+    return re.compile(b'\n' + marker + b' (?P<return_code>\\d+)\n')
+
+
+def _stderr_delimiter(marker):
+    """Return the line appended to ``stderr`` by :func:`_delimit_command`."""
+    return b'\n' + marker + b'\n'
+
+
+class SSHShellSession(object):
+    """A long-lived shell running on a dedicated SSH channel.
+
+    Each command is written to the shell ``stdin`` followed by a marker
+    which is printed on ``stdout``, together with the command return code,
+    and on ``stderr``. The markers delimit the output of every command, so
+    many commands can run on the same channel one after another without
+    paying for a new connection, channel and login shell each time::
+
+        session = SSHShellSession(hostname='example.com')
+        session.run('hostname')
+        session.close()
+
+    Commands run in a subshell with ``stdin`` redirected from ``/dev/null``,
+    so they can not consume the next commands and environment changes do
+    not leak from one command to another. A session runs one command at a
+    time and is not thread safe, :func:`shell_command` keeps one session per
+    thread.
+
+    Arguments have the same meaning of the :func:`get_connection` ones.
+    """
+
+    #: Interpreter started on the channel.
+    shell = 'bash'
+    #: Maximum amount of bytes read from the channel at once.
+    chunk_size = 32768
+    #: Seconds to wait for a command to finish when no timeout is given.
+    default_timeout = 120
+
+    def __init__(self, hostname=None, username=None, password=None,
+                 key_filename=None, timeout=10):
+        self._client = get_client(
+            hostname, username, password, key_filename, timeout)
+        self._channel = self._client.get_transport().open_session()
+        self._marker = _new_marker()
+        self._channel.exec_command(self._interpreter())
+        self._stdout_end = re.compile(
+            _stdout_delimiter(self._marker).pattern + b'\\Z')
+        self._stderr_end = _stderr_delimiter(self._marker)
+        logger.info(
+            'Started %s session on Paramiko client %s',
+            type(self).__name__, self._client._id)
+
+    def _interpreter(self):
+        """Return the command starting the interpreter on the channel."""
+        return self.shell
+
+    def _frame(self, cmd):
+        """Return the data sent to the interpreter to run ``cmd``."""
+        return _delimit_command(_encode_command(cmd), self._marker)
+
+    @property
+    def closed(self):
+        """Whether the session can not run commands anymore."""
+        return self._channel.closed or self._channel.exit_status_ready()
+
+    def close(self):
+        """Stop the interpreter and close the connection."""
+        logger.info(
+            'Closing %s session on Paramiko client %s',
+            type(self).__name__, self._client._id)
+        self._channel.close()
+        self._client.close()
+
+    def run(self, cmd, output_format=None, timeout=None):
+        """Run a command on the session interpreter.
+
+        :param cmd: a command to be executed on the interpreter
+        :param output_format: plain|json|csv|list valid only for hammer
+            commands
+        :param timeout: seconds to wait for the command to finish, defaults
+            to :attr:`default_timeout`. The session is closed if the command
+            times out, e.g. if an unbalanced quote leaves the shell waiting
+            for the rest of the command.
+        :return: SSHCommandResult
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        logger.debug('>>> %s', cmd)
+        try:
+            self._channel.sendall(self._frame(cmd))
+            stdout, stderr, errorcode = self._read_output(timeout)
+        except Exception:
+            self.close()
+            raise
+        return _build_result(stdout, stderr, errorcode, output_format)
+
+    def _read_output(self, timeout):
+        """Read ``stdout`` and ``stderr`` until both markers are found.
+
+        :return: A tuple with the command ``stdout``, ``stderr`` and return
+            code, without the markers.
+        """
+        channel = self._channel
+        stdout = bytearray()
+        stderr = bytearray()
+        stdout_end = None
+        stderr_done = False
+        deadline = time.time() + timeout
+        while stdout_end is None or not stderr_done:
+            received = False
+            if channel.recv_ready():
+                stdout.extend(channel.recv(self.chunk_size))
+                # The marker line is always the last one, no need to scan
+                # the whole output again
+                stdout_end = self._stdout_end.search(
+                    stdout, max(0, len(stdout) - 128))
+                received = True
+            if channel.recv_stderr_ready():
+                stderr.extend(channel.recv_stderr(self.chunk_size))
+                stderr_done = stderr.endswith(self._stderr_end)
+                received = True
+            if received:
+                continue
+            if channel.exit_status_ready():
+                raise EOFError('Shell session exited unexpectedly')
+            wait = min(1, deadline - time.time())
+            if wait <= 0:
+                raise socket.timeout(
+                    'Command did not finish in {0} seconds'.format(timeout))
+            select.select([channel], [], [], wait)
+        return (
+            bytes(stdout[:stdout_end.start()]),
+            bytes(stderr[:-len(self._stderr_end)]),
+            int(stdout_end.group('return_code')),
+        )
+
+
+#: Ruby program run by :class:`SSHHammerSession`. It loads the hammer
+#: settings and modules once, as the hammer executable does. Then it reads
+#: the arguments of a hammer command as a JSON list from each line of
+#: ``stdin`` and runs hammer's main command with them in the same process.
+#: The global options are loaded into the settings first, and the API
+#: connections are dropped when the credentials change. Then the program
+#: prints the markers of :func:`_delimit_command` and the hammer exit status.
+#: Hammer reads its own ``stdin`` from ``/dev/null``, so it can not consume
+#: the next commands.
+HAMMER_SESSION_SCRIPT = r"""
+require "json"
+marker = ARGV.shift
+commands = STDIN.dup
+STDIN.reopen(File::NULL)
+STDOUT.sync = true
+STDERR.sync = true
+$0 = "hammer"
+
+init_error = begin
+  require "clamp"
+  require "highline"
+  HighLine.color_scheme = HighLine::SampleColorScheme.new
+  require "hammer_cli/settings"
+  if HammerCLI::Settings.respond_to?(:load_from_defaults)
+    HammerCLI::Settings.load_from_defaults
+  else
+    HammerCLI::Settings.load_from_paths(["/etc/hammer/", "~/.hammer/"])
+  end
+  HammerCLI::Settings.load(:_params => {:interactive => false})
+  require "hammer_cli"
+  HammerCLI::Modules.load_all
+  nil
+rescue Exception => err
+  err
+end
+context = {}
+if init_error.nil? && HammerCLI.respond_to?(:context)
+  context = HammerCLI.context
+end
+
+def drop_connections(context)
+  if context[:api_connection].respond_to?(:drop_all)
+    context[:api_connection].drop_all
+  elsif defined?(HammerCLI::Connection) &&
+      HammerCLI::Connection.respond_to?(:drop_all)
+    HammerCLI::Connection.drop_all
+  end
+end
+
+credentials = nil
+while (line = commands.gets)
+  status = begin
+    raise init_error if init_error
+    args = JSON.parse(line)
+    params = {:verbose => false, :username => nil, :password => nil}
+    index = 0
+    while index < args.length && args[index].start_with?("-")
+      case args[index]
+      when "-v", "--verbose" then params[:verbose] = true
+      when "-u", "--username" then params[:username] = args[index += 1]
+      when "-p", "--password" then params[:password] = args[index += 1]
+      end
+      index += 1
+    end
+    HammerCLI::Settings.load(:_params => params)
+    if credentials != params.values_at(:username, :password)
+      drop_connections(context) unless credentials.nil?
+      credentials = params.values_at(:username, :password)
+    end
+    result = HammerCLI::MainCommand.run("hammer", args, context)
+    result.is_a?(Integer) ? result : 0
+  rescue SystemExit => err
+    err.status
+  rescue Exception => err
+    STDERR.puts("#{err.class}: #{err.message}")
+    70
+  end
+  STDOUT.print("\n#{marker} #{status}\n")
+  STDERR.print("\n#{marker}\n")
+end
+"""
+
+
+class SSHHammerSession(SSHShellSession):
+    """A long-lived hammer process running on a dedicated SSH channel.
+
+    ``hammer`` is a Ruby program, and starting the Ruby interpreter and
+    requiring the hammer gems is the biggest fixed cost of a hammer
+    command, followed by the parsing of its settings and API documentation.
+    The session starts Ruby once with :data:`HAMMER_SESSION_SCRIPT`, which
+    initializes hammer once, keeping its settings, modules and API
+    connections, and dispatches each command to hammer's main command. The
+    output and return code of every command are delimited with the markers
+    of :class:`SSHShellSession`::
+
+        session = SSHHammerSession(hostname='example.com')
+        session.run([u'-u', u'admin', u'-p', u'changeme', u'--output=csv',
+                     u'organization', u'list'], 'csv')
+        session.close()
+
+    ``hammer shell`` can not be used instead, it reports neither the return
+    code of the commands nor a separate ``stderr``.
+
+    Commands are lists of hammer arguments, already split, as returned by
+    :meth:`robottelo.cli.base.CommandInvocation.hammer_args`. Their global
+    options are loaded into the settings, and the API connections are
+    dropped when the username or password changes.
+
+    :param str locale: The ``LANG`` of the hammer process, defaults to the
+        ``locale`` setting.
+    """
+
+    #: Ruby interpreter running hammer, e.g. ``scl enable tfm -- ruby`` on
+    #: servers where hammer runs on a software collection.
+    ruby = 'ruby'
+
+    def __init__(self, hostname=None, username=None, password=None,
+                 key_filename=None, timeout=10, locale=None):
+        self.locale = locale or settings.locale
+        super(SSHHammerSession, self).__init__(
+            hostname, username, password, key_filename, timeout)
+
+    def _interpreter(self):
+        return u'LANG={0} {1} -W0 -e {2} {3}'.format(
+            self.locale,
+            self.ruby,
+            six.moves.shlex_quote(HAMMER_SESSION_SCRIPT),
+            self._marker.decode('ascii'),
+        )
+
+    def _frame(self, cmd):
+        return json.dumps(list(cmd)).encode('utf-8') + b'\n'
+
+
+_shell_sessions = threading.local()
+_shell_sessions_lock = threading.Lock()
+_all_shell_sessions = []
+
+
+def _thread_session(session_class, key, *args):
+    """Return the ``session_class`` session of the current thread for the
+    ``key`` credentials, starting it if needed.
+    """
+    sessions = getattr(_shell_sessions, 'sessions', None)
+    if sessions is None:
+        sessions = _shell_sessions.sessions = {}
+    session = sessions.get((session_class, key) + args)
+    if session is None or session.closed:
+        session = sessions[(session_class, key) + args] = session_class(
+            *(key + args))
+        with _shell_sessions_lock:
+            # Forget the sessions closed since, like the one replaced here
+            _all_shell_sessions[:] = [
+                other for other in _all_shell_sessions if not other.closed]
+            _all_shell_sessions.append(session)
+    return session
+
+
+def shell_command(cmd, hostname=None, output_format=None, username=None,
+                  password=None, key_filename=None, timeout=None):
+    """Executes a command on a persistent :class:`SSHShellSession`.
+
+    Every thread keeps its own session for each hostname and credentials,
+    the session is started on the first call and reused by the next ones.
+    Arguments have the same meaning of the :func:`command` ones, but
+    ``timeout`` is only applied to the command execution and defaults to
+    :attr:`SSHShellSession.default_timeout`.
+    """
+    key = _get_credentials(hostname, username, password, key_filename)
+    return _thread_session(SSHShellSession, key).run(
+        cmd, output_format, timeout)
+
+
+def hammer_command(args, hostname=None, output_format=None, username=None,
+                   password=None, key_filename=None, timeout=None,
+                   locale=None):
+    """Executes a hammer command on a persistent :class:`SSHHammerSession`.
+
+    Every thread keeps its own session for each hostname, credentials and
+    locale, the session is started on the first call and reused by the next
+    ones. Arguments have the same meaning of the :func:`shell_command` ones.
+
+    :param list args: The hammer arguments.
+    :param str locale: The hammer ``LANG``, defaults to the ``locale``
+        setting.
+    """
+    key = _get_credentials(hostname, username, password, key_filename)
+    session = _thread_session(
+        SSHHammerSession, key, 10, locale or settings.locale)
+    return session.run(args, output_format, timeout)
+
+
+def close_shell_sessions():
+    """Close all the sessions started by :func:`shell_command` and
+    :func:`hammer_command`.
+    """
+    with _shell_sessions_lock:
+        sessions = list(_all_shell_sessions)
+        del _all_shell_sessions[:]
+    for session in sessions:
+        if not session.closed:
+            session.close()
+
+
+atexit.register(close_shell_sessions)
+
+
 def is_ssh_pub_key(key):
     """Validates if a string is in valid ssh pub key format
 
@@ -1,13 +1,19 @@
 """JSON representation for a RHEL server."""
 
-import copy
 import datetime
+import json
 
 from fauxfactory import (
     gen_alpha, gen_choice, gen_date,
     gen_integer, gen_ipaddr, gen_mac, gen_uuid
 )
 
+try:
+    from collections.abc import Mapping
+except ImportError:
+    # Python 2
+    from collections import Mapping
+
 
 def _bios_date():
     """Generate a random date for system's BIOS between
@@ -177,8 +183,9 @@ SYSTEM_FACTS = {
 }
 
 
-def generate_system_facts(name=None):
-    """Generate random system facts for registration.
+def generate_system_overlay(name=None):
+    """Generate the random system facts of a system, the ones which differ
+    from the :data:`SYSTEM_FACTS` template.
 
     :param str name: A valid FQDN for a system. If one is not
         provided, then a random value will be generated.
@@ -189,28 +196,136 @@ def generate_system_facts(name=None):
         name = u'{0}.example.net'.format(
             gen_alpha().lower())
 
-    # Make a copy of the system facts 'template'
-    new_facts = copy.deepcopy(SYSTEM_FACTS)
     # Select a random RHEL version...
     distro = gen_choice(DISTRO_IDS)
+    ipaddr = gen_ipaddr()
+    uuid = gen_uuid()
+
+    # ...and build our facts
+    return {
+        u'distribution.id': distro['id'],
+        u'distribution.version': distro['version'],
+        u'dmi.bios.relase_date': _bios_date().strftime('%m/%d/%Y'),
+        u'dmi.memory.maximum_capacity': gen_choice(MEMORY_CAPACITY),
+        u'dmi.memory.size': gen_choice(MEMORY_SIZE),
+        u'dmi.system.uuid': uuid,
+        u'dmi.system.version': u'RHEL',
+        u'lscpu.architecture': distro['architecture'],
+        u'net.interface.eth1.hwaddr': gen_mac(),
+        u'net.interface.eth1.ipaddr': ipaddr,
+        u'network.hostname': name,
+        u'network.ipaddr': ipaddr,
+        u'uname.machine': distro['architecture'],
+        u'uname.nodename': name,
+        u'uname.release': distro['kernel'],
+        u'virt.uuid': uuid,
+    }
 
-    # ...and update our facts
-    new_facts['distribution.id'] = distro['id']
-    new_facts['distribution.version'] = distro['version']
-    new_facts['dmi.bios.relase_date'] = _bios_date().strftime('%m/%d/%Y')
-    new_facts['dmi.memory.maximum_capacity'] = gen_choice(
-        MEMORY_CAPACITY)
-    new_facts['dmi.memory.size'] = gen_choice(MEMORY_SIZE)
-    new_facts['dmi.system.uuid'] = gen_uuid()
-    new_facts['dmi.system.version'] = u'RHEL'
-    new_facts['lscpu.architecture'] = distro['architecture']
-    new_facts['net.interface.eth1.hwaddr'] = gen_mac()
-    new_facts['net.interface.eth1.ipaddr'] = gen_ipaddr()
-    new_facts['network.hostname'] = name
-    new_facts['network.ipaddr'] = new_facts['net.interface.eth1.ipaddr']
-    new_facts['uname.machine'] = distro['architecture']
-    new_facts['uname.nodename'] = name
-    new_facts['uname.release'] = distro['kernel']
-    new_facts['virt.uuid'] = new_facts['dmi.system.uuid']
 
+def generate_system_facts(name=None):
+    """Generate random system facts for registration.
+
+    :param str name: A valid FQDN for a system. If one is not
+        provided, then a random value will be generated.
+    :return: A dictionary with random system facts
+    :rtype: dict
+    """
+    # The template values are strings, a shallow copy is enough
+    new_facts = dict(SYSTEM_FACTS)
+    new_facts.update(generate_system_overlay(name))
     return new_facts
+
+
+class FactsTemplate(object):
+    """System facts template shared by many :class:`SystemFacts`, keeping
+    the JSON encodings of its values.
+
+    :param dict facts: The template values. They must not be changed once
+        used.
+    """
+    __slots__ = ('facts', '_encoded')
+
+    def __init__(self, facts):
+        self.facts = facts
+        self._encoded = {}
+
+    def encode(self, exclude):
+        """Return the JSON members of the values whose keys are not in
+        ``exclude``, computed once for each set of keys.
+        """
+        cache_key = frozenset(exclude)
+        encoded = self._encoded.get(cache_key)
+        if encoded is None:
+            encoded = json.dumps({
+                key: value
+                for key, value in self.facts.items()
+                if key not in cache_key
+            }, sort_keys=True)[1:-1]
+            self._encoded[cache_key] = encoded
+        return encoded
+
+
+#: Template of :data:`SYSTEM_FACTS`
+SYSTEM_FACTS_TEMPLATE = FactsTemplate(SYSTEM_FACTS)
+
+
+class SystemFacts(Mapping):
+    """Read-only system facts made of a shared template and the values of
+    the system on top of it.
+
+    Thousands of systems share the same template instead of each one having
+    its own copy, and the JSON encoding of the template values is computed
+    once::
+
+        facts = SystemFacts(generate_system_overlay())
+        facts['network.hostname']
+        body = facts.to_json()
+
+    :param dict overlay: The system values, see
+        :func:`generate_system_overlay`.
+    :param base: The template, a :class:`FactsTemplate` or a dict, defaults
+        to :data:`SYSTEM_FACTS_TEMPLATE`. The encoding of a dict template is
+        only shared by the systems of a :class:`FactsTemplate` wrapping it.
+    """
+    __slots__ = ('overlay', 'base', 'template')
+
+    def __init__(self, overlay, base=None):
+        if base is None:
+            base = SYSTEM_FACTS_TEMPLATE
+        elif not isinstance(base, FactsTemplate):
+            base = FactsTemplate(base)
+        self.overlay = overlay
+        self.template = base
+        self.base = base.facts
+
+    @classmethod
+    def generate(cls, name=None):
+        """Generate random system facts on the :data:`SYSTEM_FACTS`
+        template.
+        """
+        return cls(generate_system_overlay(name))
+
+    def __getitem__(self, key):
+        try:
+            return self.overlay[key]
+        except KeyError:
+            return self.base[key]
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.overlay:
+                yield key
+        for key in self.overlay:
+            yield key
+
+    def __len__(self):
+        return len(self.base) + sum(
+            1 for key in self.overlay if key not in self.base)
+
+    def to_json(self):
+        """Return the facts encoded as a JSON object."""
+        base = self.template.encode(self.overlay)
+        overlay = json.dumps(self.overlay, sort_keys=True)[1:-1]
+        if base and overlay:
+            return u'{{{0}, {1}}}'.format(base, overlay)
+        return u'{{{0}}}'.format(base or overlay)
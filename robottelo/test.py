@@ -28,19 +28,16 @@ from robottelo.cli.subscription import Subscription
 from robottelo.config import settings
 from robottelo.constants import DEFAULT_ORG, DEFAULT_ORG_ID
 from robottelo.performance.constants import NUM_THREADS
+from robottelo.performance.candlepin import Candlepin
 from robottelo.performance.graph import (
     generate_bar_chart_stat,
     generate_line_chart_raw_candlepin,
     generate_line_chart_stat_bucketized_candlepin,
 )
+from robottelo.performance.load import LoadGenerator
 from robottelo.performance.stat import generate_stat_for_concurrent_thread
-from robottelo.performance.thread import (
-    DeleteThread,
-    SyncThread,
-    SubscribeAKThread,
-    SubscribeAttachThread
-)
-from robottelo.ui.browser import browser, DockerBrowser
+from robottelo.performance.thread import SyncThread
+from robottelo.ui.browser import browser_pool, docker_browser_pool
 from robottelo.ui.activationkey import ActivationKey
 from robottelo.ui.architecture import Architecture
 from robottelo.ui.bookmark import Bookmark
@@ -209,6 +206,8 @@ class UITestCase(TestCase):
         cls.driver_binary = settings.webdriver_binary
         cls.locale = settings.locale
         cls.server_name = settings.server.hostname
+        if settings.browser == 'docker':
+            docker_browser_pool.warm()
         cls.logger.info(
             u'Session set with:\n'
             u'\tUser: {cls.session_user.id}:{cls.session_user.login}\n'
@@ -267,18 +266,16 @@ class UITestCase(TestCase):
                     'Session user is being deleted: %s', cls.session_user)
 
     def setUp(self):  # noqa
-        """We do want a new browser instance for every test."""
+        """Borrow a browser session reset to the login page for every test.
+
+        Sessions are kept open between tests by
+        :data:`robottelo.ui.browser.browser_pool`.
+        """
         super(UITestCase, self).setUp()
-        if settings.browser == 'docker':
-            self._docker_browser = DockerBrowser()
-            self._docker_browser.start()
-            self.browser = self._docker_browser.webdriver
-            self.addCleanup(self._docker_browser.stop)
-        else:
-            self.browser = browser()
-            self.addCleanup(self.browser.quit)
-        self.browser.maximize_window()
-        self.browser.get(settings.server.get_url())
+        self.browser = browser_pool.acquire()
+        self.addCleanup(browser_pool.release, self.browser)
+        self.browser.ajax_wait_stats = {'count': 0, 'time': 0.0}
+        self.addCleanup(self._log_ajax_wait_stats)
 
         self.browser.foreman_user = self.foreman_user
         self.browser.foreman_password = self.foreman_password
@@ -344,6 +341,16 @@ class UITestCase(TestCase):
         self.user = User(self.browser)
         self.usergroup = UserGroup(self.browser)
 
+    def _log_ajax_wait_stats(self):
+        """Report the time the test spent waiting for AJAX requests."""
+        stats = self.browser.ajax_wait_stats
+        LOGGER.info(
+            '%s waited %.2f seconds for AJAX requests in %d waits',
+            self.id(),
+            stats['time'],
+            stats['count'],
+        )
+
     def take_screenshot(self):
         """Take screen shot from the current browser window.
 
@@ -483,11 +490,12 @@ class ConcurrentTestCase(TestCase):
     def _get_organization_id(cls):
         """Get organization id"""
         try:
-            result = OrgCli.list(per_page=False)
-        except CLIReturnCodeError:
+            # only the first organization is needed
+            result = next(OrgCli.iter_list(page_size=1))
+        except (CLIReturnCodeError, StopIteration):
             cls.logger.error('Fail to get organization id.')
             raise RuntimeError('Invalid organization id. Stop!')
-        return result[0]['id']
+        return result['id']
 
     def setUp(self):
         self.logger.debug(
@@ -507,15 +515,16 @@ class ConcurrentTestCase(TestCase):
     def _get_subscription_id(self):
         """Get subscription id"""
         try:
-            result = Subscription.list(
+            # only the first subscription is needed
+            result = next(Subscription.iter_list(
                 {'organization-id': self.org_id},
-                per_page=False
-            )
-        except CLIReturnCodeError:
+                page_size=1
+            ))
+        except (CLIReturnCodeError, StopIteration):
             self.logger.error('Fail to get subscription id!')
             raise RuntimeError('Invalid subscription id. Stop!')
-        subscription_id = result[0]['id']
-        subscription_name = result[0]['name']
+        subscription_id = result['id']
+        subscription_name = result['name']
         self.logger.info(
             'Subscribed to {0} with subscription id {1}'
             .format(subscription_name, subscription_id)
@@ -553,6 +562,24 @@ class ConcurrentTestCase(TestCase):
         for thread in thread_list:
             thread.join()
 
+    def _run_load(self, func, clients):
+        """Make the calls of each client from the load generator processes
+
+        :param func: The function called by the clients
+        :param list clients: The list of arguments tuples of each client
+        :return: The :class:`robottelo.performance.load.LoadResult`
+
+        """
+        result = LoadGenerator(
+            processes=settings.performance.load_processes,
+            rate=settings.performance.load_rate,
+        ).run(func, clients)
+        for client, index, error in result.errors:
+            self.logger.error(
+                'thread-{0} attempt {1} failed: {2}'
+                .format(client, index, error))
+        return result
+
     def _get_output_filename(self, file_name):
         """Get type of test: ak/att/del/reg as output file name
 
@@ -874,29 +901,15 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
-        # Create a dictionary to store all timing results from each client
-        time_result_dict_ak = {}
-
-        # Create new threads and start each thread mapped with a vm
-        for i in range(current_num_threads):
-            thread_name = 'thread-{0}'.format(i)
-            time_result_dict_ak[thread_name] = []
-            thread = SubscribeAKThread(
-                i,
-                thread_name,
-                time_result_dict_ak,
-                self.num_iterations,
-                self.ak_name,
-                self.default_org,
-                current_vm_list[i]
-            )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+        # Each client registers its vm and stores its timing results
+        time_result_dict_ak = self._run_load(
+            Candlepin.single_register_activation_key,
+            [
+                [(self.ak_name, self.default_org, vm_ip)] *
+                self.num_iterations
+                for vm_ip in current_vm_list
+            ]
+        ).values
 
         # write raw result of activation-key
         self._write_raw_csv_file(
@@ -929,36 +942,24 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
-        # Create a dictionary to store register timings from each client
+        # Each client registers and attaches its vm
+        time_result_dict = self._run_load(
+            Candlepin.single_register_attach,
+            [
+                [(self.sub_id, self.default_org, self.environment, vm_ip)] *
+                self.num_iterations
+                for vm_ip in current_vm_list
+            ]
+        ).values
+
+        # split the (register, attach) timings into two dictionaries
         time_result_dict_register = {}
-        # Create a dictionary to store attach timings from each client
         time_result_dict_attach = {}
-
-        # Create new threads and start each thread mapped with a vm
-        for i in range(current_num_threads):
-            thread_name = 'thread-{0}'.format(i)
-            time_result_dict_register[thread_name] = []
-            time_result_dict_attach[thread_name] = []
-
-            thread = SubscribeAttachThread(
-                i,
-                thread_name,
-                {},
-                time_result_dict_register,
-                time_result_dict_attach,
-                self.num_iterations,
-                self.sub_id,
-                self.default_org,
-                self.environment,
-                current_vm_list[i]
-            )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+        for thread_name, time_points in time_result_dict.items():
+            time_result_dict_register[thread_name] = [
+                time_point[0] for time_point in time_points]
+            time_result_dict_attach[thread_name] = [
+                time_point[1] for time_point in time_points]
 
         # write raw result of register
         self._write_raw_csv_file(
@@ -1009,27 +1010,21 @@ class ConcurrentTestCase(TestCase):
         self._set_num_iterations(total_iterations, current_num_threads)
         self._set_bucket_size()
 
-        # Create a list to store all threads
-        thread_list = []
-        # Create a dictionary to store all timing results from each thread
-        time_result_dict_del = {}
-
-        # Create new threads and start the thread which has sublist of uuids
-        for i in range(current_num_threads):
-            time_result_dict_del['thread-{0}'.format(i)] = []
-            thread = DeleteThread(
-                i,
-                'thread-{0}'.format(i),
-                uuid_list[
-                    self.num_iterations * i: self.num_iterations * (i + 1)
-                ],
-                time_result_dict_del
-            )
-            thread.start()
-            thread_list.append(thread)
-
-        # wait all threads in thread list
-        self._join_all_threads(thread_list)
+        # Each client deletes its sublist of uuids
+        time_result_dict_del = self._run_load(
+            Candlepin.single_delete,
+            [
+                [
+                    (uuid, i)
+                    for uuid in uuid_list[
+                        self.num_iterations * i:
+                        self.num_iterations * (i + 1)
+                    ]
+                    if uuid != ''
+                ]
+                for i in range(current_num_threads)
+            ]
+        ).values
 
         # write raw result of del
         self._write_raw_csv_file(
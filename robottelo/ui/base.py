@@ -10,6 +10,7 @@ from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import TimeoutException
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions
 from selenium.webdriver.support.select import Select
 from selenium.webdriver.support.ui import WebDriverWait
@@ -17,6 +18,151 @@ from selenium.webdriver.support.ui import WebDriverWait
 
 LOGGER = logging.getLogger(__name__)
 
+#: Asynchronous script which waits for the page AJAX requests to complete.
+#: On its first run on a page it wraps ``XMLHttpRequest`` and ``fetch`` to
+#: count the pending requests, the requests started before that are counted
+#: with ``jQuery.active`` and the Angular ``$http.pendingRequests``. The
+#: script calls back with ``true`` as soon as no request is pending, or with
+#: ``false`` after the timeout in milliseconds given as first argument.
+AJAX_IDLE_SCRIPT = u"""
+var timeout = arguments[0], callback = arguments[arguments.length - 1];
+var monitor = window.__robotteloAjax;
+if (!monitor) {
+    monitor = window.__robotteloAjax = {pending: 0, waiters: []};
+    monitor.active = function () {
+        var count = monitor.pending;
+        try { count += window.jQuery.active; } catch (e) {}
+        try {
+            count += window.angular.element(document).injector()
+                .get('$http').pendingRequests.length;
+        } catch (e) {}
+        return count;
+    };
+    monitor.check = function () {
+        if (monitor.waiters.length && !monitor.active()) {
+            var waiters = monitor.waiters;
+            monitor.waiters = [];
+            for (var i = 0; i < waiters.length; i++) { waiters[i](true); }
+        }
+    };
+    var finished = function () {
+        monitor.pending--;
+        setTimeout(monitor.check, 0);
+    };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        monitor.pending++;
+        this.addEventListener('loadend', finished);
+        try {
+            return send.apply(this, arguments);
+        } catch (e) {
+            this.removeEventListener('loadend', finished);
+            finished();
+            throw e;
+        }
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            monitor.pending++;
+            return fetch.apply(this, arguments).then(
+                function (response) { finished(); return response; },
+                function (error) { finished(); throw error; }
+            );
+        };
+    }
+}
+if (!monitor.active()) {
+    callback(true);
+} else {
+    var waiter = function (idle) {
+        clearTimeout(timer);
+        clearInterval(interval);
+        callback(idle);
+    };
+    var timer = setTimeout(function () {
+        var index = monitor.waiters.indexOf(waiter);
+        if (index >= 0) { monitor.waiters.splice(index, 1); }
+        waiter(false);
+    }, timeout);
+    // jQuery and Angular requests started before the wrappers were
+    // installed do not notify their end
+    var interval = setInterval(monitor.check, 50);
+    monitor.waiters.push(waiter);
+}
+"""
+
+#: Script describing all the elements matching a locator in a single call.
+#: Arguments are the ``xpath`` or ``css`` strategy and the expression, the
+#: names of the attributes to read, the relative locators of the children
+#: to describe and the optional root element of the search.
+QUERY_SCRIPT = u"""
+var attributes = arguments[2], children = arguments[3];
+function find(strategy, value, context) {
+    if (strategy === 'css') {
+        return Array.prototype.slice.call(context.querySelectorAll(value));
+    }
+    var result = document.evaluate(
+        value, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < result.snapshotLength; i++) {
+        nodes.push(result.snapshotItem(i));
+    }
+    return nodes;
+}
+function describe(element) {
+    var displayed = Boolean(
+        element.offsetWidth || element.offsetHeight ||
+        element.getClientRects().length
+    ) && window.getComputedStyle(element).visibility !== 'hidden';
+    var info = {
+        element: element,
+        displayed: displayed,
+        text: displayed ? (element.innerText || '').trim() : '',
+        attributes: {}
+    };
+    for (var i = 0; i < attributes.length; i++) {
+        var name = attributes[i];
+        var value = element[name === 'class' ? 'className' : name];
+        if (value === undefined || value === null ||
+                typeof value === 'object' || typeof value === 'function') {
+            value = element.getAttribute(name);
+        }
+        info.attributes[name] = (
+            value === null || value === false ? null : String(value));
+    }
+    return info;
+}
+return find(arguments[0], arguments[1], arguments[4] || document).map(
+    function (element) {
+        var info = describe(element);
+        info.children = {};
+        for (var name in children) {
+            var matches = find(children[name][0], children[name][1], element);
+            info.children[name] = matches.length ? describe(matches[0]) : null;
+        }
+        return info;
+    }
+);
+"""
+
+
+def _query_strategy(locator):
+    """Return the :data:`QUERY_SCRIPT` strategy and expression of a locator,
+    or ``None`` if the script can not resolve it.
+    """
+    strategy, value = locator[0], locator[1]
+    if strategy == By.XPATH:
+        return 'xpath', value
+    if strategy in (By.CSS_SELECTOR, By.TAG_NAME):
+        return 'css', value
+    if strategy == By.CLASS_NAME:
+        return 'css', u'.' + value
+    if strategy in (By.ID, By.NAME):
+        return 'css', u'[{0}="{1}"]'.format(
+            strategy, value.replace('\\', '\\\\').replace('"', '\\"'))
+    return None
+
 
 class UIError(Exception):
     """Indicates that a UI action could not be done."""
@@ -72,19 +218,80 @@ class Base(object):
             )
         return None
 
+    def query(self, locator, attributes=(), children=None, root=None):
+        """Describe all the elements matching a locator with a single
+        WebDriver call, instead of a call per element and property.
+
+        :param locator: The locator of the elements.
+        :param attributes: Names of the attributes to read, the element
+            property of the same name is read when it exists, like
+            Selenium's ``get_attribute``.
+        :param dict children: Relative locators of child elements to
+            describe, by name.
+        :param root: Optional WebElement the search is restricted to.
+        :return: A list with a dict for each element, with the
+            ``element`` itself, whether it is ``displayed``, its visible
+            ``text``, the ``attributes`` values by name and the
+            ``children`` descriptions (``None`` when not found) by name.
+        :rtype: list
+        """
+        strategies = [_query_strategy(locator)] + [
+            _query_strategy(child) for child in (children or {}).values()]
+        if None not in strategies:
+            try:
+                return self.browser.execute_script(
+                    QUERY_SCRIPT,
+                    strategies[0][0],
+                    strategies[0][1],
+                    list(attributes),
+                    dict(zip(children or {}, strategies[1:])),
+                    root,
+                )
+            except WebDriverException as err:
+                self.logger.debug(
+                    u'%s: Querying %s element by element: %s',
+                    type(err).__name__,
+                    locator[1],
+                    err
+                )
+
+        def describe(element):
+            displayed = element.is_displayed()
+            return {
+                'element': element,
+                'displayed': displayed,
+                'text': element.text if displayed else u'',
+                'attributes': dict(
+                    (name, element.get_attribute(name))
+                    for name in attributes
+                ),
+            }
+
+        result = []
+        for element in (root or self.browser).find_elements(*locator):
+            info = describe(element)
+            info['children'] = {}
+            for name, child in (children or {}).items():
+                matches = element.find_elements(*child)
+                info['children'][name] = (
+                    describe(matches[0]) if matches else None)
+            result.append(info)
+        return result
+
     def find_elements(self, locator):
         """Wrapper around Selenium's WebDriver that allows you to fetch list of
         elements in the web page.
 
+        The elements and their visibility are fetched by :meth:`query`.
+
         """
         try:
-            _webelements = self.browser.find_elements(*locator)
             self.wait_for_ajax()
-            webelements = []
-            for _webelement in _webelements:
-                if _webelement.is_displayed():
-                    webelements.append(_webelement)
-            return webelements
+            return [
+                info['element']
+                for info in self.query(locator)
+                if info['displayed']
+            ]
         except NoSuchElementException as err:
             self.logger.debug(
                 u'%s: Could not locate the elements of %s: %s',
@@ -168,8 +375,10 @@ class Base(object):
         self.click(search_button_locator)
         # Make sure that found element is returned no matter it described by
         # its own locator or common one (locator can transform depending on
-        # element name length)
-        for _ in range(self.result_timeout):
+        # element name length). Each lookup waits for the search requests to
+        # complete, so only the rendering of the results is polled.
+        deadline = time.time() + self.result_timeout
+        while True:
             for strategy, value in (
                     element_locator,
                     common_locators['select_filtered_entity']
@@ -177,8 +386,9 @@ class Base(object):
                 result = self.find_element((strategy, value % element))
                 if result is not None:
                     return result
-            time.sleep(1)
-        return None
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.25)
 
     def create_a_bookmark(self, name=None, query=None, public=None,
                           searchbox_query=None):
@@ -422,12 +632,47 @@ class Base(object):
         return not (jquery_active or angular_active)
 
     def wait_for_ajax(self, timeout=30, poll_frequency=0.5):
-        """Waits for an ajax call to complete until timeout."""
-        WebDriverWait(
-            self.browser, timeout, poll_frequency
-        ).until(
-            self.ajax_complete, 'Timeout waiting for page to load'
-        )
+        """Waits for an ajax call to complete until timeout.
+
+        The page notifies the end of its requests to :data:`AJAX_IDLE_SCRIPT`,
+        so the wait returns as soon as the page is idle with a single
+        WebDriver call. The wait falls back to polling :meth:`ajax_complete`
+        every ``poll_frequency`` seconds when the script can not run, e.g.
+        because the page is being unloaded.
+
+        The number of waits and the seconds spent waiting are added to the
+        ``ajax_wait_stats`` dict of the browser, when it has one.
+        """
+        start = time.time()
+        try:
+            # Selenium's script timeout must outlast the page one
+            if vars(self.browser).get('ajax_script_timeout', 0) < timeout:
+                self.browser.set_script_timeout(timeout + 5)
+                self.browser.ajax_script_timeout = timeout
+            idle = self.browser.execute_async_script(
+                AJAX_IDLE_SCRIPT, int(timeout * 1000))
+        except TimeoutException:
+            idle = False
+        except WebDriverException as err:
+            self.logger.debug(
+                u'Polling for AJAX completion: %s: %s',
+                type(err).__name__,
+                err
+            )
+            remaining = max(timeout - (time.time() - start), poll_frequency)
+            WebDriverWait(
+                self.browser, remaining, poll_frequency
+            ).until(
+                self.ajax_complete, 'Timeout waiting for page to load'
+            )
+            idle = True
+        finally:
+            stats = getattr(self.browser, 'ajax_wait_stats', None)
+            if isinstance(stats, dict):
+                stats['count'] += 1
+                stats['time'] += time.time() - start
+        if not idle:
+            raise TimeoutException('Timeout waiting for page to load')
 
     def scroll_page(self):
         """
@@ -547,9 +792,15 @@ class Base(object):
             raise UINoSuchElementError('Entity not found via search.')
         searched.click()
         self.click(tab_locator)
-        selected = self.find_element(
-            common_locators['all_values'] % context).is_selected()
-        return selected
+        self.wait_for_ajax()
+        checkboxes = [
+            info for info in self.query(
+                common_locators['all_values'] % context, ('checked',))
+            if info['displayed']
+        ]
+        if not checkboxes:
+            raise UINoSuchElementError('All values checkbox not found.')
+        return checkboxes[0]['attributes']['checked'] == 'true'
 
     def is_element_enabled(self, locator):
         """Check whether UI element is enabled or disabled
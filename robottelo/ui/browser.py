@@ -1,10 +1,20 @@
 """Tools to help getting a browser instance to run UI tests."""
+import atexit
 import logging
+import os
 import six
+import threading
 import time
+import uuid
 
 from robottelo.config import settings
+from robottelo.ui.locators import locators
 from selenium import webdriver
+from selenium.common.exceptions import (
+    NoAlertPresentException,
+    WebDriverException,
+)
+from six.moves.queue import Empty, Queue
 
 try:
     import docker
@@ -132,14 +142,28 @@ def browser():
         )
 
 
+def _container_name():
+    """Return a unique name for a selenium container.
+
+    The name includes the pytest-xdist worker id, so the containers of each
+    worker can be told apart.
+    """
+    return 'robottelo-selenium-{0}-{1}'.format(
+        os.environ.get('PYTEST_XDIST_WORKER', 'main'), uuid.uuid4().hex[:12])
+
+
 class DockerBrowser(object):
-    """Provide a browser instance running inside a docker container."""
-    def __init__(self):
+    """Provide a browser instance running inside a docker container.
+
+    :param str name: The container name, docker generates one by default.
+    """
+    def __init__(self, name=None):
         if docker is None:
             raise DockerBrowserError(
                 'Package docker-py is not installed. Install it in order to '
                 'use DockerBrowser.'
             )
+        self.name = name
         self.webdriver = None
         self.container = None
         self._client = None
@@ -165,6 +189,25 @@ class DockerBrowser(object):
         self._client = None
         self._started = False
 
+    def restart(self):
+        """Replace the browser session by a new one on the same container."""
+        try:
+            self._quit_webdriver()
+        except Exception as err:
+            LOGGER.debug('Error closing the containerized browser: %s', err)
+        self.webdriver = None
+        self._init_webdriver()
+
+    def is_healthy(self):
+        """Check if the webdriver still answers."""
+        if not self._started:
+            return False
+        try:
+            self.webdriver.current_url
+        except Exception:
+            return False
+        return True
+
     def _init_webdriver(self):
         """Init the selenium Remote webdriver."""
         if self.webdriver or not self.container:
@@ -236,6 +279,7 @@ class DockerBrowser(object):
             return
         self.container = self._client.create_container(
             detach=True,
+            name=self.name,
             environment={
                 'SCREEN_WIDTH': '1920',
                 'SCREEN_HEIGHT': '1080',
@@ -265,3 +309,359 @@ class DockerBrowser(object):
 
     def __exit__(self, *exc):
         self.stop()
+
+
+class BrowserPool(object):
+    """Pool of warm browser sessions reused by the UI tests.
+
+    Starting a browser, or a whole docker container on the ``docker``
+    browser, dominates the time of short UI tests. The pool keeps the
+    sessions open between tests and resets them before handing them out
+    again: the extra windows are closed, the cookies and the storage are
+    cleared and the browser is sent to the login page, so no user or
+    organization context leaks from a test to the next one::
+
+        driver = browser_pool.acquire()
+        try:
+            ...
+        finally:
+            browser_pool.release(driver)
+
+    A session is replaced by a new one after ``max_uses`` tests, or when it
+    can not be reset, e.g. because the browser crashed.
+
+    :param int max_uses: Number of tests a session is used for, defaults to
+        ``settings.browser_max_uses``. Sessions are never reused on
+        saucelabs, where each session is reported as a test.
+    :param int max_idle: Number of idle sessions kept open.
+    """
+
+    def __init__(self, max_uses=None, max_idle=1):
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.created = 0
+        self.recycled = 0
+        self.acquired = 0
+        self.acquire_time = 0.0
+        self.reset_time = 0.0
+        self._idle = []
+        self._in_use = {}
+        self._lock = threading.Lock()
+
+    def _max_uses(self):
+        """Return the number of tests a session can be used for."""
+        if settings.browser == 'saucelabs':
+            return 1
+        if self.max_uses is not None:
+            return self.max_uses
+        return settings.browser_max_uses
+
+    @staticmethod
+    def _start():
+        """Start a new browser session.
+
+        :return: A tuple with the webdriver and the
+            :class:`DockerBrowser` running it, if any.
+        """
+        if settings.browser == 'docker':
+            docker_browser = docker_browser_pool.acquire()
+            driver = docker_browser.webdriver
+        else:
+            docker_browser = None
+            driver = browser()
+        driver.maximize_window()
+        return driver, docker_browser
+
+    @staticmethod
+    def _quit(driver, docker_browser, stop=False):
+        """Close a browser session ignoring any error.
+
+        :param bool stop: Remove the container running the session instead
+            of giving it back to :data:`docker_browser_pool`.
+        """
+        try:
+            if docker_browser is not None:
+                docker_browser_pool.release(docker_browser, stop=stop)
+            else:
+                driver.quit()
+        except Exception as err:
+            LOGGER.debug('Error closing browser session: %s', err)
+
+    @staticmethod
+    def reset(driver):
+        """Bring a used browser session back to the login page.
+
+        :raises selenium.common.exceptions.WebDriverException: If the
+            session can not be reset.
+        """
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.switch_to.alert.dismiss()
+        except NoAlertPresentException:
+            pass
+        # Cookies and storage can only be cleared for the current domain
+        driver.get(settings.server.get_url())
+        driver.delete_all_cookies()
+        driver.execute_script(
+            'window.localStorage.clear(); window.sessionStorage.clear();')
+        driver.get(settings.server.get_url())
+        if not driver.find_elements(*locators['login.username']):
+            raise WebDriverException(
+                'Browser session is still logged in after reset')
+
+    def acquire(self):
+        """Borrow a browser session showing the login page, starting a new
+        one if there is no idle session.
+
+        :return: The webdriver, which must be given back with
+            :meth:`release`.
+        """
+        start = time.time()
+        driver = None
+        while driver is None:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                driver, docker_browser = self._start()
+                driver.get(settings.server.get_url())
+                uses = 0
+                with self._lock:
+                    self.created += 1
+                break
+            driver, docker_browser, uses = entry
+            reset_start = time.time()
+            try:
+                self.reset(driver)
+            except Exception as err:
+                # A crashed browser raises connection errors from the
+                # remote webdriver connection, not only WebDriverException
+                LOGGER.warning('Recycling browser session: %s', err)
+                self._quit(driver, docker_browser)
+                driver = None
+                with self._lock:
+                    self.recycled += 1
+            finally:
+                with self._lock:
+                    self.reset_time += time.time() - reset_start
+        with self._lock:
+            self._in_use[id(driver)] = (docker_browser, uses + 1)
+            self.acquired += 1
+            self.acquire_time += time.time() - start
+        return driver
+
+    def release(self, driver, discard=False):
+        """Give back a browser session borrowed with :meth:`acquire`.
+
+        :param bool discard: Close the session instead of keeping it.
+        """
+        with self._lock:
+            docker_browser, uses = self._in_use.pop(id(driver))
+            keep = (
+                not discard and
+                uses < self._max_uses() and
+                len(self._idle) < self.max_idle
+            )
+            if keep:
+                self._idle.append((driver, docker_browser, uses))
+        if not keep:
+            self._quit(driver, docker_browser)
+
+    def close_all(self):
+        """Close all the idle sessions and log the pool statistics."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver, docker_browser, _ in idle:
+            self._quit(driver, docker_browser, stop=True)
+        if self.acquired:
+            LOGGER.info('Browser pool statistics: %s', self.stats())
+
+    def stats(self):
+        """Return the pool counters.
+
+        :return: A dict with the number of ``created``, ``recycled`` (closed
+            because they could not be reset) and ``acquired`` sessions and
+            the seconds spent acquiring (``acquire_time``) and resetting
+            (``reset_time``) them.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'created': self.created,
+                'recycled': self.recycled,
+                'acquired': self.acquired,
+                'acquire_time': self.acquire_time,
+                'reset_time': self.reset_time,
+            }
+
+
+class DockerBrowserPool(object):
+    """Pool of pre-started :class:`DockerBrowser` containers.
+
+    :meth:`warm` starts the containers in parallel on background threads.
+    A container given back with :meth:`release` gets a new browser session
+    in the background before being handed out again, and is replaced by a
+    new container when that fails::
+
+        docker_browser = docker_browser_pool.acquire()
+        try:
+            docker_browser.webdriver.get(url)
+        finally:
+            docker_browser_pool.release(docker_browser)
+
+    The containers publish their selenium port on a port chosen by docker
+    and are named after the pytest-xdist worker, so the pools of several
+    workers never collide.
+
+    :param int size: Number of containers, defaults to
+        ``settings.docker_browser_pool_size``.
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self._idle = Queue()
+        self._browsers = set()
+        self._lock = threading.Lock()
+        self._warm = False
+        self._closed = False
+
+    def _background(self, func, *args):
+        """Run ``func`` on a daemon thread."""
+        thread = threading.Thread(target=func, args=args)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _add(self):
+        """Start a new container and make it available.
+
+        An error starting the container is made available instead, so it
+        is raised by :meth:`acquire`. Nothing is started once the pool is
+        closed.
+        """
+        docker_browser = None
+        try:
+            with self._lock:
+                if self._closed:
+                    return
+                docker_browser = DockerBrowser(name=_container_name())
+                self._browsers.add(docker_browser)
+            docker_browser.start()
+        except Exception as err:
+            LOGGER.error('Failed to start a browser container: %s', err)
+            if docker_browser is not None:
+                self._stop(docker_browser)
+            self._idle.put(err)
+        else:
+            if self._closed:
+                # close_all may have stopped it before it started
+                self._stop(docker_browser)
+            else:
+                self._idle.put(docker_browser)
+
+    def _stop(self, docker_browser):
+        """Remove a container ignoring any error."""
+        with self._lock:
+            self._browsers.discard(docker_browser)
+        try:
+            docker_browser.stop()
+        except Exception as err:
+            LOGGER.debug('Error removing browser container: %s', err)
+
+    def _recycle(self, docker_browser):
+        """Start a new browser session on a container, or replace it.
+
+        The container is removed instead once the pool is closed.
+        """
+        if self._closed:
+            self._stop(docker_browser)
+            return
+        try:
+            docker_browser.restart()
+        except Exception as err:
+            LOGGER.warning('Replacing browser container: %s', err)
+            self._stop(docker_browser)
+            self._add()
+        else:
+            if self._closed:
+                self._stop(docker_browser)
+            else:
+                self._idle.put(docker_browser)
+
+    def warm(self):
+        """Start the pool containers in the background, once.
+
+        :return: The list of the started threads.
+        """
+        with self._lock:
+            if self._warm:
+                return []
+            self._warm = True
+        size = self.size or settings.docker_browser_pool_size
+        return [self._background(self._add) for _ in range(size)]
+
+    def acquire(self, timeout=300):
+        """Borrow a healthy container, waiting for one to be available.
+
+        :param int timeout: Seconds to wait for a container.
+        :return: A started :class:`DockerBrowser`.
+        :raises DockerBrowserError: If no container is available in time or
+            a container could not be started.
+        """
+        self.warm()
+        deadline = time.time() + timeout
+        while True:
+            try:
+                docker_browser = self._idle.get(
+                    timeout=max(deadline - time.time(), 0))
+            except Empty:
+                raise DockerBrowserError(
+                    'No browser container available after {0} seconds'
+                    .format(timeout)
+                )
+            if isinstance(docker_browser, Exception):
+                # Keep the pool size by trying again in the background
+                self._background(self._add)
+                six.raise_from(
+                    DockerBrowserError(
+                        'Failed to start a browser container'),
+                    docker_browser
+                )
+            if docker_browser.is_healthy():
+                return docker_browser
+            self._background(self._recycle, docker_browser)
+
+    def release(self, docker_browser, stop=False):
+        """Give back a container borrowed with :meth:`acquire`.
+
+        Its browser session is replaced in the background.
+
+        :param bool stop: Remove the container instead, e.g. on exit.
+        """
+        if stop or self._closed:
+            self._stop(docker_browser)
+        else:
+            self._background(self._recycle, docker_browser)
+
+    def close_all(self):
+        """Remove all the containers, no container is started afterwards."""
+        with self._lock:
+            self._closed = True
+            browsers = list(self._browsers)
+        for docker_browser in browsers:
+            self._stop(docker_browser)
+
+
+#: Container pool used by :data:`browser_pool` on the ``docker`` browser.
+docker_browser_pool = DockerBrowserPool()
+# Registered first so the containers are removed after the browsers running
+# on them quit, atexit runs the handlers in reverse order
+atexit.register(docker_browser_pool.close_all)
+
+#: Browser pool used by :class:`robottelo.test.UITestCase`, one per test
+#: worker process.
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close_all)
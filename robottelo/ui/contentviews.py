@@ -349,12 +349,23 @@ class ContentViews(Base):
         # there's no @value attribute). This makes impossible to form xpath for
         # specific package and the only remaining option is to locate all the
         # packages and select only the one whose input contains desired value
-        packages = self.find_elements(locators['contentviews.packages'])
-        checkboxes = [
-            package.find_element(*locators['contentviews.package_checkbox'])
-            for package in packages
-            if package.get_attribute('value') in package_names
-        ]
+        self.wait_for_ajax()
+        packages = self.query(
+            locators['contentviews.packages'],
+            attributes=('value',),
+            children={'checkbox': locators['contentviews.package_checkbox']},
+        )
+        checkboxes = []
+        for package in packages:
+            if not (package['displayed'] and
+                    package['attributes']['value'] in package_names):
+                continue
+            checkbox = package['children']['checkbox']
+            if checkbox is None:
+                raise UINoSuchElementError(
+                    'Checkbox of package {0} not found'.format(
+                        package['attributes']['value']))
+            checkboxes.append(checkbox['element'])
         for checkbox in checkboxes:
             self.click(checkbox)
         self.click(locators['contentviews.remove_packages'])
@@ -373,12 +384,22 @@ class ContentViews(Base):
         }
         self.go_to_filter_page(cv_name, filter_name)
         # As it's impossible to obtain specific filter directly,
-        # getting all the package filters first
-        packages = self.find_elements(locators['contentviews.packages'])
+        # getting all the package filters with their versions at once
+        self.wait_for_ajax()
+        packages = self.query(
+            locators['contentviews.packages'],
+            attributes=('value',),
+            children={
+                'version_type': locators['contentviews.package_version_type'],
+                'version_value': locators[
+                    'contentviews.package_version_value'],
+            },
+        )
         # Then selecting the filters with the same package as passed
         packages = [
             package for package in packages
-            if package.get_attribute('value') == package_name
+            if package['displayed'] and
+            package['attributes']['value'] == package_name
         ]
         # As there can be multiple filters for the same package, user may want
         # to specify version type and version of package filter
@@ -386,22 +407,22 @@ class ContentViews(Base):
         if version_type:
             packages = [
                 package for package in packages
-                if package.find_element(
-                    *locators['contentviews.package_version_type']
-                ).get_attribute('value') == version_types[version_type]
+                if package['children']['version_type'] and
+                package['children']['version_type']['attributes']['value'] ==
+                version_types[version_type]
             ]
         # If version was passed - filter package list by version
         if version_value:
             packages = [
                 package for package in packages
-                if package.find_element(
-                    *locators['contentviews.package_version_value']
-                ).get_attribute('value') == version_value
+                if package['children']['version_value'] and
+                package['children']['version_value']['attributes']['value'] ==
+                version_value
             ]
         # What's left in package list is probably our package, let's work with
         # it
         if packages:
-            package = packages[0]
+            package = packages[0]['element']
         # But if package list is empty - notify user he specified something
         # wrong
         else:
@@ -639,11 +660,12 @@ class ContentViews(Base):
             False
         )
         # get all the available lifecycle environments
-        all_environments_elements = self.find_elements(
-            locators.contentviews.delete_version_environments)
+        self.wait_for_ajax()
         all_environments = [
-            env_element.text
-            for env_element in all_environments_elements
+            env_info['text']
+            for env_info in self.query(
+                locators.contentviews.delete_version_environments)
+            if env_info['displayed']
         ]
         # select the needed ones that are in the environments arg
         # and unselected the ones not in environments arg
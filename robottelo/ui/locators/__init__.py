@@ -3,6 +3,7 @@
 
 from selenium.webdriver.common.by import By  # noqa
 from .model import Locator, LocatorDict  # noqa
+from .registry import CompiledLocator, LocatorRegistry  # noqa
 from .menu import menu_locators  # noqa
 from .tab import tab_locators  # noqa
 from .common import common_locators  # noqa
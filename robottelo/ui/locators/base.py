@@ -2,10 +2,10 @@
 """Implements different locators for UI"""
 
 from selenium.webdriver.common.by import By
-from .model import LocatorDict
+from .registry import LocatorRegistry
 
 
-locators = LocatorDict({
+locators = LocatorRegistry({
 
     # Bookmarks
     "bookmark.select_name": (
@@ -0,0 +1,354 @@
+# -*- encoding: utf-8 -*-
+"""Compiled locator registry
+
+The locators are defined as plain dicts mapping dotted names to
+``(strategy, value)`` tuples and wrapped by :class:`LocatorRegistry`, which
+compiles them into a flat, frozen, mapping the first time a locator is
+looked up::
+
+    locators = LocatorRegistry({
+        'menu.home': (By.XPATH, "//a[@class='home']"),
+        'menu.item': (By.XPATH, "//a[@id='%s']"),
+    })
+    locators['menu.home']
+    locators.menu.item % 'users'
+
+Compiling also sets the children of the registry and of every node as
+their instance attributes, so each step of a dotted attribute lookup is a
+plain attribute read and a name lookup is a single dict read. The looked up
+:class:`CompiledLocator` are tuples, so no object is created by a lookup.
+
+:func:`check_source` and :func:`check_definitions` validate the
+definitions at build time (``make locators-check``): the first reports the
+keys defined twice in a definitions module, which Python silently drops, the
+second the XPath expressions which do not compile, formatting the templates
+with placeholder values.
+"""
+import ast
+import re
+import six
+import sys
+
+from selenium.webdriver.common.by import By
+
+try:
+    from lxml import etree
+except ImportError:
+    # Let it fail later if not installed
+    etree = None
+
+#: Strategies a locator can use
+STRATEGIES = frozenset(
+    value for name, value in vars(By).items() if not name.startswith('_'))
+
+#: Matches the ``%`` placeholders of a locator template
+PLACEHOLDER_RE = re.compile(r'%(?:\((\w+)\))?[-#0 +]*\d*(?:\.\d+)?([a-z%])')
+
+#: Method names of the registry which can not be locator names
+RESERVED_NAMES = frozenset(('definitions', 'items', 'keys', 'get', 'values'))
+
+
+class LocatorError(Exception):
+    """Indicates an invalid locator definition."""
+
+
+class CompiledLocator(tuple):
+    """Frozen ``(strategy, value)`` locator.
+
+    Templates are interpolated with ``%``, returning a new locator::
+
+        locators['menu.item'] % 'users'
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, strategy, value):
+        return tuple.__new__(cls, (strategy, value))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    @property
+    def _strategy(self):
+        """Selenium strategy of the locator"""
+        return self[0]
+
+    @property
+    def _value(self):
+        """Selenium value of the locator"""
+        return self[1]
+
+    def __mod__(self, other):
+        return tuple.__new__(CompiledLocator, (self[0], self[1] % other))
+
+    def __repr__(self):
+        return u'<|strategy={0}|value={1}>'.format(self[0], self[1])
+
+
+class LocatorBranch(CompiledLocator):
+    """Locator whose name is also the prefix of other locators, e.g.
+    ``resource.tenant`` and ``resource.tenant.button``.
+
+    It has a ``__dict__`` to keep its registry and children, unlike the
+    other locators.
+    """
+
+    def __new__(cls, strategy, value, registry=None, prefix=None):
+        return tuple.__new__(cls, (strategy, value))
+
+    def __init__(self, strategy, value, registry=None, prefix=None):
+        self._registry = registry
+        self._prefix = prefix
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._registry[self._prefix + name]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, slice)):
+            return tuple.__getitem__(self, item)
+        return self._registry[self._prefix + item]
+
+
+class LocatorNode(object):
+    """Intermediate node of a registry, giving access to the locators whose
+    name starts with its prefix.
+    """
+
+    def __init__(self, registry, prefix):
+        self._registry = registry
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._registry[self._prefix + name]
+
+    def __getitem__(self, name):
+        return self._registry[self._prefix + name]
+
+    def __contains__(self, name):
+        return self._prefix + name in self._registry
+
+    def __dir__(self):
+        return sorted(
+            name[len(self._prefix):].split('.', 1)[0]
+            for name in self._registry.keys()
+            if name.startswith(self._prefix)
+        )
+
+    def __repr__(self):
+        return u'<|node={0}|contains={1}>'.format(
+            self._prefix[:-1], dir(self))
+
+
+def placeholders(value):
+    """Return the placeholder values a locator template expects, or
+    ``None`` if it is not a template.
+
+    :return: A tuple with a value of the right type for each positional
+        placeholder, or a dict for named placeholders.
+    """
+    values = []
+    named = {}
+    for name, conversion in PLACEHOLDER_RE.findall(value):
+        if conversion == '%':
+            continue
+        placeholder = 1 if conversion in 'dioxXeEfFgGc' else u'x'
+        if name:
+            named[name] = placeholder
+        else:
+            values.append(placeholder)
+    if named:
+        return named
+    if values:
+        return tuple(values)
+    return None
+
+
+def compile_locators(definitions):
+    """Compile locator definitions into a flat mapping.
+
+    :param dict definitions: The ``(strategy, value)`` tuples by dotted
+        name.
+    :return: A dict mapping each name to its :class:`CompiledLocator` and
+        each name prefix to its :class:`LocatorNode`, or
+        :class:`LocatorBranch` if it is also a locator. The registry of the
+        nodes is set by :class:`LocatorRegistry`.
+    :raises LocatorError: If a definition is invalid.
+    """
+    compiled = {}
+    prefixes = set()
+    for name, definition in definitions.items():
+        if (not isinstance(definition, (tuple, list)) or
+                len(definition) != 2):
+            raise LocatorError(
+                'Locator {0} must be a (strategy, value) tuple'.format(name))
+        strategy, value = definition
+        if strategy not in STRATEGIES:
+            raise LocatorError(
+                'Locator {0} has an unknown strategy {1}'
+                .format(name, strategy)
+            )
+        keys = name.split('.')
+        if keys[0] in RESERVED_NAMES or '' in keys:
+            raise LocatorError('Invalid locator name {0}'.format(name))
+        compiled[name] = CompiledLocator(strategy, value)
+        for index in range(1, len(keys)):
+            prefixes.add('.'.join(keys[:index]))
+    for prefix in prefixes:
+        if prefix in compiled:
+            compiled[prefix] = LocatorBranch(
+                *compiled[prefix], prefix=prefix + '.')
+        else:
+            compiled[prefix] = LocatorNode(None, prefix + '.')
+    return compiled
+
+
+def check_definitions(definitions):
+    """Check the XPath expressions of locator definitions compile.
+
+    Templates are formatted with placeholder values first.
+
+    :return: A list of error messages.
+    :raises RuntimeError: If lxml is not installed.
+    """
+    if etree is None:
+        raise RuntimeError(
+            'Package lxml is not installed. Install it in order to check the '
+            'locators XPath expressions.'
+        )
+    errors = []
+    for name, (strategy, value) in sorted(definitions.items()):
+        if strategy != By.XPATH:
+            continue
+        args = placeholders(value)
+        try:
+            expression = value % args if args is not None else value
+            etree.XPath(expression)
+        except (etree.XPathSyntaxError, TypeError, ValueError) as err:
+            errors.append(u'{0}: {1}: {2}'.format(name, err, value))
+    return errors
+
+
+def _literal_string(node):
+    """Return the value of a string literal AST node, ``None`` otherwise.
+
+    Python 3.8 parses the literals as ``ast.Constant`` and deprecates
+    ``ast.Str``, the older versions parse them as ``ast.Str``.
+    """
+    if sys.version_info >= (3, 8):
+        if (isinstance(node, ast.Constant) and
+                isinstance(node.value, six.string_types)):
+            return node.value
+        return None
+    return node.s if isinstance(node, ast.Str) else None
+
+
+def check_source(path):
+    """Check a locator definitions module.
+
+    :param str path: The module file.
+    :return: A list of error messages for the duplicate keys of its dict
+        literals.
+    """
+    with open(path) as handler:
+        tree = ast.parse(handler.read(), path)
+    errors = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Dict):
+            continue
+        seen = {}
+        for key in node.keys:
+            value = _literal_string(key)
+            if value is None:
+                continue
+            if value in seen:
+                errors.append(
+                    u'{0}:{1}: duplicate locator {2}, first defined on line '
+                    u'{3}'.format(path, key.lineno, value, seen[value])
+                )
+            else:
+                seen[value] = key.lineno
+    return errors
+
+
+class LocatorRegistry(object):
+    """Frozen registry of locators, compiled on first use.
+
+    Locators are looked up by dotted name or by attribute, e.g.
+    ``locators['menu.home']``, ``locators['menu']['home']`` or
+    ``locators.menu.home``. Unknown names raise ``KeyError``.
+
+    :param dict definitions: The ``(strategy, value)`` tuples by dotted
+        name.
+    """
+
+    def __init__(self, definitions):
+        self._definitions = definitions
+        self._compiled = None
+
+    def _load(self):
+        """Compile the definitions and set the children of the registry and
+        its nodes as their attributes.
+        """
+        compiled = compile_locators(self._definitions)
+        for name, item in compiled.items():
+            if isinstance(item, (LocatorNode, LocatorBranch)):
+                item._registry = self
+            parent, _, child = name.rpartition('.')
+            if child.startswith('_'):
+                # Left to __getattr__, not to hide the private attributes
+                continue
+            vars(compiled[parent] if parent else self)[child] = item
+        self._compiled = compiled
+        return compiled
+
+    @property
+    def definitions(self):
+        """The locator definitions."""
+        return self._definitions
+
+    def __getitem__(self, name):
+        compiled = self._compiled or self._load()
+        try:
+            return compiled[name]
+        except KeyError:
+            raise KeyError('Unknown locator {0}'.format(name))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def __contains__(self, name):
+        return name in (self._compiled or self._load())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._definitions)
+
+    def __dir__(self):
+        return sorted(set(name.split('.', 1)[0] for name in self.keys()))
+
+    def get(self, name, default=None):
+        """Return a locator or node, ``default`` if it does not exist."""
+        return (self._compiled or self._load()).get(name, default)
+
+    def keys(self):
+        """Return the locator names."""
+        return list(self._definitions)
+
+    def items(self):
+        """Return the ``(name, locator)`` pairs."""
+        return [(name, self[name]) for name in self._definitions]
+
+    def values(self):
+        """Return the locators."""
+        return [self[name] for name in self._definitions]
@@ -2,10 +2,10 @@
 """Implements different locators for UI"""
 
 from selenium.webdriver.common.by import By
-from .model import LocatorDict
+from .registry import LocatorRegistry
 
 
-tab_locators = LocatorDict({
+tab_locators = LocatorRegistry({
 
     # common
     "tab_primary": (By.XPATH, "//a[@href='#primary']"),
@@ -11,8 +11,12 @@ snap-guest and its dependencies and the ``image_dir`` path created.
 """
 import logging
 import os
+import socket
+import threading
 import time
 
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from robottelo import ssh
 from robottelo.config import settings
 from robottelo.constants import DISTRO_RHEL6, DISTRO_RHEL7
@@ -50,8 +54,18 @@ class VirtualMachine(object):
     as per virtual machine basis. Just set the wanted values when
     instantiating.
 
+    Instead of waiting a fixed time for the machine to boot, :meth:`create`
+    polls its address and then its SSH banner, sleeping between attempts
+    with an exponential backoff, until :attr:`boot_timeout`.
+
     """
 
+    #: Seconds to wait for the machine to boot and accept SSH connections
+    boot_timeout = 300
+
+    #: Maximum seconds to sleep between two readiness polls
+    poll_max_delay = 10
+
     def __init__(
             self, cpu=1, ram=512, distro=None, provisioning_server=None,
             image_dir=None, tag=None, hostname=None, domain=None,
@@ -146,21 +160,66 @@ class VirtualMachine(object):
             raise VirtualMachineError(
                 u'Failed to run snap-guest: {0}'.format(result.stderr))
 
-        # Give some time to machine boot
-        time.sleep(60)
+        if self.hostname is None:
+            self.hostname = u'{0}.{1}'.format(self._target_image, self._domain)
+        self._created = True
+        try:
+            self.ip_addr = self._wait_for(
+                self._resolve_ip_addr, 'IP address information')
+            self._wait_for(self._ssh_ready, 'SSH service')
+        except VirtualMachineError:
+            # Do not leave behind a machine which did not boot
+            self.destroy()
+            self._created = False
+            raise
+
+    def _wait_for(self, check, description):
+        """Poll ``check`` until it returns a true value, sleeping between
+        attempts with an exponential backoff.
+
+        :return: The ``check`` result.
+        :raises robottelo.vm.VirtualMachineError: If ``check`` keeps failing
+            for :attr:`boot_timeout` seconds.
+        """
+        deadline = time.time() + self.boot_timeout
+        delay = 1
+        while True:
+            result = check()
+            if result:
+                return result
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise VirtualMachineError(
+                    u'Failed to fetch virtual machine {0} after {1} seconds'
+                    .format(description, self.boot_timeout)
+                )
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.poll_max_delay)
+
+    def _resolve_ip_addr(self):
+        """Ping the machine from the provisioning server.
 
+        :return: The machine IP address or ``None`` if it does not answer yet.
+        """
         result = ssh.command(
             u'ping -c 1 {0}.local'.format(self._target_image),
             self.provisioning_server
         )
         if result.return_code != 0:
-            raise VirtualMachineError(
-                'Failed to fetch virtual machine IP address information')
+            return None
         output = ''.join(result.stdout)
-        self.ip_addr = output.split('(')[1].split(')')[0]
-        if self.hostname is None:
-            self.hostname = u'{0}.{1}'.format(self._target_image, self._domain)
-        self._created = True
+        return output.split('(')[1].split(')')[0]
+
+    def _ssh_ready(self):
+        """Check whether the machine SSH service sends its banner."""
+        try:
+            connection = socket.create_connection((self.ip_addr, 22), 5)
+            try:
+                return connection.recv(4).startswith(b'SSH-')
+            finally:
+                connection.close()
+        except (socket.error, socket.timeout):
+            return False
 
     def destroy(self):
         """Destroys the virtual machine on the provisioning server"""
@@ -481,3 +540,180 @@ class VirtualMachine(object):
 
     def __exit__(self, *exc):
         self.destroy()
+
+
+def _concurrently(func, items):
+    """Call ``func`` with each of ``items`` on its own thread.
+
+    :return: The list of the calls errors, ``None`` for the successful ones.
+    """
+    def call(item):
+        try:
+            func(item)
+        except Exception as err:
+            return err
+
+    if not items:
+        return []
+    pool = ThreadPool(len(items))
+    try:
+        return pool.map(call, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def create_vms(count, **kwargs):
+    """Create ``count`` virtual machines at the same time.
+
+    The keyword arguments are passed to :class:`VirtualMachine`.
+
+    :return: The list of created virtual machines.
+    :raises robottelo.vm.VirtualMachineError: If any of the machines could
+        not be created, the created ones are destroyed then.
+    """
+    vms = [VirtualMachine(**kwargs) for _ in range(count)]
+    errors = [err for err in _concurrently(VirtualMachine.create, vms) if err]
+    if errors:
+        _concurrently(VirtualMachine.destroy, vms)
+        raise VirtualMachineError(
+            u'Failed to create {0} of {1} virtual machines: {2}'
+            .format(len(errors), count, errors[0])
+        )
+    return vms
+
+
+class VirtualMachinePool(object):
+    """Pool of booted virtual machines lent to the tests.
+
+    :meth:`warm` boots virtual machines in background, so tests get a ready
+    machine instead of waiting for it to boot::
+
+        vm_pool = VirtualMachinePool(size=5, prepare=lambda vm: (
+            vm.install_katello_ca()))
+        vm_pool.warm()
+        ...
+        with vm_pool.vm() as vm:
+            vm.register_contenthost(org['label'], activation_key['name'])
+
+    A machine is destroyed when it is given back, unless the test asks for
+    it to be reused: it is then unregistered and kept for the next test.
+
+    :param int size: Number of idle machines kept by :meth:`fill`.
+    :param prepare: Optional callable receiving each new machine once
+        created, like :meth:`VirtualMachine.install_katello_ca`.
+    :param kwargs: Arguments of the :class:`VirtualMachine` machines.
+    """
+
+    def __init__(self, size=1, prepare=None, **kwargs):
+        self.size = size
+        self.prepare = prepare
+        self.kwargs = kwargs
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _create(self):
+        """Create and prepare a new machine."""
+        vm = VirtualMachine(**self.kwargs)
+        try:
+            vm.create()
+            if self.prepare is not None:
+                self.prepare(vm)
+        except Exception:
+            vm.destroy()
+            raise
+        return vm
+
+    def lease(self):
+        """Lend an idle machine, creating it if the pool is empty.
+
+        :return: A :class:`VirtualMachine` which must be given back to
+            :meth:`release`.
+        """
+        with self._lock:
+            vm = self._idle.pop(0) if self._idle else None
+        if vm is None:
+            logger.debug('Virtual machine pool is empty, creating a machine')
+            vm = self._create()
+        return vm
+
+    def release(self, vm, reuse=False):
+        """Give back a lent machine.
+
+        :param bool reuse: Keep the machine for the next tests instead of
+            destroying it, it is unregistered first.
+        """
+        if reuse:
+            try:
+                vm.unregister()
+                vm.run(u'subscription-manager clean')
+                vm._subscribed = False
+            except Exception as err:
+                logger.warning(
+                    'Failed to clean virtual machine %s: %s', vm.hostname, err)
+                reuse = False
+        with self._lock:
+            keep = reuse and len(self._idle) < self.size
+            if keep:
+                self._idle.append(vm)
+        if not keep:
+            vm.destroy()
+
+    @contextmanager
+    def vm(self, reuse=False):
+        """Lend a machine for the ``with`` block.
+
+        :param bool reuse: Whether the machine can be reused once the block
+            is done, it is always destroyed if the block raises.
+        """
+        vm = self.lease()
+        try:
+            yield vm
+        except Exception:
+            self.release(vm)
+            raise
+        self.release(vm, reuse)
+
+    def fill(self):
+        """Create machines at the same time until the pool has :attr:`size`
+        idle machines.
+
+        :return: The number of created machines.
+        """
+        with self._lock:
+            missing = self.size - len(self._idle)
+        created = []
+
+        def create(_):
+            created.append(self._create())
+
+        errors = [
+            err for err in _concurrently(create, list(range(missing))) if err]
+        for err in errors:
+            logger.warning(
+                'Failed to create a pooled virtual machine: %s', err)
+        with self._lock:
+            self._idle.extend(created)
+        return len(created)
+
+    def warm(self):
+        """Run :meth:`fill` on a background thread.
+
+        :return: The started daemon thread.
+        """
+        thread = threading.Thread(target=self.fill)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def close(self):
+        """Destroy the idle machines."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        _concurrently(VirtualMachine.destroy, idle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
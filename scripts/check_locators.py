@@ -0,0 +1,49 @@
+"""Check the UI locator definitions.
+
+Compiles every locator registry of :mod:`robottelo.ui.locators` and reports
+the keys defined twice in a definitions module and the XPath expressions
+which do not compile::
+
+    python scripts/check_locators.py
+
+The XPath check requires lxml and is skipped when it is not installed. Exits
+with a non zero status when an error is found.
+"""
+from __future__ import print_function
+
+import sys
+
+from robottelo.ui.locators import base, common, menu, registry, tab
+
+
+def main():
+    """Check the locator registries and print the errors found."""
+    errors = []
+    for module in (base, common, menu, tab):
+        path = module.__file__
+        if path.endswith('.pyc'):
+            path = path[:-1]
+        errors.extend(registry.check_source(path))
+        for name, value in vars(module).items():
+            if not isinstance(value, registry.LocatorRegistry):
+                continue
+            try:
+                registry.compile_locators(value.definitions)
+            except registry.LocatorError as err:
+                errors.append(u'{0}: {1}'.format(name, err))
+                continue
+            if registry.etree is None:
+                print('lxml is not installed, skipping the XPath check of',
+                      name)
+                continue
+            errors.extend(
+                u'{0}.{1}'.format(name, error)
+                for error in registry.check_definitions(value.definitions)
+            )
+    for error in errors:
+        print(error)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
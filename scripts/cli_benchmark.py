@@ -0,0 +1,199 @@
+"""Benchmark the CLI layer against a local fake SSH server.
+
+The hammer commands are answered by
+:class:`robottelo.fake_ssh.HammerReplayHandler` with the recorded outputs of
+``tests/foreman/data/hammer_outputs.json``, so no Satellite server is
+needed::
+
+    python scripts/cli_benchmark.py [--latency 0.05] [--iterations 200] \\
+        [--threads 1 4 16]
+
+Three reports are printed:
+
+* The mean time of each CLI call and its overhead over a bare
+  ``ssh.command`` round trip of the same hammer command, which is the time
+  spent building the command and processing and parsing its output.
+* The throughput of the CLI calls when run by N threads at the same time.
+* The cost of processing and parsing the recorded output of each format,
+  without SSH.
+
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import threading
+import time
+import timeit
+
+from robottelo import ssh
+from robottelo.cli import hammer
+from robottelo.cli.base import CommandInvocation
+from robottelo.cli.host import Host
+from robottelo.cli.org import Org
+from robottelo.config import settings
+from robottelo.fake_ssh import FakeSSHServer, HammerReplayHandler
+
+#: Recorded hammer outputs
+FIXTURES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'tests', 'foreman', 'data', 'hammer_outputs.json'
+)
+
+#: CLI calls measured, as ``(name, cli class, subcommand, options, output
+#: format)``
+CALLS = (
+    ('organization list', Org, 'list', {'per-page': 10000}, 'csv'),
+    ('organization info', Org, 'info', {'id': 1}, None),
+    ('organization info json', Org, 'info', {'id': 1}, 'json'),
+    ('host list', Host, 'list', {'per-page': 10000}, 'csv'),
+    ('host list json', Host, 'list', {'per-page': 10000}, 'json'),
+    ('host info', Host, 'info', {'id': 1}, None),
+)
+
+
+def cli_call(cli_class, command_sub, options, output_format):
+    """Return a function running a CLI call the way the ``Base`` methods
+    do, parsing the base output as ``info``.
+    """
+    if command_sub == 'info':
+        return lambda: cli_class.info(options, output_format=output_format)
+    return lambda: cli_class.execute(
+        cli_class._construct_command(options, command_sub),
+        output_format=output_format
+    )
+
+
+def bare_call(cli_class, command_sub, options, output_format):
+    """Return a function running the hammer command of a CLI call with
+    ``ssh.command`` and no output processing.
+    """
+    command = CommandInvocation(
+        cli_class,
+        cli_class._construct_command(options, command_sub),
+        output_format=output_format,
+    ).hammer_command()
+    return lambda: ssh.command(command, output_format='plain')
+
+
+def mean_time(func, iterations):
+    """Return the mean time in milliseconds of ``iterations`` calls."""
+    func()  # warm up connections and caches
+    start = time.time()
+    for _ in range(iterations):
+        func()
+    return (time.time() - start) * 1000 / iterations
+
+
+def report_overhead(iterations):
+    """Print the time of each CLI call and its overhead."""
+    print('{0:<24} {1:>10} {2:>10} {3:>12}'.format(
+        'call', 'cli ms', 'ssh ms', 'overhead ms'))
+    for name, cli_class, command_sub, options, output_format in CALLS:
+        args = (cli_class, command_sub, options, output_format)
+        cli = mean_time(cli_call(*args), iterations)
+        bare = mean_time(bare_call(*args), iterations)
+        print('{0:<24} {1:>10.2f} {2:>10.2f} {3:>12.2f}'.format(
+            name, cli, bare, cli - bare))
+
+
+def report_throughput(iterations, threads_counts):
+    """Print the calls per second of ``iterations`` CLI calls spread over
+    each number of threads of ``threads_counts``.
+    """
+    calls = [cli_call(*call[1:]) for call in CALLS]
+
+    def worker(count):
+        for i in range(count):
+            calls[i % len(calls)]()
+
+    print('{0:<24} {1:>10} {2:>10}'.format('threads', 'calls', 'calls/s'))
+    for threads_count in threads_counts:
+        per_thread = max(iterations // threads_count, 1)
+        threads = [
+            threading.Thread(target=worker, args=(per_thread,))
+            for _ in range(threads_count)
+        ]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+        total = per_thread * threads_count
+        print('{0:<24} {1:>10} {2:>10.1f}'.format(
+            threads_count, total, total / elapsed))
+
+
+def report_parsers(fixtures, iterations):
+    """Print the cost of processing the recorded outputs of each format of
+    the ``fixtures`` file.
+    """
+    with open(fixtures) as fixture:
+        recordings = json.load(fixture)
+    print('{0:<32} {1:>10} {2:>10} {3:>10}'.format(
+        'output', 'bytes', 'us/call', 'us/KB'))
+    for recording in recordings:
+        stdout = recording.get('stdout')
+        if not stdout:
+            continue
+        output_format = recording.get('output_format')
+        if output_format is None:
+            def parse():
+                hammer.parse_info(ssh._build_result(stdout, u'', 0).stdout)
+        else:
+            def parse():
+                ssh._build_result(stdout, u'', 0, output_format)
+        elapsed = timeit.timeit(parse, number=iterations)
+        per_call = elapsed * 1000000 / iterations
+        print('{0:<32} {1:>10} {2:>10.1f} {3:>10.1f}'.format(
+            '{0} [{1}]'.format(
+                recording['command'], output_format or 'base'),
+            len(stdout),
+            per_call,
+            per_call * 1024 / len(stdout),
+        ))
+
+
+def main():
+    """Run the benchmarks against a fake SSH server."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--latency', type=float, default=0,
+        help='seconds the fake server waits before answering each command')
+    parser.add_argument(
+        '--iterations', type=int, default=200,
+        help='number of calls of each measurement')
+    parser.add_argument(
+        '--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+        help='numbers of threads of the throughput measurement')
+    parser.add_argument(
+        '--fixtures', default=FIXTURES,
+        help='JSON file with the recorded hammer outputs')
+    args = parser.parse_args()
+
+    handler = HammerReplayHandler.from_file(args.fixtures, args.latency)
+    with FakeSSHServer(handler) as server:
+        settings.hammer_session = False
+        settings.locale = 'en_US.UTF-8'
+        settings.server.admin_password = 'changeme'
+        settings.server.admin_username = 'admin'
+        settings.server.hostname = server.hostname
+        settings.server.ssh_password = 'changeme'
+        settings.server.ssh_port = server.port
+        settings.server.ssh_username = 'root'
+        try:
+            print('Per-call time, {0} iterations\n'.format(args.iterations))
+            report_overhead(args.iterations)
+            print('\nThroughput\n')
+            report_throughput(args.iterations, args.threads)
+            print('\nOutput processing, {0} iterations\n'.format(
+                args.iterations))
+            report_parsers(args.fixtures, args.iterations)
+        finally:
+            ssh.connection_pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Compare hammer commands latency when starting a new hammer process for
+every command against running them on a persistent hammer session.
+
+The ``fork`` mode is the default one, every command starts a new Ruby
+interpreter which loads the hammer gems. The ``session`` mode runs the
+commands on a :class:`robottelo.ssh.SSHHammerSession`, which loads them
+once; the time to start the session is reported apart.
+
+The commands are run against the server configured on robottelo.properties::
+
+    python scripts/hammer_session_benchmark.py [iterations]
+
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from robottelo import ssh
+from robottelo.cli.org import Org
+from robottelo.config import settings
+
+#: Read only commands used to measure the latency
+COMMANDS = (
+    ('organization list', lambda: Org.list(per_page=False)),
+    ('organization info', lambda: Org.info({u'id': 1})),
+)
+
+
+def measure(func, iterations):
+    """Run ``func`` ``iterations`` times and return the latencies in
+    seconds.
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.time()
+        func()
+        timings.append(time.time() - start)
+    return timings
+
+
+def summarize(timings):
+    """Return the mean and median of a list of timings in milliseconds."""
+    ordered = sorted(timings)
+    mean = sum(ordered) / len(ordered)
+    median = ordered[len(ordered) // 2]
+    return mean * 1000, median * 1000
+
+
+def benchmark(iterations):
+    """Measure every command on both execution modes and print a report."""
+    print('{0:<20} {1:<10} {2:>10} {3:>10}'.format(
+        'command', 'mode', 'mean ms', 'median ms'))
+    for name, func in COMMANDS:
+        for mode, hammer_session in (('fork', False), ('session', True)):
+            settings.hammer_session = hammer_session
+            # warm up connections and sessions
+            startup = measure(func, 1)[0]
+            mean, median = summarize(measure(func, iterations))
+            print('{0:<20} {1:<10} {2:>10.1f} {3:>10.1f}'.format(
+                name, mode, mean, median))
+            if hammer_session:
+                print('{0:<20} {1:<10} {2:>10.1f}'.format(
+                    name, 'startup', startup * 1000))
+            ssh.close_shell_sessions()
+
+
+if __name__ == '__main__':
+    settings.configure()
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -51,7 +51,8 @@ class DiscoveredTestCase(CLITestCase):
         """
         for _ in range(30):
             try:
-                discovered_host = DiscoveredHost.info({'name': hostname})
+                discovered_host = DiscoveredHost.info(
+                    {'name': hostname}, cache=False)
             except CLIReturnCodeError:
                 sleep(10)
                 continue
@@ -14,14 +14,11 @@
 
 @Upstream: No
 """
-from robottelo.cli.factory import make_org
 from robottelo.cli.product import Product
 from robottelo.cli.repository_set import RepositorySet
-from robottelo.cli.subscription import Subscription
-from robottelo import manifests
 from robottelo.constants import PRDS, REPOSET
 from robottelo.decorators import run_in_one_thread, tier1
-from robottelo.ssh import upload_file
+from robottelo.entity_pool import entity_pool
 from robottelo.test import CLITestCase
 
 
@@ -41,14 +38,8 @@ class RepositorySetTestCase(CLITestCase):
         rhel_product_name = PRDS['rhel']
         rhel_repo_set = REPOSET['rhva6']
 
-        # Clone manifest and upload it
-        org = make_org()
-        with manifests.clone() as manifest:
-            upload_file(manifest.content, manifest.filename)
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org['id'],
-        })
+        # Borrow an organization with a manifest
+        org = entity_pool.lend(self, 'org_with_manifest')
 
         # No repos should be enabled by default
         result = RepositorySet.available_repositories({
@@ -149,13 +140,7 @@ class RepositorySetTestCase(CLITestCase):
 
         @Assert: Repository was enabled
         """
-        org = make_org()
-        with manifests.clone() as manifest:
-            upload_file(manifest.content, manifest.filename)
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org['id'],
-        })
+        org = entity_pool.lend(self, 'org_with_manifest')
         RepositorySet.enable({
             u'basearch': 'x86_64',
             u'name': REPOSET['rhva6'],
@@ -185,13 +170,7 @@ class RepositorySetTestCase(CLITestCase):
 
         @Assert: Repository was enabled
         """
-        org = make_org()
-        with manifests.clone() as manifest:
-            upload_file(manifest.content, manifest.filename)
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org['id'],
-        })
+        org = entity_pool.lend(self, 'org_with_manifest')
         RepositorySet.enable({
             u'basearch': 'x86_64',
             u'name': REPOSET['rhva6'],
@@ -220,13 +199,7 @@ class RepositorySetTestCase(CLITestCase):
 
         @Assert: Repository was enabled
         """
-        org = make_org()
-        with manifests.clone() as manifest:
-            upload_file(manifest.content, manifest.filename)
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org['id'],
-        })
+        org = entity_pool.lend(self, 'org_with_manifest')
         product_id = Product.info({
             u'name': PRDS['rhel'],
             u'organization-id': org['id'],
@@ -265,13 +238,7 @@ class RepositorySetTestCase(CLITestCase):
 
         @Assert: Repository was disabled
         """
-        org = make_org()
-        with manifests.clone() as manifest:
-            upload_file(manifest.content, manifest.filename)
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org['id'],
-        })
+        org = entity_pool.lend(self, 'org_with_manifest')
         RepositorySet.enable({
             u'basearch': 'x86_64',
             u'name': REPOSET['rhva6'],
@@ -308,13 +275,7 @@ class RepositorySetTestCase(CLITestCase):
 
         @Assert: Repository was disabled
         """
-        org = make_org()
-        with manifests.clone() as manifest:
-            upload_file(manifest.content, manifest.filename)
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org['id'],
-        })
+        org = entity_pool.lend(self, 'org_with_manifest')
         RepositorySet.enable({
             u'basearch': 'x86_64',
             u'name': REPOSET['rhva6'],
@@ -350,13 +311,7 @@ class RepositorySetTestCase(CLITestCase):
 
         @Assert: Repository was disabled
         """
-        org = make_org()
-        with manifests.clone() as manifest:
-            upload_file(manifest.content, manifest.filename)
-        Subscription.upload({
-            u'file': manifest.filename,
-            u'organization-id': org['id'],
-        })
+        org = entity_pool.lend(self, 'org_with_manifest')
         product_id = Product.info({
             u'name': PRDS['rhel'],
             u'organization-id': org['id'],
@@ -161,7 +161,7 @@ class SyncPlanTestCase(CLITestCase):
         """
         for _ in range(max_attempts):
             try:
-                repo = Repository.info({'id': repo['id']})
+                repo = Repository.info({'id': repo['id']}, cache=False)
                 for content in content_types:
                     if after_sync:
                         self.assertGreater(
@@ -155,4 +155,5 @@ class SELinuxTestCase(TestCase):
                 self.fail(
                     'Could not find {0} file on server'.format(logfile['path'])
                 )
-            self.assertEqual(len(log.filter()), 0)
+            with log:
+                self.assertEqual(len(log.filter()), 0)
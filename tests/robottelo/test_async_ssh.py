@@ -0,0 +1,163 @@
+"""Tests for module ``robottelo.async_ssh``."""
+import six
+import sys
+import threading
+import time
+import unittest2
+
+from robottelo.fake_ssh import FakeSSHServer
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from robottelo import async_ssh
+    from robottelo.performance import async_candlepin
+else:
+    async_ssh = None
+
+
+class RecordingHandler(object):
+    """Echo the commands and record how many run at the same time."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, command):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        if command.startswith('time -p '):
+            return u'', u'real 1.50\nuser 0.10\nsys 0.01\n', 0
+        if command == u'fail':
+            return u'', u'failed', 1
+        return u'{0}\n'.format(command), u'', 0
+
+
+@unittest2.skipIf(
+    async_ssh is None or async_ssh.asyncssh is None,
+    'requires Python 3.5 and asyncssh'
+)
+class AsyncSSHTestCase(unittest2.TestCase):
+    """Tests for the asyncio SSH transport"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.handler = RecordingHandler()
+        cls.server = FakeSSHServer(cls.handler)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        settings = mock.MagicMock()
+        settings.server.hostname = self.server.hostname
+        settings.server.ssh_port = self.server.port
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'password'
+        settings.server.ssh_username = 'root'
+        for target in ('robottelo.ssh.settings',
+                       'robottelo.async_ssh.settings'):
+            patcher = mock.patch(target, settings)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.pool = async_ssh.AsyncSSHConnectionPool(
+            max_concurrency=40, max_sessions=10)
+        self.addCleanup(self.pool.close_all)
+        self.handler.max_running = 0
+
+    def run_command(self, cmd, **kwargs):
+        """Run ``cmd`` on the test pool and return its result."""
+        return self.loop.run_until_complete(
+            async_ssh.command(cmd, pool=self.pool, **kwargs))
+
+    def test_command(self):
+        """Check the command result is a SSHCommandResult"""
+        result = self.run_command(u'echo foo')
+        self.assertEqual(0, result.return_code)
+        self.assertEqual([u'echo foo', u''], result.stdout)
+        result = self.run_command(u'fail')
+        self.assertEqual(1, result.return_code)
+        self.assertEqual(u'failed', result.stderr)
+
+    def test_command_csv_output(self):
+        """Check the command output is parsed as the sync one"""
+        result = self.run_command(u'Id,Name', output_format='csv')
+        self.assertEqual([], result.stdout)
+
+    def test_connection_reuse(self):
+        """Check sequential commands share a connection"""
+        for _ in range(3):
+            self.run_command(u'ls')
+        self.assertEqual(
+            {'connections': 1, 'sessions': 0}, self.pool.stats())
+
+    def test_concurrent_commands(self):
+        """Check concurrent commands are limited and spread over
+        connections of ``max_sessions`` sessions
+        """
+        results = self.loop.run_until_complete(asyncio.gather(*(
+            async_ssh.command(u'echo {0}'.format(i), pool=self.pool)
+            for i in range(200)
+        )))
+        self.assertEqual(
+            [[u'echo {0}'.format(i), u''] for i in range(200)],
+            [result.stdout for result in results]
+        )
+        self.assertLessEqual(self.handler.max_running, 40)
+        self.assertEqual(4, self.pool.stats()['connections'])
+
+    def test_connection_error(self):
+        """Check a failed connection is not kept on the pool"""
+        with mock.patch('robottelo.async_ssh.settings') as settings:
+            settings.server.ssh_port = 1
+            with self.assertRaises(OSError):
+                self.run_command(u'ls', hostname='127.0.0.1')
+        self.assertEqual(
+            {'connections': 0, 'sessions': 0}, self.pool.stats())
+
+    def test_register_activation_key_workload(self):
+        """Check the register workload timings layout"""
+        with mock.patch.object(async_ssh, 'connection_pool', self.pool):
+            time_result_dict = self.loop.run_until_complete(
+                async_candlepin.register_activation_key(
+                    'ak', 'org', [self.server.hostname] * 3, 2))
+        self.assertEqual(
+            {'thread-0': [1.5, 1.5], 'thread-1': [1.5, 1.5],
+             'thread-2': [1.5, 1.5]},
+            time_result_dict
+        )
+
+    def test_register_attach_workload(self):
+        """Check the register and attach workload timings layout"""
+        with mock.patch.object(async_ssh, 'connection_pool', self.pool):
+            register, attach = self.loop.run_until_complete(
+                async_candlepin.register_attach(
+                    'sub', 'org', 'env', [self.server.hostname] * 2, 1))
+        self.assertEqual({'thread-0': [1.5], 'thread-1': [1.5]}, register)
+        self.assertEqual({'thread-0': [1.5], 'thread-1': [1.5]}, attach)
+
+    def test_delete_workload(self):
+        """Check the delete workload skips empty uuids"""
+        with mock.patch.object(
+                async_candlepin.Candlepin, 'single_delete',
+                return_value=0.5) as single_delete:
+            time_result_dict = self.loop.run_until_complete(
+                async_candlepin.delete([['a', ''], ['b', 'c']]))
+        self.assertEqual(
+            {'thread-0': [0.5], 'thread-1': [0.5, 0.5]}, time_result_dict)
+        self.assertEqual(3, single_delete.call_count)
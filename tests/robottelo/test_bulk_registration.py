@@ -0,0 +1,164 @@
+"""Tests for :mod:`robottelo.system_facts` and
+:mod:`robottelo.performance.registration`.
+"""
+import json
+import requests
+import six
+import unittest2
+
+from robottelo import system_facts
+from robottelo.performance.registration import BulkRegistration
+from robottelo.system_facts import SystemFacts
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class SystemFactsTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.system_facts.SystemFacts`."""
+
+    def test_generate(self):
+        """Check the facts are the template with the system values"""
+        facts = SystemFacts.generate(u'host.example.net')
+        self.assertIs(system_facts.SYSTEM_FACTS, facts.base)
+        self.assertEqual(len(system_facts.SYSTEM_FACTS), len(facts))
+        self.assertEqual(u'host.example.net', facts['network.hostname'])
+        self.assertEqual(u'Seabios', facts['dmi.bios.vendor'])
+        self.assertEqual(facts['dmi.system.uuid'], facts['virt.uuid'])
+        self.assertNotIn(None, facts.values())
+        self.assertIsNone(system_facts.SYSTEM_FACTS['network.hostname'])
+
+    def test_to_json(self):
+        """Check the JSON encoding has all the facts"""
+        facts = SystemFacts({u'network.hostname': u'a', u'extra': u'"b"'})
+        expected = dict(system_facts.SYSTEM_FACTS)
+        expected.update(facts.overlay)
+        self.assertEqual(expected, json.loads(facts.to_json()))
+        self.assertEqual({}, json.loads(SystemFacts({}, {}).to_json()))
+        self.assertEqual(
+            {u'a': u'b'}, json.loads(SystemFacts({u'a': u'b'}, {}).to_json()))
+
+    def test_template_encoding(self):
+        """Check the template encoding is shared by its systems only"""
+        template = system_facts.FactsTemplate({u'a': u'b', u'c': u'd'})
+        first = SystemFacts({u'c': u'e'}, template)
+        second = SystemFacts({u'c': u'f'}, template)
+        self.assertIs(template.facts, first.base)
+        self.assertEqual(
+            {u'a': u'b', u'c': u'f'}, json.loads(second.to_json()))
+        self.assertEqual(
+            {u'a': u'b', u'c': u'e'}, json.loads(first.to_json()))
+        self.assertEqual(1, len(template._encoded))  # noqa
+        # The templates of the collected bases are not reused
+        for index in range(100):
+            base = {u'a': six.text_type(index)}
+            self.assertEqual(
+                base, json.loads(SystemFacts({}, base).to_json()))
+
+    def test_generate_system_facts(self):
+        """Check the generated facts are a dict"""
+        facts = system_facts.generate_system_facts(u'host.example.net')
+        self.assertIsInstance(facts, dict)
+        self.assertEqual(u'host.example.net', facts['uname.nodename'])
+
+
+class BulkRegistrationTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.performance.registration.
+    BulkRegistration`.
+    """
+
+    def setUp(self):
+        patcher = mock.patch('robottelo.performance.registration.settings')
+        settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings.server.get_credentials.return_value = ('admin', 'changeme')
+        self.registration = BulkRegistration(
+            'org', activation_key='ak', workers=4,
+            url='https://satellite.example.com')
+        patcher = mock.patch.object(self.registration.session, 'post')
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        def post(url, params, data, auth):
+            body = json.loads(data.decode('utf-8'))
+            return mock.Mock(
+                status_code=200,
+                json=lambda: {'uuid': u'uuid-' + body['name']},
+            )
+
+        self.post.side_effect = post
+
+    def test_register(self):
+        """Check the consumers are registered with their facts"""
+        uuids = self.registration.register(10, prefix=u'host')
+        self.assertEqual(
+            [u'uuid-host-{0}.example.net'.format(i) for i in range(10)],
+            uuids
+        )
+        _, kwargs = self.post.call_args
+        self.assertEqual({'owner': 'org', 'activation_keys': 'ak'},
+                         kwargs['params'])
+        self.assertIsNone(kwargs['auth'])
+        body = json.loads(kwargs['data'].decode('utf-8'))
+        self.assertEqual(u'system', body['type'])
+        self.assertEqual(body['name'], body['facts']['network.hostname'])
+        self.assertEqual(
+            len(system_facts.SYSTEM_FACTS), len(body['facts']))
+        stats = self.registration.stats()
+        self.assertEqual(['register'], list(stats))
+        self.assertEqual(10, stats['register']['requests'])
+        self.assertEqual(0, stats['register']['failed'])
+        self.assertEqual(10, stats['register']['count'])
+        self.assertIsNotNone(stats['register']['p99'])
+        self.assertEqual(10, self.registration.histogram().count)
+
+    def test_register_errors(self):
+        """Check the failed registrations are recorded"""
+        self.post.side_effect = [
+            requests.ConnectionError(),
+            mock.Mock(status_code=500, content=b'error'),
+        ]
+        self.registration.workers = 1
+        self.assertEqual([None, None], self.registration.register(2))
+        stats = self.registration.stats()['register']
+        self.assertEqual(2, stats['requests'])
+        self.assertEqual(2, stats['failed'])
+        self.assertEqual(0, stats['count'])
+        self.assertIsNone(stats['mean'])
+        self.assertEqual(0, self.registration.histogram().count)
+
+    def test_unregister(self):
+        """Check the consumers are deleted with the admin credentials"""
+        with mock.patch.object(self.registration.session, 'delete') as delete:
+            delete.return_value = mock.Mock(status_code=204)
+            self.assertEqual(
+                2, self.registration.unregister([u'a', None, u'b']))
+        delete.assert_any_call(
+            'https://satellite.example.com/rhsm/consumers/a',
+            auth=('admin', 'changeme'))
+
+    def test_histogram(self):
+        """Check the latencies of the successful requests are recorded by
+        operation
+        """
+        with mock.patch('robottelo.performance.registration.time') as time:
+            for operation, latency, status in (
+                    ('register', 0.01, 200),
+                    ('register', 0.3, 200),
+                    ('register', 60, 200),
+                    ('register', 0.3, 500),
+                    ('unregister', 0.3, 204)):
+                time.time.return_value = 100 + latency
+                self.registration._record(operation, 100, status)
+        histogram = self.registration.histogram()
+        self.assertEqual(3, histogram.count)
+        self.assertAlmostEqual(0.01, histogram.min)
+        self.assertAlmostEqual(60, histogram.max)
+        self.assertEqual(1, self.registration.histogram('unregister').count)
+        self.assertEqual(0, self.registration.histogram('other').count)
+        stats = self.registration.stats()
+        self.assertEqual(4, stats['register']['requests'])
+        self.assertEqual(1, stats['register']['failed'])
+        self.assertEqual(1, stats['unregister']['requests'])
@@ -0,0 +1,160 @@
+"""Tests for module ``robottelo.cleanup``."""
+import six
+import unittest2
+
+from nailgun import entities
+from nailgun.config import ServerConfig
+from robottelo.cleanup import EntitiesCleaner, _deletion_levels
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+SERVER_CONFIG = ServerConfig('http://example.com')
+
+
+def _entity(entity_class, entity_id, **kwargs):
+    """Return a nailgun entity with mocked ``delete`` and ``update``."""
+    entity = entity_class(SERVER_CONFIG, id=entity_id, **kwargs)
+    entity.delete = mock.Mock(return_value=None)
+    entity.update = mock.Mock()
+    return entity
+
+
+def _task(task_id, state='stopped', result='success'):
+    """Return a foreman task JSON."""
+    return {'id': task_id, 'state': state, 'result': result}
+
+
+class DeletionLevelsTestCase(unittest2.TestCase):
+    """Tests for the deletion order"""
+
+    def test_referencing_types_first(self):
+        """Check types are deleted before the types they reference"""
+        self.assertEqual(
+            [['Host'], ['HostGroup'], ['Organization']],
+            _deletion_levels({
+                'Organization': _entity(entities.Organization, 1),
+                'HostGroup': _entity(entities.HostGroup, 1),
+                'Host': _entity(entities.Host, 1),
+            })
+        )
+
+    def test_unrelated_types_together(self):
+        """Check unrelated types are deleted at the same time"""
+        self.assertEqual(
+            [['Domain', 'Product'], ['Organization']],
+            _deletion_levels({
+                'Organization': _entity(entities.Organization, 1),
+                'Domain': _entity(entities.Domain, 1),
+                'Product': _entity(entities.Product, 1),
+            })
+        )
+
+
+@mock.patch('robottelo.cleanup.entities.Host.search')
+class EntitiesCleanerTestCase(unittest2.TestCase):
+    """Tests for the EntitiesCleaner class"""
+
+    def setUp(self):
+        self.cleaner = EntitiesCleaner(workers=4, poll_rate=0)
+
+    def test_organizations_with_hosts_skipped(self, search):
+        """Check the organizations with hosts are skipped and the other ones
+        deleted, with a single hosts search
+        """
+        orgs = [_entity(entities.Organization, i) for i in range(1, 5)]
+        search.return_value = [
+            entities.Host(SERVER_CONFIG, id=10, organization=2)]
+        self.cleaner.delete_entities(orgs)
+        search.assert_called_once_with(query={
+            'search': 'organization_id ^ (1,2,3,4)', 'per_page': 10000})
+        self.assertEqual(
+            [True, False, True, True], [org.delete.called for org in orgs])
+        self.assertEqual({1, 3, 4}, self.cleaner.deleted_entities[
+            'Organization'])
+        self.assertEqual(3, self.cleaner.stats['Organization']['deleted'])
+
+    def test_deleted_entities_skipped(self, search):
+        """Check entities are deleted once"""
+        search.return_value = []
+        org = _entity(entities.Organization, 1)
+        self.cleaner.delete_entities([org, org])
+        self.cleaner.delete_entities([org])
+        org.delete.assert_called_once_with()
+
+    def test_delete_failure(self, search):
+        """Check a failed deletion does not stop the others"""
+        search.return_value = []
+        orgs = [_entity(entities.Organization, i) for i in range(1, 3)]
+        orgs[0].delete.side_effect = ValueError
+        self.cleaner.delete_entities(orgs)
+        orgs[1].delete.assert_called_once_with()
+        self.assertEqual(
+            {'deleted': 1, 'updated': 0, 'failed': 1},
+            dict((key, value) for key, value
+                 in self.cleaner.stats['Organization'].items()
+                 if key != 'seconds')
+        )
+
+    @mock.patch('robottelo.cleanup.entities.ForemanTask.read_json')
+    def test_tasks_polled(self, read_json, search):
+        """Check the deletion tasks are polled until they finish"""
+        search.return_value = []
+        orgs = [_entity(entities.Organization, i) for i in range(1, 4)]
+        orgs[0].delete.return_value = _task('a', 'running', 'pending')
+        orgs[1].delete.return_value = _task('b', 'running', 'pending')
+        orgs[2].delete.return_value = _task('c')
+        read_json.side_effect = [
+            _task('a', 'running', 'pending'),
+            _task('b', 'stopped', 'error'),
+            _task('a'),
+        ]
+        self.cleaner.delete_entities(orgs, synchronous=False)
+        orgs[0].delete.assert_called_once_with(synchronous=False)
+        self.assertEqual(3, read_json.call_count)
+        self.assertEqual({1, 3}, self.cleaner.deleted_entities[
+            'Organization'])
+        self.assertEqual(1, self.cleaner.stats['Organization']['failed'])
+
+    @mock.patch('robottelo.cleanup.entities.ForemanTask.read_json')
+    def test_task_timeout(self, read_json, search):
+        """Check a task taking too long is given up"""
+        search.return_value = []
+        self.cleaner.task_timeout = 0
+        org = _entity(entities.Organization, 1)
+        org.delete.return_value = _task('a', 'running', 'pending')
+        read_json.return_value = _task('a', 'running', 'pending')
+        self.cleaner.delete_entities([org])
+        self.assertEqual(1, self.cleaner.stats['Organization']['failed'])
+        self.assertFalse(self.cleaner.deleted_entities['Organization'])
+
+    def test_update_entities(self, search):
+        """Check the entities fields are updated"""
+        hosts = [_entity(entities.Host, i) for i in range(1, 4)]
+        hosts[0].update.side_effect = ValueError
+        self.cleaner.update_entities(hosts, managed=False)
+        for host in hosts:
+            self.assertFalse(host.managed)
+            host.update.assert_called_once_with(fields=['managed'])
+        self.assertEqual(2, self.cleaner.stats['Host']['updated'])
+        self.assertEqual(1, self.cleaner.stats['Host']['failed'])
+
+    @mock.patch('nailgun.entity_mixins.config.ServerConfig.get',
+                return_value=SERVER_CONFIG)
+    def test_clean(self, get_config, search):
+        """Check clean updates hosts and deletes in relationship order"""
+        search.return_value = []
+        calls = []
+        host = _entity(entities.Host, 1)
+        org = _entity(entities.Organization, 2)
+        domain = _entity(entities.Domain, 3)
+        org.delete.side_effect = lambda **kwargs: calls.append('org')
+        domain.delete.side_effect = lambda **kwargs: calls.append('domain')
+        for entity in (host, org, domain):
+            self.cleaner.register_entity_for_cleanup(None, entity)
+        self.cleaner.clean()
+        self.assertEqual(1, host.organization.id)
+        self.assertFalse(host.delete.called)
+        self.assertEqual(['domain', 'org'], calls)
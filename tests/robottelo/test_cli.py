@@ -1,14 +1,28 @@
+import re
 import six
+import threading
 import unittest2
 
 from functools import partial
+from robottelo import ssh
 from robottelo.cli.base import (
     Base,
     CLIReturnCodeError,
     CLIError,
     CLIBaseError,
-    CLIDataBaseError
+    CLIDataBaseError,
+    CommandInvocation,
+    HammerCommand,
+    ResponseCache,
 )
+from robottelo.cli.host import Host
+from robottelo.cli.org import Org
+from robottelo.cli.package import Package
+from robottelo.cli.product import Product
+from robottelo.cli.puppetmodule import PuppetModule
+from robottelo.cli.repository import Repository
+from robottelo.cli.task import Task
+from robottelo.fake_ssh import FakeSSHServer
 
 if six.PY2:
     import mock
@@ -28,13 +42,12 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_construct_command(self):
         """_construct_command builds a command using flags and arguments"""
         Base.command_base = 'basecommand'
-        Base.command_sub = 'subcommand'
         command_parts = Base._construct_command({
             u'flag-one': True,
             u'flag-two': False,
             u'argument': u'value',
             u'ommited-arg': None,
-        }).split()
+        }, 'subcommand').split()
 
         self.assertIn(u'basecommand', command_parts)
         self.assertIn(u'subcommand', command_parts)
@@ -43,6 +56,43 @@ class BaseCliTestCase(unittest2.TestCase):
         self.assertNotIn(u'--flag-two', command_parts)
         self.assertEqual(len(command_parts), 4)
 
+    def test_construct_command_with_list_value(self):
+        """_construct_command joins list values"""
+        Base.command_base = 'basecommand'
+        self.assertEqual(
+            u'basecommand subcommand --ids="1,2"',
+            Base._construct_command({u'ids': [1, 2]}, 'subcommand')
+        )
+
+    def test_construct_command_template_cache(self):
+        """_construct_command compiles the template once per command,
+        subcommand and option keys
+        """
+        Base.command_base = 'basecommand'
+        Base._command_templates.clear()
+        Base._construct_command({u'name': u'foo'}, 'create')
+        self.assertEqual(
+            u'basecommand create --name="bar"',
+            Base._construct_command({u'name': u'bar'}, 'create')
+        )
+        self.assertEqual(1, len(Base._command_templates))
+        self.assertEqual(
+            u'basecommand update --name="bar"',
+            Base._construct_command({u'name': u'bar'}, 'update')
+        )
+        Base._construct_command({u'id': 1}, 'update')
+        self.assertEqual(3, len(Base._command_templates))
+
+    def test_handle_response_error_message(self):
+        """Check the error message reports the command and subcommand
+        without the options
+        """
+        response = mock.Mock(return_code=1, stderr=u'some error')
+        with self.assertRaises(CLIReturnCodeError) as context:
+            Base._handle_response(
+                response, command=u'host create --name="foo"')
+        self.assertIn(u'Command "host create" finished', context.exception.msg)
+
     def test_username_password_parameters_lookup(self):
         """Username and password returned are the parameters"""
         username, password = CLIClass._get_username_password('auser', 'apass')
@@ -156,14 +206,13 @@ class BaseCliTestCase(unittest2.TestCase):
     @mock.patch('robottelo.cli.base.Base.execute')
     @mock.patch('robottelo.cli.base.Base._construct_command')
     def test_add_operating_system(self, construct, execute):
-        """Check command_sub edited when executing add_operating_system"""
+        """Check command_sub passed when executing add_operating_system"""
         options = {u'foo': u'bar'}
-        self.assertNotEqual('add-operatingsystem', Base.command_sub)
         self.assertEqual(
             execute.return_value,
             Base.add_operating_system(options)
         )
-        self.assertEqual('add-operatingsystem', Base.command_sub)
+        self.assertEqual('add-operatingsystem', construct.call_args[0][1])
         construct.called_once_with(options)
         execute.called_once_with(construct.return_value)
 
@@ -176,7 +225,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create()
         )
-        self.assertEqual('create', Base.command_sub)
+        self.assertEqual('create', construct.call_args[0][1])
         construct.called_once_with({})
         execute.called_once_with(construct.return_value, output_format='csv')
 
@@ -191,7 +240,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create()
         )
-        self.assertEqual('create', Base.command_sub)
+        self.assertEqual('create', construct.call_args[0][1])
         construct.called_once_with({})
         execute.called_once_with(construct.return_value, output_format='csv')
         self.assertFalse(info.called)
@@ -210,7 +259,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create()
         )
-        self.assertEqual('create', Base.command_sub)
+        self.assertEqual('create', construct.call_args[0][1])
         construct.called_once_with({})
         execute.called_once_with(construct.return_value, output_format='csv')
         info.called_once_with({'id': 'foo'})
@@ -229,7 +278,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             Base.create({'organization-id': 'org-id'})
         )
-        self.assertEqual('create', Base.command_sub)
+        self.assertEqual('create', construct.call_args[0][1])
         construct.called_once_with({})
         execute.called_once_with(construct.return_value, output_format='csv')
         info.called_once_with({'id': 'foo', 'organization-id': 'org-id'})
@@ -246,7 +295,7 @@ class BaseCliTestCase(unittest2.TestCase):
         ]
         Base.command_requires_org = True
         self.assertRaises(CLIError, Base.create)
-        self.assertEqual('create', Base.command_sub)
+        self.assertEqual('create', construct.call_args[0][1])
         construct.called_once_with({})
         execute.called_once_with(construct.return_value, output_format='csv')
 
@@ -258,7 +307,7 @@ class BaseCliTestCase(unittest2.TestCase):
             execute.return_value,
             base_method(**base_method_kwargs)
         )
-        self.assertEqual(cmd_sub, Base.command_sub)
+        self.assertEqual(cmd_sub, construct.call_args[0][1])
         construct.called_once_with({})
         execute.called_once_with(
             construct.return_value, ignore_stderr=ignore_stderr
@@ -289,6 +338,8 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_execute_with_raw_response(self, settings, command):
         """Check excuted build ssh method and returns raw response"""
         settings.locale = 'en_US'
+        settings.hammer_cache = False
+        settings.hammer_session = False
         settings.performance = False
         settings.server.admin_username = 'admin'
         settings.server.admin_password = 'password'
@@ -307,6 +358,8 @@ class BaseCliTestCase(unittest2.TestCase):
     def test_execute_with_performance(self, settings, command, handle_resp):
         """Check excuted build ssh method and delegate response handling"""
         settings.locale = 'en_US'
+        settings.hammer_cache = False
+        settings.hammer_session = False
         settings.performance.timer_hammer = True
         settings.server.admin_username = 'admin'
         settings.server.admin_password = 'password'
@@ -322,20 +375,70 @@ class BaseCliTestCase(unittest2.TestCase):
         )
         handle_resp.assert_called_once_with(
             command.return_value,
-            ignore_stderr=None
+            ignore_stderr=None,
+            command='some_cmd',
         )
         self.assertIs(response, handle_resp.return_value)
 
+    @mock.patch('robottelo.cli.base.ssh.hammer_command')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_execute_with_hammer_session(
+            self, settings, command, hammer_command):
+        """Check execute runs the command on a hammer session when enabled"""
+        settings.locale = 'en_US'
+        settings.hammer_cache = False
+        settings.hammer_session = True
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        response = Base.execute(
+            u'some_cmd --name="a \\"b\\"" --id=1', output_format='csv',
+            return_raw_response=True)
+        hammer_command.assert_called_once_with(
+            [u'-v', u'-u', u'admin', u'-p', u'password', u'--output=csv',
+             u'some_cmd', u'--name=a "b"', u'--id=1'],
+            output_format='csv',
+            timeout=None
+        )
+        self.assertFalse(command.called)
+        self.assertIs(response, hammer_command.return_value)
+
+    @mock.patch('robottelo.cli.base.ssh.hammer_command')
+    @mock.patch('robottelo.cli.base.ssh.command')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_execute_timed_without_hammer_session(
+            self, settings, command, hammer_command):
+        """Check timed hammer commands start a new hammer process"""
+        settings.locale = 'en_US'
+        settings.hammer_cache = False
+        settings.hammer_session = True
+        settings.performance.time_hammer = True
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        Base.execute('some_cmd', return_raw_response=True)
+        self.assertFalse(hammer_command.called)
+        command.assert_called_once_with(
+            u'LANG=en_US time -p hammer -v -u admin -p password  some_cmd'
+            .encode('utf-8'),
+            output_format=None,
+            timeout=None
+        )
+
+    @mock.patch('robottelo.cli.base.Base._stream_lists',
+                return_value=False)
     @mock.patch('robottelo.cli.base.Base.list')
-    def test_exists_without_option_and_empty_return(self, lst_method):
+    def test_exists_without_option_and_empty_return(self, lst_method, _):
         """Check exists method without options and empty return"""
         lst_method.return_value = []
         response = Base.exists(search=['id', 1])
         lst_method.assert_called_once_with({u'search': u'id=\\"1\\"'})
         self.assertEqual([], response)
 
+    @mock.patch('robottelo.cli.base.Base._stream_lists',
+                return_value=False)
     @mock.patch('robottelo.cli.base.Base.list')
-    def test_exists_with_option_and_no_empty_return(self, lst_method):
+    def test_exists_with_option_and_no_empty_return(self, lst_method, _):
         """Check exists method with options and no empty return"""
         lst_method.return_value = [1, 2]
         my_options = {u'search': u'foo=bar'}
@@ -343,6 +446,182 @@ class BaseCliTestCase(unittest2.TestCase):
         lst_method.assert_called_once_with(my_options)
         self.assertEqual(1, response)
 
+    @mock.patch('robottelo.cli.base.ssh.command_stream')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_exists_stops_reading(self, settings, command_stream):
+        """Check exists streams the list and stops after the first row"""
+        settings.hammer_cache = False
+        settings.hammer_session = False
+        settings.locale = 'en_US'
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        read = []
+
+        def lines():
+            """Yield the csv lines, recording the ones read."""
+            for line in (u'Id,Name', u'1,foo', u'2,bar', u'3,baz'):
+                read.append(line)
+                yield line
+
+        stream = command_stream.return_value
+        stream.__iter__ = lambda self: lines()
+        self.assertEqual(
+            {u'id': u'1', u'name': u'foo'},
+            Base.exists(search=['name', 'foo'])
+        )
+        self.assertEqual([u'Id,Name', u'1,foo'], read)
+        stream.close.assert_called_once_with()
+        self.assertIn(
+            u'--per-page="10000"',
+            command_stream.call_args[0][0].decode('utf-8')
+        )
+
+    @mock.patch('robottelo.cli.base.ssh.command_stream')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_list_streamed(self, settings, command_stream):
+        """Check list parses the streamed rows when the hammer session and
+        cache are disabled
+        """
+        settings.hammer_cache = False
+        settings.hammer_session = False
+        settings.locale = 'en_US'
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        stream = command_stream.return_value
+        stream.__iter__ = lambda self: iter([u'Id,Name', u'1,foo', u'2,bar'])
+        stream.return_code = 0
+        stream.stderr = u''
+        self.assertEqual(
+            [{u'id': u'1', u'name': u'foo'}, {u'id': u'2', u'name': u'bar'}],
+            Base.list()
+        )
+        settings.hammer_cache = True
+        self.assertTrue(Base._stream_lists(cache=False))
+        self.assertFalse(Base._stream_lists())
+
+    @mock.patch('robottelo.cli.base.ssh.command_stream')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_execute_stream(self, settings, command_stream):
+        """Check execute_stream yields csv rows and verifies the response"""
+        settings.locale = 'en_US'
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'password'
+        stream = command_stream.return_value
+        stream.__iter__ = lambda self: iter([u'Id,Name', u'1,foo', u'2,bar'])
+        stream.return_code = 0
+        stream.stderr = u''
+        rows = Base.execute_stream('some_cmd')
+        self.assertEqual(next(rows), {u'id': u'1', u'name': u'foo'})
+        ssh_cmd = u'LANG=en_US  hammer -v -u admin -p password --output=csv'
+        command_stream.assert_called_once_with(
+            (ssh_cmd + u' some_cmd').encode('utf-8'), timeout=None)
+        self.assertEqual(list(rows), [{u'id': u'2', u'name': u'bar'}])
+        stream.close.assert_called_once_with()
+
+    @mock.patch('robottelo.cli.base.ssh.command_stream')
+    @mock.patch('robottelo.cli.base.settings')
+    def test_execute_stream_error(self, settings, command_stream):
+        """Check execute_stream raises once the command fails"""
+        settings.performance = False
+        stream = command_stream.return_value
+        stream.__iter__ = lambda self: iter([])
+        stream.return_code = 1
+        stream.stderr = u'some error'
+        with self.assertRaises(CLIReturnCodeError):
+            list(Base.execute_stream('some_cmd'))
+
+    @mock.patch('robottelo.cli.base.Base.execute_stream')
+    @mock.patch('robottelo.cli.base.Base._construct_command')
+    def test_iter_list_with_default_per_page(self, construct, execute_stream):
+        """Check iter_list streams the list command with per_page"""
+        Base.command_requires_org = False
+        self.assertEqual(execute_stream.return_value, Base.iter_list())
+        construct.assert_called_once_with({u'per-page': 10000}, 'list')
+        execute_stream.assert_called_once_with(construct.return_value)
+
+    def _paged_list(self, execute, construct, total):
+        """Make ``execute`` return the list page requested on the command
+        built by ``construct`` for ``total`` entities.
+        """
+        Base.command_requires_org = False
+        construct.side_effect = lambda options, command_sub: dict(options)
+
+        def page(command, output_format):
+            start = (command['page'] - 1) * command['per-page']
+            end = min(start + command['per-page'], total)
+            return [{'id': index} for index in range(start, end)]
+        execute.side_effect = page
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    @mock.patch('robottelo.cli.base.Base._construct_command')
+    def test_iter_list_with_page_size(self, construct, execute):
+        """Check iter_list walks the pages until a short page is received"""
+        self._paged_list(execute, construct, 7)
+        results = Base.iter_list({u'search': 'name=foo'}, page_size=3)
+        execute.assert_not_called()
+        self.assertEqual(
+            [{'id': index} for index in range(7)], list(results))
+        self.assertEqual(
+            [mock.call({u'search': 'name=foo', u'page': page,
+                        u'per-page': 3}, output_format='csv')
+             for page in (1, 2, 3)],
+            execute.call_args_list
+        )
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    @mock.patch('robottelo.cli.base.Base._construct_command')
+    def test_iter_list_with_page_size_stops_early(self, construct, execute):
+        """Check iter_list does not fetch pages which are not consumed"""
+        self._paged_list(execute, construct, 100)
+        results = Base.iter_list(page_size=10)
+        self.assertEqual({'id': 0}, next(results))
+        results.close()
+        self.assertEqual(1, execute.call_count)
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    @mock.patch('robottelo.cli.base.Base._construct_command')
+    def test_iter_list_with_prefetch(self, construct, execute):
+        """Check iter_list fetches the next page while the current page is
+        consumed.
+        """
+        self._paged_list(execute, construct, 6)
+        results = Base.iter_list(page_size=3, prefetch=True)
+        self.assertEqual({'id': 0}, next(results))
+        # built on the calling thread before the current page is yielded
+        self.assertEqual(2, construct.call_count)
+        self.assertEqual(
+            [{'id': index} for index in range(1, 6)], list(results))
+        self.assertEqual(3, execute.call_count)
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    @mock.patch('robottelo.cli.base.Base._construct_command')
+    def test_iter_list_with_prefetch_error(self, construct, execute):
+        """Check iter_list re-raises the prefetch errors"""
+        Base.command_requires_org = False
+        execute.side_effect = CLIReturnCodeError(1, u'error', u'msg')
+        with self.assertRaises(CLIReturnCodeError):
+            list(Base.iter_list(page_size=3, prefetch=True))
+
+    @mock.patch('robottelo.cli.base.Base.command_requires_org')
+    def test_iter_list_with_page_size_requires_organization_id(self, _):
+        """Check iter_list with page_size requires organization-id"""
+        Base.command_requires_org = True
+        with self.assertRaises(CLIError):
+            Base.iter_list(page_size=3)
+
+    @mock.patch('robottelo.cli.base.Base.execute')
+    @mock.patch('robottelo.cli.base.Base._construct_command')
+    def test_count(self, construct, execute):
+        """Check count probes the number of entities"""
+        for total in (0, 1, 9, 10, 11, 29, 30, 31, 70, 81, 160):
+            self._paged_list(execute, construct, total)
+            execute.reset_mock()
+            self.assertEqual(total, Base.count(page_size=10))
+            self.assertLessEqual(execute.call_count, 10)
+
     @mock.patch('robottelo.cli.base.Base.command_requires_org')
     def test_info_requires_organization_id(self, _):
         """Check info raises CLIError with organization-id is not present in
@@ -387,21 +666,25 @@ class BaseCliTestCase(unittest2.TestCase):
         """
         self.assertRaises(CLIError, Base.list)
 
+    @mock.patch('robottelo.cli.base.Base._stream_lists',
+                return_value=False)
     @mock.patch('robottelo.cli.base.Base.execute')
     @mock.patch('robottelo.cli.base.Base._construct_command')
-    def test_list_with_default_per_page(self, construct, execute):
+    def test_list_with_default_per_page(self, construct, execute, _):
         """Check list method set per_page as 1000 by default"""
         self.assertEquals(
             execute.return_value,
             Base.list(options={'organization-id': 1})
         )
-        self.assertEqual('list', Base.command_sub)
+        self.assertEqual('list', construct.call_args[0][1])
         construct.called_once_with({'per-page': 1000})
         execute.called_once_with(construct.return_value, output_format='csv')
 
+    @mock.patch('robottelo.cli.base.Base._stream_lists',
+                return_value=False)
     @mock.patch('robottelo.cli.base.Base.execute')
     @mock.patch('robottelo.cli.base.Base._construct_command')
-    def test_list_without_per_page(self, construct, execute):
+    def test_list_without_per_page(self, construct, execute, _):
         """Check list with per_page set as false"""
         list_with_per_page_false = partial(
             Base.list,
@@ -471,6 +754,331 @@ class BaseCliTestCase(unittest2.TestCase):
         )
 
 
+class CommandInvocationTestCase(unittest2.TestCase):
+    """Tests for the CommandInvocation class"""
+
+    def test_construct_command_parts(self):
+        """Check the built command keeps its parts"""
+        command = Host._construct_command({u'id': 1}, 'info')
+        self.assertIsInstance(command, HammerCommand)
+        self.assertEqual(u'host info --id="1"', command)
+        self.assertEqual('host', command.command_base)
+        self.assertEqual('info', command.command_sub)
+        self.assertEqual({u'id': 1}, command.options)
+
+    def test_invocation_from_built_command(self):
+        """Check the invocation carries the command parts and credentials"""
+        invocation = CommandInvocation(
+            Host,
+            Host._construct_command({u'id': 1}, 'info'),
+            user='foo',
+            password='bar',
+            output_format='json',
+        )
+        self.assertEqual('host', invocation.command_base)
+        self.assertEqual('info', invocation.command_sub)
+        self.assertEqual({u'id': 1}, invocation.options)
+        self.assertEqual(u'host info', invocation.name)
+        self.assertEqual('foo', invocation.user)
+        self.assertEqual('bar', invocation.password)
+        self.assertEqual('json', invocation.output_format)
+
+    def test_invocation_from_plain_command(self):
+        """Check the invocation of a command string"""
+        invocation = CommandInvocation(
+            Host.with_user('foo', 'bar'), u'host info --id="1"')
+        self.assertIsNone(invocation.command_sub)
+        self.assertEqual(u'host info', invocation.name)
+        self.assertEqual('foo', invocation.user)
+        self.assertEqual('bar', invocation.password)
+
+
+def _hammer_handler(command):
+    """Answer a hammer command with its subcommand and the value of its
+    ``name``, ``id`` or ``search`` option on the requested output format.
+    """
+    match = re.match(
+        r'.*hammer -v -u \S+ -p \S+ +(?:--output=(\w+))? *(.*)$', command)
+    output_format, command = match.groups()
+    name = command.split(u' --', 1)[0].strip()
+    value = re.search(r'--(?:name|id|search)="([^"]*)"', command).group(1)
+    if output_format == 'csv':
+        return u'Command,Value\n{0},{1}\n'.format(name, value), u'', 0
+    if output_format is None and name.endswith(u'info'):
+        return u'Command: {0}\nValue: {1}\n'.format(name, value), u'', 0
+    return u'{0} {1}\n'.format(name, value), u'', 0
+
+
+class ConcurrentCLITestCase(unittest2.TestCase):
+    """Run many concurrent CLI calls against a local SSH server"""
+
+    threads = 20
+    calls = 100
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeSSHServer(_hammer_handler)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        settings = mock.MagicMock()
+        settings.hammer_cache = False
+        settings.hammer_session = False
+        settings.locale = 'en_US'
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'changeme'
+        settings.server.hostname = self.server.hostname
+        settings.server.ssh_port = self.server.port
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'password'
+        settings.server.ssh_username = 'root'
+        for target in ('robottelo.cli.base.settings',
+                       'robottelo.ssh.settings'):
+            patcher = mock.patch(target, settings)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        pool = ssh.SSHConnectionPool()
+        patcher = mock.patch('robottelo.ssh.connection_pool', pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pool.close_all)
+
+    def test_mixed_concurrent_calls(self):
+        """Each concurrent call on the same CLI classes sends its own
+        subcommand and options and receives its own response
+        """
+        calls = (
+            (Host.list, 'search',
+             lambda value: [{u'command': u'host list', u'value': value}]),
+            (Host.info, 'id',
+             lambda value: {u'command': u'host info', u'value': value}),
+            (Host.delete, 'id',
+             lambda value: [u'host delete {0}'.format(value), u'']),
+            (Org.list, 'search',
+             lambda value: [
+                 {u'command': u'organization list', u'value': value}]),
+            (Org.info, 'id',
+             lambda value: {
+                 u'command': u'organization info', u'value': value}),
+            (Org.add_domain, 'name',
+             lambda value: [
+                 u'organization add-domain {0}'.format(value), u'']),
+        )
+        mismatches = []
+        errors = []
+
+        def worker(index):
+            try:
+                for call in range(self.calls):
+                    method, option, expected = calls[
+                        (index + call) % len(calls)]
+                    value = u'{0}-{1}'.format(index, call)
+                    result = method({option: value})
+                    if result != expected(value):
+                        mismatches.append((expected(value), result))
+            except Exception as err:
+                errors.append(err)
+
+        threads = [
+            threading.Thread(target=worker, args=(index,))
+            for index in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual([], mismatches)
+        self.assertEqual(self.threads * self.calls, self.server.commands)
+
+
+class ResponseCacheTestCase(unittest2.TestCase):
+    """Tests for the ResponseCache class"""
+
+    def setUp(self):
+        self.cache = ResponseCache(max_size=2)
+
+    def test_get_put(self):
+        """Check cached values are copies and the hits are counted"""
+        found, value, generation = self.cache.get('key')
+        self.assertFalse(found)
+        response = [{'id': '1'}]
+        self.cache.put('key', 'host', response, 60, generation)
+        response[0]['id'] = '2'
+        found, value, _ = self.cache.get('key')
+        self.assertTrue(found)
+        self.assertEqual([{'id': '1'}], value)
+        value[0]['id'] = '3'
+        self.assertEqual([{'id': '1'}], self.cache.get('key')[1])
+        self.assertEqual(
+            {'hits': 2, 'misses': 1, 'evictions': 0, 'invalidations': 0,
+             'entries': 1},
+            self.cache.stats()
+        )
+
+    @mock.patch('robottelo.cli.base.time.time')
+    def test_ttl(self, time):
+        """Check the entries expire after their ttl"""
+        time.return_value = 100
+        self.cache.put('key', 'host', 'value', 60, 0)
+        time.return_value = 159
+        self.assertTrue(self.cache.get('key')[0])
+        time.return_value = 160
+        self.assertFalse(self.cache.get('key')[0])
+
+    def test_lru_eviction(self):
+        """Check the least recently used entry is evicted"""
+        self.cache.put('first', 'host', 1, 60, 0)
+        self.cache.put('second', 'host', 2, 60, 0)
+        self.cache.get('first')
+        self.cache.put('third', 'host', 3, 60, 0)
+        self.assertTrue(self.cache.get('first')[0])
+        self.assertFalse(self.cache.get('second')[0])
+        self.assertTrue(self.cache.get('third')[0])
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def test_invalidate(self):
+        """Check only the entries of the command bases are invalidated"""
+        self.cache.put('host', 'host', 1, 60, 0)
+        self.cache.put('org', 'organization', 2, 60, 0)
+        self.cache.invalidate(('host', 'product'))
+        self.assertFalse(self.cache.get('host')[0])
+        self.assertTrue(self.cache.get('org')[0])
+        self.cache.invalidate(('*',))
+        self.assertFalse(self.cache.get('org')[0])
+        self.assertEqual(2, self.cache.stats()['invalidations'])
+
+    def test_put_after_invalidation(self):
+        """Check a value read before an invalidation is not cached"""
+        _, _, generation = self.cache.get('key')
+        self.cache.invalidate(('product',))
+        self.cache.put('key', 'host', 1, 60, generation)
+        self.assertFalse(self.cache.get('key')[0])
+
+
+class CachedCLITestCase(unittest2.TestCase):
+    """Run cached CLI calls against a local SSH server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeSSHServer(_hammer_handler)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        settings = mock.MagicMock()
+        settings.hammer_cache = True
+        settings.hammer_cache_ttl = 60
+        settings.hammer_session = False
+        settings.locale = 'en_US'
+        settings.performance = False
+        settings.server.admin_username = 'admin'
+        settings.server.admin_password = 'changeme'
+        settings.server.hostname = self.server.hostname
+        settings.server.ssh_port = self.server.port
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'password'
+        settings.server.ssh_username = 'root'
+        for target in ('robottelo.cli.base.settings',
+                       'robottelo.ssh.settings'):
+            patcher = mock.patch(target, settings)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        pool = ssh.SSHConnectionPool()
+        cache = ResponseCache()
+        for target, value in (('robottelo.ssh.connection_pool', pool),
+                              ('robottelo.cli.base.response_cache', cache)):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(pool.close_all)
+        self.cache = cache
+
+    def sent(self, func, *args, **kwargs):
+        """Call ``func`` and return the number of commands it sent."""
+        commands = self.server.commands
+        func(*args, **kwargs)
+        return self.server.commands - commands
+
+    def test_read_only_cached(self):
+        """Check repeated info and list calls are sent once"""
+        self.assertEqual(1, self.sent(Org.info, {'id': 1}))
+        self.assertEqual(0, self.sent(Org.info, {'id': 1}))
+        self.assertEqual(
+            {u'command': u'organization info', u'value': u'1'},
+            Org.info({'id': 1})
+        )
+        self.assertEqual(1, self.sent(Org.info, {'id': 2}))
+        self.assertEqual(1, self.sent(
+            Org.execute, Org._construct_command({'id': 1}, 'info'),
+            output_format='csv'
+        ))
+        self.assertEqual(1, self.sent(Org.list, {'search': 'foo'}))
+        self.assertEqual(0, self.sent(Org.list, {'search': 'foo'}))
+        self.assertEqual(1, self.sent(
+            Org.with_user('foo', 'bar').info, {'id': 1}))
+        self.assertEqual(3, self.cache.stats()['hits'])
+
+    def test_polled_not_cached(self):
+        """Check the polled commands and the calls disabling the cache are
+        always sent
+        """
+        Task.list({'search': 'state=running'})
+        self.assertEqual(
+            1, self.sent(Task.list, {'search': 'state=running'}))
+        Org.info({'id': 1})
+        self.assertEqual(1, self.sent(Org.info, {'id': 1}, cache=False))
+        Org.list({'search': 'foo'})
+        self.assertEqual(
+            1, self.sent(Org.list, {'search': 'foo'}, cache=False))
+
+    def test_raw_response_not_cached(self):
+        """Check raw responses are not served from the cache"""
+        Org.info({'id': 1})
+        self.assertEqual(1, self.sent(
+            Org.execute, Org._construct_command({'id': 1}, 'info'),
+            return_raw_response=True
+        ))
+
+    def test_write_invalidates(self):
+        """Check writes invalidate their command base and the related
+        ones
+        """
+        Product.info({'id': 1, 'organization-id': 1})
+        Host.info({'id': 1})
+        self.assertEqual(1, self.sent(Product.update, {'id': 1}))
+        self.assertEqual(1, self.sent(
+            Product.info, {'id': 1, 'organization-id': 1}))
+        self.assertEqual(0, self.sent(Host.info, {'id': 1}))
+        Repository.synchronize({'id': 1})
+        self.assertEqual(1, self.sent(
+            Product.info, {'id': 1, 'organization-id': 1}))
+        self.assertEqual(0, self.sent(Host.info, {'id': 1}))
+        Org.update({'id': 1})
+        self.assertEqual(1, self.sent(Host.info, {'id': 1}))
+
+    def test_sync_invalidates_content(self):
+        """Check the repository writes invalidate the content lists"""
+        for cli_class in (Package, PuppetModule):
+            cli_class.list({'search': 'repository_id=1'})
+            self.assertEqual(
+                0, self.sent(cli_class.list, {'search': 'repository_id=1'}))
+            Repository.synchronize({'id': 1})
+            self.assertEqual(
+                1, self.sent(cli_class.list, {'search': 'repository_id=1'}))
+            Repository.upload_content({'id': 1, 'path': '/tmp/foo.rpm'})
+            self.assertEqual(
+                1, self.sent(cli_class.list, {'search': 'repository_id=1'}))
+
+
 class CLIErrorTests(unittest2.TestCase):
     """Tests for the CLIError cli class"""
 
@@ -0,0 +1,117 @@
+"""Tests for module ``robottelo.cli.factory``."""
+import threading
+import time
+import unittest2
+
+from robottelo.cli.factory import CLIFactoryError, make_entities
+
+
+class FakeFactory(object):
+    """Fake make function recording calls and concurrency."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def make(self, kind):
+        """Return a make function for the ``kind`` entities."""
+        def make_entity(options=None):
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+                self.calls.append((kind, options))
+                entity_id = str(len(self.calls))
+            time.sleep(self.delay)
+            with self.lock:
+                self.running -= 1
+            if options.get(u'fail'):
+                raise CLIFactoryError(u'Failed to create {0}'.format(kind))
+            entity = {u'id': entity_id, u'kind': kind}
+            entity.update(options)
+            return entity
+        return make_entity
+
+
+class MakeEntitiesTestCase(unittest2.TestCase):
+    """Tests for function ``make_entities``."""
+
+    def setUp(self):
+        self.factory = FakeFactory()
+        self.make_org = self.factory.make('org')
+        self.make_product = self.factory.make('product')
+        self.make_env = self.factory.make('env')
+        self.make_repo = self.factory.make('repo')
+        self.make_cv = self.factory.make('cv')
+
+    def test_references_are_resolved(self):
+        """Options referencing other entities receive their ids"""
+        entities = make_entities({
+            'org': (self.make_org, {}),
+            'product': (self.make_product, {u'organization-id': 'org'}),
+            'repo': (self.make_repo, {
+                u'product-id': 'product', u'name': u'org'}),
+            'cv': (self.make_cv, {
+                u'organization-id': 'org',
+                u'repository-ids': ['repo', 42],
+            }),
+        })
+        self.assertEqual(set(entities), {'org', 'product', 'repo', 'cv'})
+        self.assertEqual(
+            entities['product'][u'organization-id'], entities['org']['id'])
+        self.assertEqual(
+            entities['repo'][u'product-id'], entities['product']['id'])
+        # only -id and -ids options are references
+        self.assertEqual(entities['repo'][u'name'], u'org')
+        self.assertEqual(
+            entities['cv'][u'repository-ids'], [entities['repo']['id'], 42])
+
+    def test_independent_entities_run_concurrently(self):
+        """Entities without dependencies between them are created at the
+        same time and after their dependencies
+        """
+        make_entities({
+            'org': (self.make_org, {}),
+            'env': (self.make_env, {u'organization-id': 'org'}),
+            'product': (self.make_product, {u'organization-id': 'org'}),
+            'cv': (self.make_cv, {u'organization-id': 'org'}),
+        })
+        self.assertEqual(self.factory.calls[0][0], 'org')
+        self.assertEqual(self.factory.max_running, 3)
+
+    def test_workers_limit(self):
+        """No more than ``workers`` entities are created at the same time"""
+        make_entities(
+            {str(i): (self.factory.make(i), {}) for i in range(6)},
+            workers=2
+        )
+        self.assertEqual(len(self.factory.calls), 6)
+        self.assertEqual(self.factory.max_running, 2)
+
+    def test_same_function_runs_concurrently(self):
+        """Entities of the same make function are created at the same time"""
+        make_entities({
+            'product1': (self.make_product, {}),
+            'product2': (self.make_product, {}),
+        })
+        self.assertEqual(self.factory.max_running, 2)
+
+    def test_circular_references(self):
+        """Circular references raise an error before creating anything"""
+        with self.assertRaises(CLIFactoryError):
+            make_entities({
+                'org': (self.make_org, {u'product-id': 'product'}),
+                'product': (self.make_product, {u'organization-id': 'org'}),
+            })
+        self.assertEqual(self.factory.calls, [])
+
+    def test_error_stops_dependents(self):
+        """A failed creation is raised and its dependents are not created"""
+        with self.assertRaises(CLIFactoryError):
+            make_entities({
+                'org': (self.make_org, {u'fail': True}),
+                'product': (self.make_product, {u'organization-id': 'org'}),
+            })
+        self.assertEqual([call[0] for call in self.factory.calls], ['org'])
@@ -0,0 +1,308 @@
+"""Tests for module ``robottelo.entity_pool``."""
+import multiprocessing
+import os
+import shutil
+import six
+import tempfile
+import unittest2
+
+from robottelo.constants import DEFAULT_CV
+from robottelo.entity_pool import (
+    EntityPool,
+    EntityPoolError,
+    reset_org_with_manifest,
+    reset_synced_product,
+)
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class EntityPoolTestCase(unittest2.TestCase):
+    """Tests for the EntityPool class"""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.path = os.path.join(self.tempdir, 'pool.json')
+        self.pool = EntityPool(self.path)
+        self.created = []
+        self.pool.register('org', self.create)
+        self.reset = mock.Mock(return_value=None)
+        self.pool.register('product', self.create, self.reset)
+
+    def create(self, options):
+        """Create a fake entity with a sequential id."""
+        entity = dict(options, id=len(self.created) + 1)
+        self.created.append(entity)
+        return entity
+
+    def test_checkout_creates(self):
+        """Check an empty pool creates the entity"""
+        lease = self.pool.checkout('org', {'name': 'foo'})
+        self.assertEqual({'id': 1, 'name': 'foo'}, lease.entity)
+        self.assertFalse(lease.reused)
+        self.assertEqual(1, self.pool.stats()['misses'])
+
+    def test_checkin_reuses(self):
+        """Check a returned entity is lent again"""
+        lease = self.pool.checkout('org')
+        self.pool.checkin(lease)
+        lease = self.pool.checkout('org')
+        self.assertTrue(lease.reused)
+        self.assertEqual({'id': 1}, lease.entity)
+        self.assertEqual(1, len(self.created))
+        self.assertEqual(1, self.pool.stats()['hits'])
+
+    def test_lent_entity_exclusive(self):
+        """Check a lent entity is not lent again before its return"""
+        first = self.pool.checkout('org')
+        second = self.pool.checkout('org')
+        self.assertNotEqual(first.entity, second.entity)
+
+    def test_specs_are_separated(self):
+        """Check entities are only lent to the same spec"""
+        self.pool.checkin(self.pool.checkout('org', {'name': 'foo'}))
+        lease = self.pool.checkout('org', {'name': 'bar'})
+        self.assertFalse(lease.reused)
+        self.assertEqual({'id': 2, 'name': 'bar'}, lease.entity)
+
+    def test_modified_without_reset_dropped(self):
+        """Check a modified entity is dropped when it can't be reset"""
+        with self.pool.entity('org', modify=True):
+            pass
+        self.assertFalse(self.pool.checkout('org').reused)
+        self.assertEqual(1, self.pool.stats()['drops'])
+
+    def test_modified_reset(self):
+        """Check a modified entity is reset and lent again"""
+        with self.pool.entity('product', modify=True) as entity:
+            pass
+        self.reset.assert_called_once_with(entity)
+        self.assertTrue(self.pool.checkout('product').reused)
+
+    def test_failed_reset_dropped(self):
+        """Check an entity is dropped when its reset fails"""
+        self.reset.side_effect = ValueError
+        with self.pool.entity('product', modify=True):
+            pass
+        self.reset.return_value = False
+        self.reset.side_effect = None
+        with self.pool.entity('product', modify=True):
+            pass
+        self.assertEqual(2, self.pool.stats()['drops'])
+
+    def test_entity_block_error(self):
+        """Check an entity is considered modified when the block raises"""
+        with self.assertRaises(ValueError):
+            with self.pool.entity('org'):
+                raise ValueError
+        self.assertFalse(self.pool.checkout('org').reused)
+
+    def test_shared_registry(self):
+        """Check pools with the same registry share the entities"""
+        self.pool.checkin(self.pool.checkout('org'))
+        other = EntityPool(self.path)
+        other.register('org', self.create)
+        lease = other.checkout('org')
+        self.assertTrue(lease.reused)
+        self.assertEqual({'id': 1}, lease.entity)
+
+    def test_lend(self):
+        """Check an entity is lent until the test cleanups run"""
+        test_case = mock.Mock()
+        self.assertEqual({'id': 1}, self.pool.lend(test_case, 'product'))
+        test_case.addCleanup.assert_called_once_with(
+            self.pool.checkin, mock.ANY, True)
+        self.assertEqual(
+            {'free': 0, 'lent': 1},
+            self.pool.stats()['specs'][EntityPool.key('product')]
+        )
+        func, lease, modified = test_case.addCleanup.call_args[0]
+        func(lease, modified)
+        self.reset.assert_called_once_with({'id': 1})
+        self.assertEqual(
+            {'free': 1, 'lent': 0},
+            self.pool.stats()['specs'][EntityPool.key('product')]
+        )
+
+    def test_fill_and_warm(self):
+        """Check the pool is filled up to the requested size"""
+        self.pool.fill('org', size=2)
+        self.pool.warm('org', size=3).join()
+        self.assertEqual(3, len(self.created))
+        self.assertEqual(
+            {'free': 3, 'lent': 0},
+            self.pool.stats()['specs'][EntityPool.key('org')]
+        )
+
+    def test_fill_counts_pending_creations(self):
+        """Check entities being created by another process count towards the
+        fill size
+        """
+        other = EntityPool(self.path)
+        other.register('org', self.create)
+
+        def create(options):
+            """Fill the pool from another process while creating."""
+            other.fill('org', size=1)
+            return self.create(options)
+
+        self.pool.register('org', create)
+        self.pool.fill('org', size=1)
+        self.assertEqual(1, len(self.created))
+        self.assertEqual(
+            {'free': 1, 'lent': 0},
+            self.pool.stats()['specs'][EntityPool.key('org')]
+        )
+
+    def test_fill_failure_releases_creation(self):
+        """Check a failed creation does not count towards the fill size"""
+        self.pool.register('org', mock.Mock(side_effect=ValueError))
+        with self.assertRaises(ValueError):
+            self.pool.fill('org', size=1)
+        self.pool.register('org', self.create)
+        self.pool.fill('org', size=1)
+        self.assertEqual(1, len(self.created))
+
+    @mock.patch('robottelo.entity_pool.settings')
+    def test_default_path_per_run(self, settings):
+        """Check the default registry is specific to the test run"""
+        settings.server.hostname = 'sat.example.com'
+        with mock.patch.dict(
+                os.environ, {'PYTEST_XDIST_TESTRUNUID': 'abc'}):
+            first = EntityPool().path
+        with mock.patch.dict(
+                os.environ, {'PYTEST_XDIST_TESTRUNUID': 'def'}):
+            second = EntityPool().path
+        self.assertEqual(
+            'robottelo_entity_pool_sat.example.com_abc.json',
+            os.path.basename(first)
+        )
+        self.assertNotEqual(first, second)
+
+    def test_unknown_recipe(self):
+        """Check an unknown recipe raises"""
+        with self.assertRaises(EntityPoolError):
+            self.pool.checkout('host')
+
+    def test_dead_process_lease_dropped(self):
+        """Check entities lent to a dead process are dropped"""
+        lease = self.pool.checkout('org')
+        with mock.patch('robottelo.entity_pool._pid_alive',
+                        return_value=False):
+            self.pool.checkin(self.pool.checkout('org'))
+        self.assertEqual(
+            {'free': 1, 'lent': 0},
+            self.pool.stats()['specs'][EntityPool.key('org')]
+        )
+        # giving back a dropped entity does not return it to the pool
+        self.pool.checkin(lease)
+        self.assertEqual(
+            {'free': 1, 'lent': 0},
+            self.pool.stats()['specs'][EntityPool.key('org')]
+        )
+
+    def test_close_removes_registry(self):
+        """Check the last process closing the pool removes the registry"""
+        self.pool.fill('org', size=1)
+        self.assertTrue(os.path.exists(self.path))
+        self.pool.close()
+        self.assertEqual([], os.listdir(self.tempdir))
+        # the pool can still be used afterwards
+        self.assertEqual({'id': 2}, self.pool.checkout('org').entity)
+        # closing an unused pool does nothing
+        EntityPool().close()
+
+    def test_close_keeps_registry_in_use(self):
+        """Check the registry is kept while other processes use it"""
+        self.pool.fill('org', size=1)
+        with mock.patch('os.getpid', return_value=os.getppid()):
+            self.pool.stats()
+        self.pool.close()
+        self.assertTrue(os.path.exists(self.path))
+        with mock.patch('os.getpid', return_value=os.getppid()):
+            self.pool.close()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_clear(self):
+        """Check clear forgets the free entities"""
+        self.pool.fill('org', size=2)
+        self.pool.clear()
+        self.assertEqual({}, self.pool.stats()['specs'])
+
+
+def _checkout_entity(path):
+    """Lend an ``org`` entity of the pool on ``path`` and keep it."""
+    pool = EntityPool(path)
+    pool.register('org', lambda options: {'id': os.getpid()})
+    return pool.checkout('org').entity
+
+
+class EntityPoolProcessesTestCase(unittest2.TestCase):
+    """Tests for EntityPool shared by several processes"""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.path = os.path.join(self.tempdir, 'pool.json')
+
+    def test_processes_share_pool(self):
+        """Check processes lend distinct entities of the same registry"""
+        pool = EntityPool(self.path)
+        pool.register('org', lambda options: {'id': 0})
+        for entity_id in range(1, 5):
+            pool.register(
+                'org', lambda options, entity_id=entity_id: {'id': entity_id})
+            pool.fill('org', size=entity_id)
+        processes = multiprocessing.Pool(4)
+        try:
+            entities = processes.map(_checkout_entity, [self.path] * 4)
+        finally:
+            processes.close()
+            processes.join()
+        self.assertEqual([1, 2, 3, 4], sorted(e['id'] for e in entities))
+        # the worker processes are gone so their entities are dropped
+        pool.checkin(pool.checkout('org'))
+        self.assertEqual(
+            {'free': 1, 'lent': 0},
+            pool.stats()['specs'][EntityPool.key('org')]
+        )
+
+
+class RecipesTestCase(unittest2.TestCase):
+    """Tests for the entity pool recipes"""
+
+    @mock.patch('robottelo.entity_pool.Repository')
+    @mock.patch('robottelo.entity_pool.ContentView')
+    @mock.patch('robottelo.entity_pool.ActivationKey')
+    def test_reset_org_with_manifest(self, activation_key, content_view,
+                                     repository):
+        """Check the organization repositories are deleted"""
+        activation_key.list.return_value = []
+        content_view.list.return_value = [{'name': DEFAULT_CV}]
+        repository.list.return_value = [{'id': '1'}, {'id': '2'}]
+        self.assertTrue(reset_org_with_manifest({'id': '3'}))
+        repository.delete.assert_has_calls(
+            [mock.call({u'id': '1'}), mock.call({u'id': '2'})])
+        content_view.list.return_value.append({'name': 'foo'})
+        self.assertFalse(reset_org_with_manifest({'id': '3'}))
+        activation_key.list.return_value = [{'id': '4'}]
+        content_view.list.return_value = [{'name': DEFAULT_CV}]
+        self.assertFalse(reset_org_with_manifest({'id': '3'}))
+
+    @mock.patch('robottelo.entity_pool.Repository')
+    def test_reset_synced_product(self, repository):
+        """Check the repository is synchronized again and its content
+        compared
+        """
+        entities = {'repository-id': '1', 'content-counts': {'packages': '32'}}
+        repository.info.return_value = {
+            'content-counts': {'packages': '32'}}
+        self.assertTrue(reset_synced_product(entities))
+        repository.synchronize.assert_called_once_with({u'id': '1'})
+        repository.info.return_value = {
+            'content-counts': {'packages': '33'}}
+        self.assertFalse(reset_synced_product(entities))
@@ -0,0 +1,209 @@
+# -*- encoding: utf-8 -*-
+"""Tests for module ``robottelo.fake_ssh``."""
+import os
+import six
+import unittest2
+
+from robottelo import ssh
+from robottelo.cli.base import CLIReturnCodeError
+from robottelo.cli.host import Host
+from robottelo.cli.org import Org
+from robottelo.fake_ssh import FakeSSHServer, HammerReplayHandler
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+#: Recorded hammer outputs
+FIXTURES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'foreman', 'data', 'hammer_outputs.json'
+)
+
+
+def _handler(command):
+    """Echo the command, fail on ``fail`` and raise on ``raise``."""
+    if command == u'fail':
+        return u'', u'failed', 1
+    if command == u'raise':
+        raise ValueError(u'handler error')
+    return u'{0}\n'.format(command), u'', 0
+
+
+class FakeSSHServerTestCase(unittest2.TestCase):
+    """Tests for the FakeSSHServer class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeSSHServer(_handler)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        settings = mock.MagicMock()
+        settings.server.hostname = self.server.hostname
+        settings.server.ssh_port = self.server.port
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'password'
+        settings.server.ssh_username = 'root'
+        patcher = mock.patch('robottelo.ssh.settings', settings)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pool = ssh.SSHConnectionPool()
+        patcher = mock.patch('robottelo.ssh.connection_pool', pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pool.close_all)
+
+    def test_command(self):
+        """Check the handler output is received"""
+        result = ssh.command(u'echo ção')
+        self.assertEqual(0, result.return_code)
+        self.assertEqual([u'echo ção', u''], result.stdout)
+        self.assertFalse(result.stderr)
+
+    def test_command_error(self):
+        """Check the handler stderr and return code are received"""
+        result = ssh.command(u'fail')
+        self.assertEqual(1, result.return_code)
+        self.assertEqual(u'failed', result.stderr)
+
+    def test_handler_exception(self):
+        """Check a handler exception fails the command"""
+        result = ssh.command(u'raise')
+        self.assertEqual(255, result.return_code)
+        self.assertEqual(u'handler error', result.stderr)
+
+    def test_connection_reuse(self):
+        """Check the pooled connection runs several commands"""
+        commands = self.server.commands
+        for _ in range(3):
+            ssh.command(u'ls')
+        self.assertEqual(commands + 3, self.server.commands)
+        self.assertEqual(1, ssh.connection_pool.stats()['misses'])
+
+
+class HammerReplayHandlerTestCase(unittest2.TestCase):
+    """Tests for the HammerReplayHandler class"""
+
+    def setUp(self):
+        self.handler = HammerReplayHandler([
+            {'command': 'organization list', 'output_format': 'csv',
+             'stdout': u'Id,Name\n1,Default\n'},
+            {'command': 'organization info', 'stdout': u'Id: 1\n',
+             'options': {'id': '1'}},
+            {'command': 'organization info', 'stdout': u'Id: 2\n',
+             'options': {'id': '2'}, 'latency': 0.5},
+            {'command': 'organization info', 'return_code': 65,
+             'stderr': u'Could not find organization'},
+        ], latency=0.1)
+
+    def hammer(self, command, output_format=None):
+        """Return ``command`` with the hammer prefix used by the CLI."""
+        return u'LANG=en_US  hammer -v -u admin -p changeme {0} {1}'.format(
+            u'--output={0}'.format(output_format) if output_format else u'',
+            command,
+        )
+
+    def test_find_output_format(self):
+        """Check the recordings are matched by output format"""
+        self.assertEqual(
+            u'Id,Name\n1,Default\n',
+            self.handler.find(self.hammer(
+                u'organization list --per-page="10000"', 'csv'))['stdout']
+        )
+        self.assertIsNone(self.handler.find(self.hammer(
+            u'organization list --per-page="10000"', 'json')))
+
+    def test_find_options(self):
+        """Check the recording with most matching options is used"""
+        self.assertEqual(u'Id: 2\n', self.handler.find(self.hammer(
+            u'organization info --id="2"'))['stdout'])
+        self.assertEqual(u'Id: 1\n', self.handler.find(self.hammer(
+            u'organization info --name="foo" --id="1"'))['stdout'])
+        self.assertEqual(65, self.handler.find(self.hammer(
+            u'organization info --id="3"'))['return_code'])
+
+    def test_find_not_hammer(self):
+        """Check non hammer commands have no recording"""
+        self.assertIsNone(self.handler.find(u'organization info --id="1"'))
+
+    @mock.patch('robottelo.fake_ssh.time.sleep')
+    def test_call(self, sleep):
+        """Check the recorded result is returned after the latency"""
+        self.assertEqual(
+            (u'Id: 1\n', u'', 0),
+            self.handler(self.hammer(u'organization info --id="1"'))
+        )
+        sleep.assert_called_once_with(0.1)
+        self.handler(self.hammer(u'organization info --id="2"'))
+        sleep.assert_called_with(0.5)
+
+    @mock.patch('robottelo.fake_ssh.time.sleep')
+    def test_call_unknown(self, sleep):
+        """Check commands without recording fail with usage error"""
+        stdout, stderr, return_code = self.handler(
+            self.hammer(u'host list'))
+        self.assertEqual(64, return_code)
+        self.assertIn(u'host list', stderr)
+        sleep.assert_not_called()
+
+
+class HammerReplayTestCase(unittest2.TestCase):
+    """Run CLI calls against the recorded hammer outputs"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeSSHServer(HammerReplayHandler.from_file(FIXTURES))
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        settings = mock.MagicMock()
+        settings.hammer_cache = False
+        settings.hammer_session = False
+        settings.locale = 'en_US.UTF-8'
+        settings.performance.time_hammer = False
+        settings.server.admin_password = 'changeme'
+        settings.server.admin_username = 'admin'
+        settings.server.hostname = self.server.hostname
+        settings.server.ssh_port = self.server.port
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'password'
+        settings.server.ssh_username = 'root'
+        for target in ('robottelo.ssh.settings',
+                       'robottelo.cli.base.settings'):
+            patcher = mock.patch(target, settings)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        pool = ssh.SSHConnectionPool()
+        patcher = mock.patch('robottelo.ssh.connection_pool', pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pool.close_all)
+
+    def test_list(self):
+        """Check the recorded csv output is parsed"""
+        hosts = Host.list()
+        self.assertEqual(100, len(hosts))
+        self.assertEqual(u'host1.example.com', hosts[0]['name'])
+
+    def test_info(self):
+        """Check the recorded base and json outputs are parsed"""
+        org = Org.info({'id': 1})
+        self.assertEqual(u'Default Organization', org['name'])
+        self.assertEqual(
+            org['name'], Org.info({'id': 1}, output_format='json')['name'])
+
+    def test_error(self):
+        """Check the recorded errors are raised"""
+        with self.assertRaises(CLIReturnCodeError) as context:
+            Org.info({'id': 100})
+        self.assertEqual(65, context.exception.return_code)
@@ -38,6 +38,34 @@ class ParseCSVTestCase(unittest2.TestCase):
             ]
         )
 
+    def test_parse_csv_multiline_value(self):
+        """Quoted values spanning many lines are kept together"""
+        self.assertEqual(
+            hammer.parse_csv([u'Id,Description', u'1,"first', u'second"']),
+            [{u'id': u'1', u'description': u'first\nsecond'}]
+        )
+
+    def test_parse_csv_empty(self):
+        """No output means no rows"""
+        self.assertEqual(hammer.parse_csv([]), [])
+
+    def test_iter_csv_is_lazy(self):
+        """Lines are only consumed when the next row is requested"""
+        consumed = []
+
+        def lines():
+            for line in (u'Id,Name', u'1,foo', u'2,bar', u'3,baz'):
+                consumed.append(line)
+                yield line
+
+        rows = hammer.iter_csv(lines())
+        self.assertEqual(next(rows), {u'id': u'1', u'name': u'foo'})
+        self.assertLess(len(consumed), 4)
+        self.assertEqual(
+            list(rows),
+            [{u'id': u'2', u'name': u'bar'}, {u'id': u'3', u'name': u'baz'}]
+        )
+
 
 class ParseJSONTestCase(unittest2.TestCase):
     """Tests for parsing JSON hammer output"""
@@ -0,0 +1,165 @@
+"""Tests for :mod:`robottelo.libvirt_discovery`."""
+import socket
+import six
+import unittest2
+
+from robottelo import libvirt_discovery
+from robottelo.libvirt_discovery import (
+    LibvirtGuest,
+    LibvirtGuestError,
+    LibvirtGuestFleet,
+    MACAllocator,
+)
+from robottelo.ssh import SSHCommandResult
+
+if six.PY2:
+    from mock import call, patch
+else:
+    from unittest.mock import call, patch
+
+
+class MACAllocatorTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.libvirt_discovery.MACAllocator`."""
+
+    def test_allocate(self):
+        """Check the allocated MACs are unique and valid for libvirt"""
+        allocator = MACAllocator()
+        macs = [allocator.allocate() for _ in range(200)]
+        self.assertEqual(200, len(set(macs)))
+        self.assertFalse(any(mac.startswith('fe') for mac in macs))
+
+    def test_used(self):
+        """Check used and reserved MACs are not allocated"""
+        with patch.object(
+                libvirt_discovery, '_gen_mac_for_libvirt',
+                side_effect=['aa:aa', 'BB:BB', 'cc:cc', 'dd:dd']):
+            allocator = MACAllocator(used=['aa:aa'])
+            allocator.reserve('bb:bb')
+            self.assertEqual('cc:cc', allocator.allocate())
+            self.assertEqual('dd:dd', allocator.allocate())
+
+
+class LibvirtGuestFleetTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.libvirt_discovery.LibvirtGuestFleet`."""
+
+    def setUp(self):
+        patcher = patch('robottelo.libvirt_discovery.settings')
+        settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings.compute_resources.libvirt_hostname = 'libvirt.example.com'
+        settings.compute_resources.libvirt_image_dir = '/var/lib/libvirt'
+        settings.vlan_networking.bridge = 'br0'
+        patcher = patch('robottelo.ssh.batch_command')
+        self.batch_command = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.batch_command.side_effect = lambda cmds, **kwargs: [
+            SSHCommandResult() for _ in cmds]
+
+    def test_create_destroy(self):
+        """Check the guests are created and destroyed by batches"""
+        with LibvirtGuestFleet(10, parallel=3) as fleet:
+            self.assertEqual(10, len(fleet.created))
+            self.assertEqual(3, self.batch_command.call_count)
+            commands = [
+                cmd
+                for args, _ in self.batch_command.call_args_list
+                for cmd in args[0]
+            ]
+            self.assertEqual(
+                sorted(guest._create_command() for guest in fleet.guests),
+                sorted(commands)
+            )
+        self.assertEqual([], fleet.created)
+        self.assertEqual(4, self.batch_command.call_count)
+        destroy_commands = self.batch_command.call_args[0][0]
+        self.assertEqual(30, len(destroy_commands))
+        self.assertEqual(
+            u'virsh destroy {0}'.format(fleet.guests[0].hostname),
+            destroy_commands[0]
+        )
+        self.assertEqual(
+            {'create', 'destroy'}, set(fleet.timings))
+
+    def test_create_error(self):
+        """Check all the guests are destroyed if one can not be created"""
+        self.batch_command.side_effect = lambda cmds, **kwargs: [
+            SSHCommandResult(stderr=u'failed', return_code=1)
+        ] + [SSHCommandResult() for _ in cmds[1:]]
+        fleet = LibvirtGuestFleet(4, parallel=2)
+        with self.assertRaises(LibvirtGuestError):
+            fleet.create()
+        self.assertEqual([], fleet.created)
+        # The two created guests are destroyed by a single batch
+        self.assertEqual(6, len(self.batch_command.call_args[0][0]))
+
+    def test_create_batch_error(self):
+        """Check the guests of a failed batch are destroyed"""
+        def batch_command(cmds, **kwargs):
+            """Fail the batch of the first guest."""
+            if fleet.guests[0]._create_command() in cmds:
+                raise socket.timeout()
+            return [SSHCommandResult() for _ in cmds]
+
+        self.batch_command.side_effect = batch_command
+        fleet = LibvirtGuestFleet(4, parallel=2)
+        with self.assertRaises(LibvirtGuestError):
+            fleet.create()
+        self.assertEqual([], fleet.created)
+        # All the guests, including the failed batch ones, are destroyed
+        self.assertEqual(12, len(self.batch_command.call_args[0][0]))
+
+    def test_wait_until_ready(self):
+        """Check the pending guests are polled together with backoff"""
+        fleet = LibvirtGuestFleet(3)
+        fleet.create()
+        polls = []
+
+        def check(guests):
+            polls.append(list(guests))
+            return guests[:1]
+
+        with patch('time.sleep') as sleep:
+            fleet.wait_until_ready(check)
+        self.assertEqual([3, 2, 1], [len(guests) for guests in polls])
+        self.assertEqual([call(1), call(2)], sleep.call_args_list)
+        self.assertEqual(
+            set(guest.guest_name for guest in fleet.guests),
+            set(fleet.ready_times)
+        )
+        self.assertIn('ready', fleet.timings)
+
+    def test_wait_until_ready_timeout(self):
+        """Check an error is raised if guests are not ready in time"""
+        fleet = LibvirtGuestFleet(2)
+        fleet.create()
+        with self.assertRaises(LibvirtGuestError):
+            fleet.wait_until_ready(lambda guests: [], timeout=0)
+
+    def test_running_guests(self):
+        """Check the running guests are found with a batch of commands"""
+        guests = [LibvirtGuest() for _ in range(2)]
+        for guest in guests:
+            guest._create_command()
+        self.batch_command.side_effect = None
+        self.batch_command.return_value = [
+            SSHCommandResult(stdout=[u'shut off', u'']),
+            SSHCommandResult(stdout=[u'running', u'']),
+        ]
+        self.assertEqual(
+            [guests[1]], libvirt_discovery.running_guests(guests))
+
+    def test_discovered_guests(self):
+        """Check the discovered guests are found with a single search"""
+        guests = [LibvirtGuest() for _ in range(2)]
+        with patch('robottelo.libvirt_discovery.entities') as entities:
+            entities.DiscoveredHost.return_value.search_json.return_value = {
+                'results': [{'name': guests[0].guest_name}]}
+            self.assertEqual(
+                [guests[0]], libvirt_discovery.discovered_guests(guests))
+        query = entities.DiscoveredHost.return_value.search_json.call_args[
+            1]['query']
+        self.assertEqual(
+            u'name ^ ({0},{1})'.format(
+                guests[0].guest_name, guests[1].guest_name),
+            query['search']
+        )
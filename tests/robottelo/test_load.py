@@ -0,0 +1,75 @@
+"""Tests for :mod:`robottelo.performance.load`."""
+import os
+import time
+import unittest2
+
+from robottelo.performance.load import LoadGenerator
+
+
+def echo(client, index):
+    """Return the arguments and the worker process id."""
+    if index < 0:
+        raise ValueError('negative index')
+    return client, index, os.getpid()
+
+
+class LoadGeneratorTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.performance.load.LoadGenerator`."""
+
+    def test_closed_loop(self):
+        """Check the clients calls are spread across processes"""
+        clients = [[(client, index) for index in range(5)]
+                   for client in range(4)]
+        clients[3][2] = (3, -1)
+        result = LoadGenerator(processes=2, start_delay=0).run(
+            echo, clients)
+        self.assertEqual(
+            ['thread-0', 'thread-1', 'thread-2', 'thread-3'],
+            sorted(result.values))
+        self.assertEqual(
+            [(1, index) for index in range(5)],
+            [value[:2] for value in result.values['thread-1']])
+        self.assertEqual(4, len(result.values['thread-3']))
+        pids = set(
+            value[2] for values in result.values.values() for value in values)
+        self.assertEqual(2, len(pids))
+        self.assertNotIn(os.getpid(), pids)
+        self.assertEqual(1, len(result.errors))
+        self.assertEqual((3, 2), result.errors[0][:2])
+        self.assertEqual(19, result.latencies.histogram().count)
+
+    def test_open_loop(self):
+        """Check the calls are started at the arrival rate"""
+        clients = [[(client, index) for index in range(5)]
+                   for client in range(2)]
+        start = time.time()
+        result = LoadGenerator(processes=2, rate=50, start_delay=0).run(
+            echo, clients)
+        self.assertGreaterEqual(time.time() - start, 0.18)
+        self.assertEqual(
+            [(0, index) for index in range(5)],
+            [value[:2] for value in result.values['thread-0']])
+        self.assertEqual(10, result.latencies.histogram().count)
+
+    def test_schedule_ramp(self):
+        """Check the arrival rate is increased at each ramp step"""
+        generator = LoadGenerator(rate=2, ramp_steps=2, ramp_interval=2)
+        self.assertEqual(
+            [10, 11, 12, 12.5, 13], generator._schedule(5, 10))
+        self.assertEqual(
+            [0, 0.5, 1], LoadGenerator(rate=2)._schedule(3, 0))
+
+    def test_ramp_closed_loop(self):
+        """Check the clients are started by groups"""
+        generator = LoadGenerator(processes=1, ramp_steps=2, ramp_interval=5)
+        workers = generator._closed_loop_workers(echo, [[], [], [], []], 0)
+        self.assertEqual(
+            [0, 0, 5, 5],
+            [start for _, _, start in workers[0][1][1]])
+
+    def test_no_calls(self):
+        """Check no process is started without calls"""
+        result = LoadGenerator().run(echo, [[], []])
+        self.assertEqual({'thread-0': [], 'thread-1': []}, result.values)
+        with self.assertRaises(ValueError):
+            LoadGenerator(rate=0)
@@ -0,0 +1,214 @@
+"""Tests for module ``robottelo.log``."""
+import contextlib
+import datetime
+import os
+import shutil
+import six
+import tempfile
+import unittest2
+
+from robottelo import log
+from robottelo.ssh import SSHCommandResult
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class FakeSFTPFile(object):
+    """Local file with the ``prefetch`` method of a SFTP file."""
+
+    def __init__(self, path, mode):
+        self._file = open(path, mode)
+        self.seek = self._file.seek
+        self.read = self._file.read
+        self.close = self._file.close
+
+    def prefetch(self, file_size=None):
+        pass
+
+
+class FakeSFTP(object):
+    """SFTP client serving local files."""
+
+    def __init__(self):
+        self.opened = 0
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def open(self, path, mode):
+        self.opened += 1
+        return FakeSFTPFile(path, mode)
+
+    def close(self):
+        pass
+
+
+class LogFileTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.log.LogFile`."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.remote_path = os.path.join(self.tmpdir, 'production.log')
+        os.mkdir(os.path.join(self.tmpdir, 'logs'))
+        patcher = mock.patch.object(
+            log, 'LOGS_DATA_DIR', os.path.join(self.tmpdir, 'logs'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sftp = FakeSFTP()
+        connection = mock.Mock()
+        connection.open_sftp.return_value = self.sftp
+        connection_pool = mock.Mock()
+        connection_pool.connection.side_effect = (
+            lambda **kwargs: contextlib.closing(connection))
+        patcher = mock.patch.object(
+            log.ssh, 'connection_pool', connection_pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, text, mode='ab'):
+        """Write ``text`` to the remote log."""
+        with open(self.remote_path, mode) as remote_file:
+            remote_file.write(text.encode('utf-8'))
+
+    def test_filter(self):
+        """Check the whole remote log is downloaded and filtered"""
+        self.write(u'2017-03-01 10:00:00 [I] one\n2017-03-01 10:00:01 [E] '
+                   u'two\n  traceback\n')
+        logfile = log.LogFile(self.remote_path, r'\[E\]')
+        self.assertEqual(3, len(logfile))
+        self.assertEqual([u'2017-03-01 10:00:01 [E] two\n'], logfile.filter())
+        self.assertEqual([u'  traceback\n'], logfile.filter(u'traceback'))
+        self.assertEqual(
+            [u'2017-03-01 10:00:00 [I] one\n',
+             u'2017-03-01 10:00:01 [E] two\n',
+             u'  traceback\n'],
+            logfile.data
+        )
+
+    def test_missing_file(self):
+        """Check a missing remote log raises IOError"""
+        with self.assertRaises(IOError):
+            log.LogFile(self.remote_path)
+        self.assertEqual([], os.listdir(log.LOGS_DATA_DIR))
+
+    def test_local_copies(self):
+        """Check every instance has its own local copy, removed on close"""
+        self.write(u'one\n')
+        first = log.LogFile(self.remote_path)
+        second = log.LogFile(self.remote_path, tail=True)
+        self.assertNotEqual(first.local_path, second.local_path)
+        self.write(u'two\n')
+        second.update()
+        self.assertEqual([u'one\n'], first.data)
+        self.assertEqual([u'two\n'], second.data)
+        second.close()
+        self.assertFalse(os.path.exists(second.local_path))
+        self.assertEqual([u'one\n'], first.data)
+        first.close()
+        self.assertEqual([], os.listdir(log.LOGS_DATA_DIR))
+
+    def test_update(self):
+        """Check only the appended lines are fetched, the last line without
+        newline is indexed again when it grows
+        """
+        self.write(u'first\nsec')
+        logfile = log.LogFile(self.remote_path)
+        self.assertEqual([u'first\n', u'sec'], logfile.data)
+        self.write(u'ond\nthird\n')
+        self.assertEqual(1, logfile.update())
+        self.assertEqual([u'first\n', u'second\n', u'third\n'], logfile.data)
+        self.assertEqual(0, logfile.update())
+        self.assertEqual(2, self.sftp.opened)
+
+    def test_update_growing(self):
+        """Check the last line is not indexed while the log is growing"""
+        self.write(u'first\nsec')
+        stat = self.sftp.stat
+        sizes = []
+
+        def growing_stat(path):
+            sizes.append(stat(path).st_size)
+            if len(sizes) == 2:
+                return mock.Mock(st_size=sizes[-1] + 3)
+            return stat(path)
+
+        with mock.patch.object(self.sftp, 'stat', growing_stat):
+            logfile = log.LogFile(self.remote_path)
+        self.assertEqual([u'first\n'], logfile.data)
+        self.write(u'ond\n')
+        self.assertEqual(1, logfile.update())
+        self.assertEqual([u'first\n', u'second\n'], logfile.data)
+
+    def test_rotated(self):
+        """Check the local copy starts over when the log is rotated"""
+        self.write(u'old line\nanother old line\n')
+        logfile = log.LogFile(self.remote_path)
+        self.write(u'new\n', 'wb')
+        self.assertEqual(1, logfile.update())
+        self.assertEqual([u'new\n'], logfile.data)
+
+    def test_tail(self):
+        """Check the existing lines are skipped on tail mode"""
+        self.write(u'old\n')
+        logfile = log.LogFile(self.remote_path, tail=True)
+        self.assertEqual([], logfile.data)
+        self.write(u'new\n')
+        logfile.update()
+        self.assertEqual([u'new\n'], logfile.data)
+        self.assertEqual(4, logfile.start_offset)
+
+    def test_time_window(self):
+        """Check the lines can be limited to a time window"""
+        self.write(
+            u'2017-03-01 10:00:00 a\n'
+            u'2017-03-01 10:05:00 b\n'
+            u'  b traceback\n'
+            u'2017-03-01T10:10:00 c\n'
+            u'[ INFO 2017-03-01 10:15:00 main] d\n'
+        )
+        with log.LogFile(self.remote_path) as logfile:
+            self.assertEqual(
+                [u'2017-03-01 10:05:00 b\n', u'  b traceback\n',
+                 u'2017-03-01T10:10:00 c\n'],
+                list(logfile.lines(
+                    since=datetime.datetime(2017, 3, 1, 10, 1),
+                    until=datetime.datetime(2017, 3, 1, 10, 10)))
+            )
+            self.assertEqual(
+                [u'  b traceback\n'],
+                logfile.filter(
+                    u'traceback', since=datetime.datetime(2017, 3, 1, 10, 5))
+            )
+            self.assertEqual(
+                [u'[ INFO 2017-03-01 10:15:00 main] d\n'],
+                list(logfile.lines(
+                    since=datetime.datetime(2017, 3, 1, 10, 11)))
+            )
+
+    def test_remote_filter(self):
+        """Check the filter can run on the server"""
+        self.write(u'old\n')
+        logfile = log.LogFile(self.remote_path, r'\[E\]', tail=True)
+        with mock.patch.object(log.ssh, 'command') as command:
+            command.return_value = SSHCommandResult(
+                u'[E] one\n[E] two\n', u'', 0, 'plain')
+            self.assertEqual(
+                [u'[E] one\n', u'[E] two\n'], logfile.filter(remote=True))
+            command.assert_called_once_with(
+                u"set -o pipefail; tail -c +5 {0} | grep -P -e '\\[E\\]'"
+                .format(self.remote_path),
+                hostname=None, output_format='plain', timeout=120
+            )
+            command.return_value = SSHCommandResult(u'', u'', 1, 'plain')
+            self.assertEqual([], logfile.filter(remote=True))
+            command.return_value = SSHCommandResult(
+                u'', u'No such file', 2, 'plain')
+            with self.assertRaises(IOError):
+                logfile.filter(remote=True)
+        with self.assertRaises(ValueError):
+            logfile.filter(
+                remote=True, since=datetime.datetime(2017, 3, 1, 10, 11))
@@ -0,0 +1,186 @@
+"""Tests for module ``robottelo.manifests``."""
+import json
+import os
+import requests
+import shutil
+import six
+import tempfile
+import time
+import unittest2
+import zipfile
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from robottelo import manifests
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+def make_template():
+    """Return a manifest template and its PEM signing key."""
+    key = rsa.generate_private_key(65537, 2048, default_backend())
+    signing_key = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption(),
+    )
+    consumer_export = six.BytesIO()
+    with zipfile.ZipFile(
+            consumer_export, 'w', zipfile.ZIP_DEFLATED) as consumer_zip:
+        consumer_zip.writestr('export/meta.json', json.dumps({'a': 1}))
+        consumer_zip.writestr(
+            'export/consumer.json', json.dumps({'uuid': 'old', 'name': 'c'}))
+        consumer_zip.writestr('export/entitlements/1.json', 'x' * 10000)
+    template = six.BytesIO()
+    with zipfile.ZipFile(template, 'w', zipfile.ZIP_DEFLATED) as template_zip:
+        template_zip.writestr(
+            'consumer_export.zip', consumer_export.getvalue())
+        template_zip.writestr('signature', b'old signature')
+    return template.getvalue(), signing_key
+
+
+class ManifestClonerTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.manifests.ManifestCloner`."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template, cls.signing_key = make_template()
+
+    def read_clone(self, manifest):
+        """Return the consumer export zip and the signature of a clone."""
+        manifest_zip = zipfile.ZipFile(manifest)
+        self.assertIsNone(manifest_zip.testzip())
+        consumer_export = manifest_zip.read('consumer_export.zip')
+        return consumer_export, manifest_zip.read('signature')
+
+    def test_clone(self):
+        """Check the clone has a new consumer uuid, the other members and a
+        valid signature
+        """
+        cloner = manifests.ManifestCloner(
+            self.template, self.signing_key, pool_size=0)
+        consumer_export, signature = self.read_clone(cloner.clone())
+        consumer_zip = zipfile.ZipFile(six.BytesIO(consumer_export))
+        self.assertIsNone(consumer_zip.testzip())
+        consumer = json.loads(
+            consumer_zip.read('export/consumer.json').decode('utf-8'))
+        self.assertNotEqual('old', consumer['uuid'])
+        self.assertEqual('c', consumer['name'])
+        self.assertEqual(
+            b'x' * 10000, consumer_zip.read('export/entitlements/1.json'))
+        self.assertEqual(
+            sorted(['export/meta.json', 'export/consumer.json',
+                    'export/entitlements/1.json']),
+            sorted(consumer_zip.namelist())
+        )
+        cloner.private_key.public_key().verify(
+            signature, consumer_export, padding.PKCS1v15(), hashes.SHA256())
+
+    def test_clone_unique(self):
+        """Check each clone has its own consumer uuid"""
+        cloner = manifests.ManifestCloner(
+            self.template, self.signing_key, pool_size=0)
+        uuids = set()
+        for _ in range(3):
+            consumer_export, _ = self.read_clone(cloner.clone())
+            uuids.add(json.loads(zipfile.ZipFile(
+                six.BytesIO(consumer_export)
+            ).read('export/consumer.json').decode('utf-8'))['uuid'])
+        self.assertEqual(3, len(uuids))
+
+    def test_pool(self):
+        """Check the clones are prepared in background"""
+        cloner = manifests.ManifestCloner(
+            self.template, self.signing_key, pool_size=2)
+        cloner.warm()
+        for _ in range(50):
+            if cloner._pool.full():
+                break
+            time.sleep(0.1)
+        self.assertTrue(cloner._pool.full())
+        with mock.patch.object(cloner, '_clone') as clone:
+            first = cloner.clone()
+            second = cloner.clone()
+        self.assertFalse(clone.called)
+        self.assertIsNot(first, second)
+        self.read_clone(first)
+        self.read_clone(second)
+
+    def test_original(self):
+        """Check the original manifest is the template"""
+        cloner = manifests.ManifestCloner(self.template, self.signing_key)
+        self.assertEqual(self.template, cloner.original().read())
+
+
+class CachedDownloadTestCase(unittest2.TestCase):
+    """Tests for :func:`robottelo.manifests.cached_download`."""
+
+    url = 'http://example.org/manifest.zip'
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        patcher = mock.patch('robottelo.manifests.requests.get')
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.get.return_value = mock.Mock(
+            status_code=200,
+            content=b'manifest',
+            headers={'ETag': '"v1"', 'Last-Modified': 'yesterday'},
+        )
+
+    def download(self, max_age=60):
+        """Download :attr:`url` through the test cache."""
+        return manifests.cached_download(self.url, self.cache_dir, max_age)
+
+    def expire(self):
+        """Make the cached file older than the max age."""
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            os.utime(path, (time.time() - 120, time.time() - 120))
+
+    def test_fresh_cache(self):
+        """Check a fresh cached file is used without a request"""
+        self.assertEqual(b'manifest', self.download())
+        self.assertEqual(b'manifest', self.download())
+        self.assertEqual(1, self.get.call_count)
+        self.get.assert_called_once_with(self.url, headers={})
+
+    def test_not_modified(self):
+        """Check an expired cached file is revalidated"""
+        self.download()
+        self.expire()
+        self.get.return_value = mock.Mock(status_code=304, content=b'')
+        self.assertEqual(b'manifest', self.download())
+        self.get.assert_called_with(self.url, headers={
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'yesterday',
+        })
+        # The revalidated file is fresh again
+        self.assertEqual(b'manifest', self.download())
+        self.assertEqual(2, self.get.call_count)
+
+    def test_modified(self):
+        """Check an expired cached file is replaced when it changed"""
+        self.download()
+        self.expire()
+        self.get.return_value = mock.Mock(
+            status_code=200, content=b'new', headers={})
+        self.assertEqual(b'new', self.download())
+        self.assertEqual(b'new', self.download())
+        self.assertEqual(2, self.get.call_count)
+
+    def test_unreachable(self):
+        """Check an expired cached file is used when the download fails"""
+        self.download()
+        self.expire()
+        self.get.side_effect = requests.ConnectionError
+        self.assertEqual(b'manifest', self.download())
+        shutil.rmtree(self.cache_dir)
+        os.mkdir(self.cache_dir)
+        with self.assertRaises(requests.ConnectionError):
+            self.download()
@@ -1,8 +1,12 @@
 """Tests for module ``robottelo.ssh``."""
 # (too-many-public-methods) pylint: disable=R0904
+import json
 import os
 import paramiko
+import re
 import six
+import socket
+import threading
 
 from robottelo import ssh
 from unittest2 import TestCase
@@ -30,6 +34,78 @@ class MockStdout(object):
         return self.cmd
 
 
+class MockShellChannel(object):
+    """A mock ``paramiko.Channel`` running a shell.
+
+    Every command sent is "executed" by echoing it back to ``stdout`` and
+    ``stderr`` is filled with ``stderr`` contents. The return code of each
+    command is ``ret_code``.
+    """
+    command_regex = re.compile(
+        b'^\\((?P<cmd>.*)\n\\) < /dev/null\n'
+        b'.* (?P<marker>\\w+) "\\$__rc".* (?P=marker) >&2\n$',
+        re.DOTALL
+    )
+
+    def __init__(self):
+        self.closed = False
+        self.exited = False
+        self.ret_code = 0
+        self.stderr = b''
+        self.commands = []
+        self.stdout_buffer = b''
+        self.stderr_buffer = b''
+
+    def exec_command(self, cmd):
+        self.shell = cmd
+
+    def sendall(self, data):
+        if data.startswith(b'['):
+            # hammer session, the marker is the last interpreter argument
+            cmd = u' '.join(json.loads(data.decode('utf-8'))).encode('utf-8')
+            marker = self.shell.split()[-1].encode('ascii')
+        else:
+            match = self.command_regex.match(data)
+            cmd, marker = match.group('cmd'), match.group('marker')
+        self.commands.append(cmd)
+        self.stdout_buffer += cmd + b'\n' + marker + b' ' + str(
+            self.ret_code).encode('ascii') + b'\n'
+        self.stderr_buffer += self.stderr + b'\n' + marker + b'\n'
+
+    def recv_ready(self):
+        return len(self.stdout_buffer) > 0
+
+    def recv(self, size):
+        data = self.stdout_buffer[:size]
+        self.stdout_buffer = self.stdout_buffer[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        return len(self.stderr_buffer) > 0
+
+    def recv_stderr(self, size):
+        data = self.stderr_buffer[:size]
+        self.stderr_buffer = self.stderr_buffer[size:]
+        return data
+
+    def exit_status_ready(self):
+        return self.exited
+
+    def close(self):
+        self.closed = True
+
+
+class MockTransport(object):
+    def __init__(self, active=True):
+        self.active = active
+
+    def is_active(self):
+        return self.active
+
+    def open_session(self):
+        return MockShellChannel()
+
+
 class MockSSHClient(object):
     """A mock ``paramiko.SSHClient`` object."""
     def __init__(self):
@@ -49,6 +125,7 @@ class MockSSHClient(object):
         self.key_filename = None
         self.password = None
         self.ret_code = 0
+        self.transport = MockTransport()
 
     def set_missing_host_key_policy(self, policy):  # pylint:disable=W0613
         """A no-op stub method."""
@@ -77,6 +154,11 @@ class MockSSHClient(object):
     def close(self):
         """A no-op stub method."""
         self.close_ += 1
+        self.transport.active = False
+
+    def get_transport(self):
+        """Return the stub transport."""
+        return self.transport
 
     def exec_command(self, cmd, *args, **kwargs):
         return (
@@ -245,6 +327,21 @@ class SSHTestCase(TestCase):
         self.assertEquals(ret.stdout, [u'ls -la'])
         self.assertIsInstance(ret, ssh.SSHCommandResult)
 
+    @mock.patch('robottelo.ssh.settings')
+    def test_command_no_read_timeout(self, settings):
+        """The connection timeout is not applied to the command output"""
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        with mock.patch.object(
+                MockSSHClient, 'exec_command',
+                autospec=True,
+                side_effect=MockSSHClient.exec_command) as execute:
+            ssh.command('sleep 20', timeout=5)
+        self.assertIsNone(execute.call_args[1].get('timeout'))
+
     @mock.patch('robottelo.ssh.settings')
     def test_command_plain_output(self, settings):
         ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
@@ -286,3 +383,451 @@ class SSHTestCase(TestCase):
             ssh._call_paramiko_sshclient(),
             (paramiko.SSHClient, MockSSHClient)
         )
+
+
+class SSHConnectionPoolTestCase(TestCase):
+    """Tests for class ``robottelo.ssh.SSHConnectionPool``."""
+
+    def setUp(self):
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        self.pool = ssh.SSHConnectionPool(max_per_host=2, max_idle_time=60)
+
+    def test_connection_is_reused(self):
+        """A released connection is handed to the next borrower"""
+        with self.pool.connection('example.com', 'nobody', 'pass') as first:
+            pass
+        with self.pool.connection('example.com', 'nobody', 'pass') as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(first.connect_, 1)
+        self.assertEqual(first.close_, 0)
+        stats = self.pool.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['reconnects'], 0)
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_connections_are_keyed(self):
+        """Different credentials never share a connection"""
+        with self.pool.connection('example.com', 'nobody', 'pass') as first:
+            pass
+        with self.pool.connection('example.com', 'root', 'pass') as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertEqual(second.username, 'root')
+        self.assertEqual(self.pool.stats()['misses'], 2)
+
+    def test_borrowed_connections_are_exclusive(self):
+        """Concurrent borrowers get different connections"""
+        with self.pool.connection('example.com', 'nobody', 'pass') as first:
+            with self.pool.connection(
+                    'example.com', 'nobody', 'pass') as second:
+                self.assertIsNot(first, second)
+                self.assertEqual(self.pool.stats()['in_use'], 2)
+        self.assertEqual(self.pool.stats()['idle'], 2)
+
+    def test_max_per_host_blocks(self):
+        """Borrowers wait for a connection when max_per_host is reached"""
+        key, first = self.pool.acquire('example.com', 'nobody', 'pass')
+        _, second = self.pool.acquire('example.com', 'nobody', 'pass')
+        borrowed = []
+        thread = threading.Thread(target=lambda: borrowed.append(
+            self.pool.acquire('example.com', 'nobody', 'pass')[1]))
+        thread.start()
+        thread.join(0.2)
+        self.assertEqual(borrowed, [])
+        self.pool.release(key, first)
+        thread.join(5)
+        self.assertEqual(borrowed, [first])
+        self.assertEqual(self.pool.stats()['in_use'], 2)
+
+    def test_unhealthy_connection_is_replaced(self):
+        """A dead idle connection is closed and counted as a reconnect"""
+        with self.pool.connection('example.com', 'nobody', 'pass') as first:
+            pass
+        first.transport.active = False
+        with self.pool.connection('example.com', 'nobody', 'pass') as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertEqual(first.close_, 1)
+        self.assertEqual(self.pool.stats()['reconnects'], 1)
+
+    def test_connection_error_discards_connection(self):
+        """A connection which raised a connection error is not reused"""
+        with self.assertRaises(paramiko.SSHException):
+            with self.pool.connection(
+                    'example.com', 'nobody', 'pass') as first:
+                raise paramiko.SSHException('broken')
+        self.assertEqual(first.close_, 1)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+        self.assertEqual(self.pool.stats()['in_use'], 0)
+
+    def test_idle_connections_are_evicted(self):
+        """Connections idle for longer than max_idle_time are closed"""
+        self.pool.max_idle_time = -1
+        with self.pool.connection('example.com', 'nobody', 'pass') as first:
+            pass
+        with self.pool.connection('example.com', 'nobody', 'pass') as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertEqual(first.close_, 1)
+        self.assertEqual(self.pool.stats()['misses'], 2)
+
+    def test_close_all(self):
+        """Closing the pool closes all idle connections"""
+        with self.pool.connection('example.com', 'nobody', 'pass') as first:
+            pass
+        self.pool.close_all()
+        self.assertEqual(first.close_, 1)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+
+
+class SSHShellSessionTestCase(TestCase):
+    """Tests for class ``robottelo.ssh.SSHShellSession``."""
+
+    def setUp(self):
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        self.session = ssh.SSHShellSession('example.com', 'nobody', 'pass')
+        self.channel = self.session._channel  # pylint:disable=W0212
+
+    def test_starts_shell(self):
+        """The session starts a shell on its own channel"""
+        self.assertEqual(self.channel.shell, ssh.SSHShellSession.shell)
+        self.assertFalse(self.session.closed)
+
+    def test_run(self):
+        """Output and return code of each command are delimited"""
+        ret = self.session.run('ls -la', output_format='plain')
+        self.assertIsInstance(ret, ssh.SSHCommandResult)
+        self.assertEqual(ret.stdout, u'ls -la')
+        self.assertEqual(ret.return_code, 0)
+        self.channel.ret_code = 2
+        self.channel.stderr = b'some error'
+        ret = self.session.run(u'ls /tmp')
+        self.assertEqual(ret.stdout, [u'ls /tmp'])
+        self.assertEqual(ret.stderr, u'some error')
+        self.assertEqual(ret.return_code, 2)
+        self.assertEqual(self.channel.commands, [b'ls -la', b'ls /tmp'])
+
+    def test_run_small_chunks(self):
+        """Markers split among several reads are found"""
+        self.session.chunk_size = 3
+        ret = self.session.run('a,b,c\n1,2,3', output_format='plain')
+        self.assertEqual(ret.stdout, u'a,b,c\n1,2,3')
+        self.assertEqual(ret.return_code, 0)
+
+    def test_run_unexpected_exit(self):
+        """The session is closed when the shell exits"""
+        self.channel.sendall = lambda data: None
+        self.channel.exited = True
+        with self.assertRaises(EOFError):
+            self.session.run('exit')
+        self.assertTrue(self.channel.closed)
+        self.assertTrue(self.session.closed)
+
+    def test_run_timeout(self):
+        """A command which never finishes times out and closes the session"""
+        self.channel.sendall = lambda data: None
+        self.session.default_timeout = 0.01
+        with mock.patch('robottelo.ssh.select.select'):
+            with self.assertRaises(socket.timeout):
+                self.session.run('echo "unbalanced')
+        self.assertTrue(self.session.closed)
+
+    def test_close(self):
+        """Closing the session closes channel and connection"""
+        self.session.close()
+        self.assertTrue(self.session.closed)
+        self.assertEqual(
+            self.session._client.close_, 1)  # pylint:disable=W0212
+
+    @mock.patch('robottelo.ssh.settings')
+    def test_shell_command_reuses_session(self, settings):
+        """shell_command runs all the commands of a thread on one session"""
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        ssh._shell_sessions.sessions = {}  # pylint:disable=W0212
+        first = ssh.shell_command('ls', output_format='plain')
+        second = ssh.shell_command('ls -la', output_format='plain')
+        self.assertEqual(first.stdout, u'ls')
+        self.assertEqual(second.stdout, u'ls -la')
+        sessions = ssh._shell_sessions.sessions  # pylint:disable=W0212
+        self.assertEqual(len(sessions), 1)
+        session = list(sessions.values())[0]
+        self.assertEqual(
+            session._channel.commands,  # pylint:disable=W0212
+            [b'ls', b'ls -la']
+        )
+        ssh.close_shell_sessions()
+        self.assertTrue(session.closed)
+        ssh.shell_command('ls', output_format='plain')
+        self.assertIsNot(
+            list(ssh._shell_sessions.sessions.values())[0],  # noqa
+            session
+        )
+        ssh.close_shell_sessions()
+
+    @mock.patch('robottelo.ssh.settings')
+    def test_shell_command_forgets_closed_session(self, settings):
+        """The closed session of a thread is forgotten when replaced"""
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        ssh.close_shell_sessions()
+        ssh._shell_sessions.sessions = {}  # pylint:disable=W0212
+        ssh.shell_command('ls', output_format='plain')
+        session = list(ssh._shell_sessions.sessions.values())[0]  # noqa
+        session.close()
+        ssh.shell_command('ls', output_format='plain')
+        all_sessions = ssh._all_shell_sessions  # pylint:disable=W0212
+        self.assertNotIn(session, all_sessions)
+        self.assertEqual(len(all_sessions), 1)
+        ssh.close_shell_sessions()
+
+
+class SSHHammerSessionTestCase(TestCase):
+    """Tests for class ``robottelo.ssh.SSHHammerSession``."""
+
+    def setUp(self):
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        self.session = ssh.SSHHammerSession(
+            'example.com', 'nobody', 'pass', locale='en_US.UTF-8')
+        self.channel = self.session._channel  # pylint:disable=W0212
+
+    def test_starts_hammer(self):
+        """The session starts a ruby process running the hammer script"""
+        self.assertTrue(self.channel.shell.startswith(
+            u'LANG=en_US.UTF-8 ruby -W0 -e '))
+        self.assertIn(u'HammerCLI::MainCommand.run', self.channel.shell)
+        self.assertNotIn(u'bin_path', self.channel.shell)
+        self.assertTrue(self.channel.shell.endswith(
+            self.session._marker.decode('ascii')))  # noqa
+
+    def test_run(self):
+        """The arguments are sent as a JSON line and the output delimited"""
+        ret = self.session.run(
+            [u'-u', u'admin', u'organization', u'list', u'--search=a b'],
+            output_format='plain',
+        )
+        self.assertEqual(
+            ret.stdout, u'-u admin organization list --search=a b')
+        self.assertEqual(ret.return_code, 0)
+        self.channel.ret_code = 65
+        self.channel.stderr = b'Could not find organization'
+        ret = self.session.run([u'organization', u'info'])
+        self.assertEqual(ret.stderr, u'Could not find organization')
+        self.assertEqual(ret.return_code, 65)
+
+    @mock.patch('robottelo.ssh.settings')
+    def test_hammer_command_reuses_session(self, settings):
+        """hammer_command runs all the commands of a thread on one session"""
+        settings.locale = 'en_US.UTF-8'
+        settings.server.hostname = 'example.com'
+        settings.server.ssh_username = 'nobody'
+        settings.server.ssh_key = None
+        settings.server.ssh_password = 'test_password'
+        ssh._shell_sessions.sessions = {}  # pylint:disable=W0212
+        ssh.hammer_command([u'ping'], output_format='plain')
+        ssh.hammer_command([u'host', u'list'], output_format='plain')
+        ssh.shell_command('ls', output_format='plain')
+        sessions = ssh._shell_sessions.sessions  # pylint:disable=W0212
+        hammer_sessions = [
+            session for session in sessions.values()
+            if isinstance(session, ssh.SSHHammerSession)
+        ]
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(len(hammer_sessions), 1)
+        self.assertEqual(
+            hammer_sessions[0]._channel.commands,  # pylint:disable=W0212
+            [b'ping', b'host list']
+        )
+        ssh.close_shell_sessions()
+        self.assertTrue(hammer_sessions[0].closed)
+
+
+class MockBatchStdout(object):
+    """A mock ``paramiko.ChannelFile`` running a batch of commands.
+
+    Each command is "executed" by echoing it back and its return code is its
+    position on the batch. ``stderr`` contains the command too.
+    """
+    def __init__(self, script, stream, finished=None):
+        self.channel = MockChannel(ret=0)
+        parts = re.findall(
+            b'\\((.*?)\\n\\) < /dev/null\\n.*? (\\w+) "\\$__rc".*?>&2\\n',
+            script,
+            re.DOTALL
+        )
+        self.output = b''
+        for index, (cmd, marker) in enumerate(parts[:finished]):
+            if stream == 'stdout':
+                self.output += cmd + b'\n' + marker + b' ' + str(
+                    index).encode('ascii') + b'\n'
+            else:
+                self.output += b'err ' + cmd + b'\n' + marker + b'\n'
+
+    def read(self):
+        return self.output
+
+
+class MockBatchSSHClient(MockSSHClient):
+    """A mock ``paramiko.SSHClient`` which runs batches of commands."""
+    finished = None
+
+    def exec_command(self, cmd, *args, **kwargs):
+        self.batches = getattr(self, 'batches', 0) + 1
+        return (
+            None,
+            MockBatchStdout(cmd, 'stdout', self.finished),
+            MockBatchStdout(cmd, 'stderr', self.finished),
+        )
+
+
+class BatchCommandTestCase(TestCase):
+    """Tests for function ``robottelo.ssh.batch_command``."""
+
+    def setUp(self):
+        ssh._call_paramiko_sshclient = (  # pylint:disable=W0212
+            MockBatchSSHClient)
+        self.pool = ssh.SSHConnectionPool()
+        patcher = mock.patch('robottelo.ssh.connection_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_command(self):
+        """Every command gets its own output and return code"""
+        results = ssh.batch_command(
+            ['cat /etc/redhat-release', u'rpm -q satellite', 'ls'],
+            hostname='example.com'
+        )
+        self.assertEqual(len(results), 3)
+        for index, (result, cmd) in enumerate(zip(results, (
+                u'cat /etc/redhat-release', u'rpm -q satellite', u'ls'))):
+            self.assertIsInstance(result, ssh.SSHCommandResult)
+            self.assertEqual(result.stdout, [cmd])
+            self.assertEqual(result.stderr, u'err ' + cmd)
+            self.assertEqual(result.return_code, index)
+        with self.pool.connection('example.com') as connection:
+            self.assertEqual(connection.batches, 1)
+
+    def test_batch_command_output_format(self):
+        """The output format is applied to every command"""
+        results = ssh.batch_command(
+            ['a,b\n1,2', 'c\n3'], hostname='example.com', output_format='csv')
+        self.assertEqual(results[0].stdout, [{u'a': u'1', u'b': u'2'}])
+
+    def test_batch_command_empty(self):
+        """No round trip is done without commands"""
+        self.assertEqual(ssh.batch_command([], hostname='example.com'), [])
+        self.assertEqual(self.pool.stats()['misses'], 0)
+
+    def test_batch_command_interrupted(self):
+        """An error is raised if the batch does not finish"""
+        MockBatchSSHClient.finished = 1
+        self.addCleanup(setattr, MockBatchSSHClient, 'finished', None)
+        with self.assertRaises(paramiko.SSHException):
+            ssh.batch_command(['ls', 'ls'], hostname='example.com')
+
+
+class MockStreamChannel(object):
+    """A mock ``paramiko.Channel`` returning its output in chunks."""
+    def __init__(self, stdout, stderr=b'', ret=0, chunks=4):
+        self.stdout = [
+            stdout[i:i + chunks] for i in range(0, len(stdout), chunks)]
+        self.stderr = [stderr] if stderr else []
+        self.ret = ret
+        self.closed = False
+        self.recv_calls = 0
+
+    def recv(self, size):
+        self.recv_calls += 1
+        return self.stdout.pop(0) if self.stdout else b''
+
+    def recv_stderr(self, size):
+        return self.stderr.pop(0) if self.stderr else b''
+
+    def recv_exit_status(self):
+        return self.ret
+
+    def close(self):
+        self.closed = True
+
+
+class SSHCommandStreamTestCase(TestCase):
+    """Tests for class ``robottelo.ssh.SSHCommandStream``."""
+
+    def test_lines(self):
+        """Lines are cleaned up like execute_command does"""
+        channel = MockStreamChannel(
+            b'Id,Name\n[WARN] rails\n1,""\n2,\x1b[31mred\x1b[0m',
+            stderr=b'\x1b[31merror\x1b[0m',
+            ret=3
+        )
+        closed = []
+        stream = ssh.SSHCommandStream(channel, closed.append)
+        self.assertIsNone(stream.return_code)
+        self.assertEqual(
+            list(stream), [u'Id,Name', u'1,', u'2,red'])
+        self.assertEqual(stream.return_code, 3)
+        self.assertEqual(stream.stderr, u'error')
+        self.assertTrue(channel.closed)
+        self.assertEqual(closed, [False])
+
+    def test_lazy_read(self):
+        """The channel is read only as lines are requested"""
+        channel = MockStreamChannel(b'a\nb\nc\nd\ne\nf\n', chunks=2)
+        stream = ssh.SSHCommandStream(channel)
+        lines = iter(stream)
+        self.assertEqual(next(lines), u'a')
+        self.assertEqual(channel.recv_calls, 1)
+
+    def test_close_early(self):
+        """Closing the stream before the end closes the channel"""
+        channel = MockStreamChannel(b'a\nb\nc\n')
+        closed = []
+        stream = ssh.SSHCommandStream(channel, closed.append)
+        self.assertEqual(next(iter(stream)), u'a')
+        stream.close()
+        self.assertTrue(channel.closed)
+        self.assertEqual(closed, [False])
+        self.assertIsNone(stream.return_code)
+        self.assertEqual(list(stream), [])
+
+    def test_close_before_start(self):
+        """Closing a stream which was never read releases the connection"""
+        channel = MockStreamChannel(b'a\n')
+        closed = []
+        stream = ssh.SSHCommandStream(channel, closed.append)
+        stream.close()
+        stream.close()
+        self.assertTrue(channel.closed)
+        self.assertEqual(closed, [False])
+
+    def test_connection_error_discards(self):
+        """A connection error asks to discard the connection"""
+        channel = MockStreamChannel(b'a\n')
+        channel.recv = mock.Mock(side_effect=paramiko.SSHException)
+        closed = []
+        stream = ssh.SSHCommandStream(channel, closed.append)
+        with self.assertRaises(paramiko.SSHException):
+            list(stream)
+        self.assertEqual(closed, [True])
+
+    def test_command_stream(self):
+        """command_stream borrows a pooled connection until closed"""
+        ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
+        pool = ssh.SSHConnectionPool()
+        with mock.patch('robottelo.ssh.connection_pool', pool):
+            with mock.patch.object(MockSSHClient, 'exec_command') as execute:
+                channel = MockStreamChannel(b'a\nb\n')
+                execute.return_value = (None, mock.Mock(channel=channel), None)
+                stream = ssh.command_stream('ls', hostname='example.com')
+                self.assertEqual(pool.stats()['in_use'], 1)
+                self.assertEqual(list(stream), [u'a', u'b'])
+        execute.assert_called_once_with('ls')
+        self.assertEqual(pool.stats()['in_use'], 0)
+        self.assertEqual(pool.stats()['idle'], 1)
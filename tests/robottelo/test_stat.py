@@ -0,0 +1,140 @@
+"""Tests for :mod:`robottelo.performance.stat`."""
+import csv
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import threading
+import unittest2
+
+from robottelo.performance.stat import (
+    LatencyHistogram,
+    LatencyRecorder,
+    generate_stat_for_concurrent_thread,
+    generate_stat_for_pulp_sync,
+)
+
+
+class LatencyHistogramTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.performance.stat.LatencyHistogram`."""
+
+    def test_percentiles(self):
+        """Check the percentiles are within the histogram precision"""
+        rand = random.Random(0)
+        values = sorted(rand.expovariate(2) for _ in range(10000))
+        histogram = LatencyHistogram(values)
+        for percent in (0, 50, 90, 95, 99, 99.9, 100):
+            expected = values[int(percent * (len(values) - 1) / 100)]
+            self.assertAlmostEqual(
+                expected, histogram.percentile(percent),
+                delta=expected * 0.01)
+        self.assertEqual(values[0], histogram.percentile(0))
+        self.assertEqual(values[-1], histogram.percentile(100))
+        self.assertLess(len(histogram.counts), 1000)
+
+    def test_exact_stats(self):
+        """Check the count, min, max, mean and std are exact"""
+        histogram = LatencyHistogram([1, 2, 3, 4])
+        stats = histogram.stats()
+        self.assertEqual(4, stats['count'])
+        self.assertEqual(1, stats['min'])
+        self.assertEqual(4, stats['max'])
+        self.assertAlmostEqual(2.5, stats['mean'])
+        self.assertAlmostEqual(1.118034, stats['std'], places=6)
+        self.assertAlmostEqual(2, stats['median'], delta=0.02)
+
+    def test_empty(self):
+        """Check an empty histogram has no statistics"""
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.median)
+        self.assertIsNone(histogram.mean)
+        self.assertIsNone(histogram.std)
+        self.assertEqual([None, None], histogram.percentiles(90, 99))
+
+    def test_merge(self):
+        """Check merged histograms equal a single histogram"""
+        values = [0.001 * i for i in range(1, 1000)]
+        first = LatencyHistogram(values[::2])
+        second = pickle.loads(pickle.dumps(LatencyHistogram(values[1::2])))
+        merged = first.merge(second)
+        single = LatencyHistogram(values)
+        self.assertEqual(single.counts, merged.counts)
+        self.assertEqual(
+            single.percentiles(50, 99), merged.percentiles(50, 99))
+        self.assertEqual(single.count, merged.count)
+        self.assertAlmostEqual(single.mean, merged.mean)
+        self.assertAlmostEqual(single.std, merged.std)
+        with self.assertRaises(ValueError):
+            merged.merge(LatencyHistogram(precision=0.02))
+
+
+class LatencyRecorderTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.performance.stat.LatencyRecorder`."""
+
+    def test_threads(self):
+        """Check the latencies recorded by threads are merged"""
+        recorder = LatencyRecorder()
+
+        def record():
+            for i in range(1, 101):
+                recorder.record(i * 0.01)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        histogram = recorder.histogram()
+        self.assertEqual(400, histogram.count)
+        self.assertEqual(0.01, histogram.min)
+        self.assertEqual(1, histogram.max)
+        self.assertEqual(4, len(recorder._thread_histograms))
+
+    def test_windows(self):
+        """Check the latencies are grouped by time window"""
+        recorder = LatencyRecorder(window=10)
+        recorder.record(1, timestamp=recorder.start + 1)
+        recorder.record(2, timestamp=recorder.start + 25)
+        recorder.record(3, timestamp=recorder.start + 29)
+        windows = recorder.windows()
+        self.assertEqual([0, 20], [start for start, _ in windows])
+        self.assertEqual([1, 2], [window.count for _, window in windows])
+        self.assertEqual(3, recorder.histogram().count)
+
+
+class GenerateStatTestCase(unittest2.TestCase):
+    """Tests for the csv statistics functions."""
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.stat_file = os.path.join(tmpdir, 'stat.csv')
+
+    def read_rows(self):
+        with open(self.stat_file) as handler:
+            return list(csv.reader(handler))
+
+    def test_concurrent_thread(self):
+        """Check a row is written for each bucket"""
+        stat = generate_stat_for_concurrent_thread(
+            'thread-0', [1, 2, 3, 4, 5], self.stat_file, 2, 0)
+        self.assertEqual([0, 1], sorted(stat))
+        self.assertEqual((1, 1, 2, 0.5), stat[0])
+        rows = self.read_rows()
+        self.assertEqual(['thread-0'], rows[1])
+        self.assertEqual(
+            ['bucket', 'min', 'median', 'mean', 'max', 'std', '90%', '95%',
+             '99%'],
+            rows[2]
+        )
+        self.assertEqual(['1-2', '3-4'], [row[0] for row in rows[3:]])
+        self.assertIsNone(generate_stat_for_concurrent_thread(
+            'thread-1', [1], self.stat_file, 0, 0))
+
+    def test_pulp_sync(self):
+        """Check a row is written with the statistics"""
+        stat = generate_stat_for_pulp_sync(3, [2, 2, 2], self.stat_file)
+        self.assertEqual((2, 2, 2, 0), stat)
+        self.assertEqual(
+            [['test-3-threads', '2', '2', '2', '0.0']], self.read_rows())
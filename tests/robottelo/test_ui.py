@@ -1,7 +1,20 @@
+import errno
+import os
+import socket
 import six
 import unittest2
 
-from robottelo.ui.browser import browser
+from robottelo.ui.browser import (
+    BrowserPool,
+    DockerBrowser,
+    DockerBrowserError,
+    DockerBrowserPool,
+    browser,
+)
+from selenium.common.exceptions import (
+    NoAlertPresentException,
+    WebDriverException,
+)
 
 if six.PY2:
     import mock
@@ -67,3 +80,207 @@ class BrowserTestCase(unittest2.TestCase):
         self.settings.webdriver = 'remote'
         browser()
         self.remote.assert_called_once_with()
+
+
+class BrowserPoolTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.ui.browser.BrowserPool`."""
+
+    def setUp(self):
+        patcher = mock.patch('robottelo.ui.browser.settings')
+        self.settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.settings.browser = 'selenium'
+        self.settings.browser_max_uses = 2
+        self.settings.server.get_url.return_value = 'https://example.com'
+        patcher = mock.patch('robottelo.ui.browser.browser')
+        self.browser = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.browser.side_effect = self.new_driver
+
+    @staticmethod
+    def new_driver():
+        driver = mock.Mock()
+        driver.window_handles = ['main']
+        driver.switch_to.alert.dismiss.side_effect = NoAlertPresentException
+        driver.find_elements.return_value = [mock.Mock()]
+        return driver
+
+    def test_reuse(self):
+        """Check a session is reset and reused up to max uses"""
+        pool = BrowserPool()
+        first = pool.acquire()
+        first.maximize_window.assert_called_once_with()
+        pool.release(first)
+        self.assertIs(first, pool.acquire())
+        first.delete_all_cookies.assert_called_once_with()
+        pool.release(first)
+        first.quit.assert_called_once_with()
+        second = pool.acquire()
+        self.assertIsNot(first, second)
+        stats = pool.stats()
+        self.assertEqual(2, stats['created'])
+        self.assertEqual(3, stats['acquired'])
+        pool.release(second)
+        pool.close_all()
+        second.quit.assert_called_once_with()
+
+    def test_reset_windows(self):
+        """Check the extra windows are closed on reset"""
+        driver = self.new_driver()
+        driver.window_handles = ['main', 'popup']
+        BrowserPool.reset(driver)
+        driver.close.assert_called_once_with()
+        driver.switch_to.window.assert_called_with('main')
+
+    def test_recycle(self):
+        """Check a session which can not be reset is replaced"""
+        pool = BrowserPool()
+        first = pool.acquire()
+        pool.release(first)
+        first.delete_all_cookies.side_effect = WebDriverException
+        second = pool.acquire()
+        self.assertIsNot(first, second)
+        first.quit.assert_called_once_with()
+        self.assertEqual(1, pool.stats()['recycled'])
+
+    def test_recycle_crashed(self):
+        """Check a session whose browser crashed is replaced"""
+        pool = BrowserPool()
+        first = pool.acquire()
+        pool.release(first)
+        type(first).window_handles = mock.PropertyMock(
+            side_effect=socket.error(errno.ECONNREFUSED, 'refused'))
+        first.quit.side_effect = socket.error(errno.ECONNREFUSED, 'refused')
+        second = pool.acquire()
+        self.assertIsNot(first, second)
+        first.quit.assert_called_once_with()
+        self.assertEqual(1, pool.stats()['recycled'])
+
+    def test_logged_in(self):
+        """Check a session still logged in after reset is replaced"""
+        pool = BrowserPool()
+        first = pool.acquire()
+        pool.release(first)
+        first.find_elements.return_value = []
+        self.assertIsNot(first, pool.acquire())
+
+    def test_saucelabs(self):
+        """Check sessions are not reused on saucelabs"""
+        self.settings.browser = 'saucelabs'
+        pool = BrowserPool()
+        first = pool.acquire()
+        pool.release(first)
+        first.quit.assert_called_once_with()
+        self.assertIsNot(first, pool.acquire())
+
+    def test_close_all_docker(self):
+        """Check the containers of the idle sessions are removed on close"""
+        self.settings.browser = 'docker'
+        with mock.patch('robottelo.ui.browser.docker_browser_pool') as pool:
+            browser_pool = BrowserPool()
+            driver = browser_pool.acquire()
+            browser_pool.release(driver)
+            browser_pool.close_all()
+        pool.release.assert_called_once_with(
+            pool.acquire.return_value, stop=True)
+
+
+class DockerBrowserPoolTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.ui.browser.DockerBrowserPool`."""
+
+    def setUp(self):
+        patcher = mock.patch('robottelo.ui.browser.DockerBrowser')
+        self.docker_browser = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.docker_browser.side_effect = lambda name: mock.Mock(
+            name=name, **{'is_healthy.return_value': True})
+        self.pool = DockerBrowserPool(size=2)
+        self.addCleanup(self.pool.close_all)
+
+    def warm(self):
+        for thread in self.pool.warm():
+            thread.join()
+
+    def test_acquire_release(self):
+        """Check the containers are started in advance and restarted"""
+        self.warm()
+        self.assertEqual(2, self.docker_browser.call_count)
+        first = self.pool.acquire()
+        first.start.assert_called_once_with()
+        second = self.pool.acquire()
+        self.assertIsNot(first, second)
+        with mock.patch.object(self.pool, '_background') as background:
+            self.pool.release(first)
+        background.assert_called_once_with(self.pool._recycle, first)
+        self.pool._recycle(first)
+        first.restart.assert_called_once_with()
+        self.assertIs(first, self.pool.acquire(timeout=0))
+        self.pool.close_all()
+        second.stop.assert_called_once_with()
+
+    def test_replace(self):
+        """Check a container which can not be restarted is replaced"""
+        self.warm()
+        first = self.pool.acquire()
+        self.pool.acquire()
+        first.restart.side_effect = DockerBrowserError
+        self.pool._recycle(first)
+        first.stop.assert_called_once_with()
+        replacement = self.pool.acquire(timeout=0)
+        self.assertIsNot(first, replacement)
+        self.assertEqual(3, self.docker_browser.call_count)
+
+    def test_unhealthy(self):
+        """Check unhealthy containers are not handed out"""
+        self.pool.size = 1
+        self.warm()
+        self.pool._idle.queue[0].is_healthy.return_value = False
+        with mock.patch.object(self.pool, '_background') as background:
+            with self.assertRaises(DockerBrowserError):
+                self.pool.acquire(timeout=0)
+        self.assertEqual(self.pool._recycle, background.call_args[0][0])
+
+    def test_closed(self):
+        """Check no container is started or recycled once closed"""
+        self.warm()
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        with mock.patch.object(self.pool, '_background') as background:
+            self.pool.release(first, stop=True)
+        background.assert_not_called()
+        first.stop.assert_called_once_with()
+        self.pool.close_all()
+        second.stop.assert_called_once_with()
+        self.pool._recycle(second)
+        second.restart.assert_not_called()
+        self.pool._add()
+        self.assertEqual(2, self.docker_browser.call_count)
+        self.assertTrue(self.pool._idle.empty())
+
+    def test_start_error(self):
+        """Check an error starting a container is raised on acquire"""
+        self.docker_browser.side_effect = DockerBrowserError
+        self.pool.size = 1
+        self.warm()
+        with mock.patch.object(self.pool, '_background') as background:
+            with self.assertRaises(DockerBrowserError):
+                self.pool.acquire(timeout=0)
+        background.assert_called_once_with(self.pool._add)
+
+
+class DockerBrowserTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.ui.browser.DockerBrowser`."""
+
+    def test_container_name(self):
+        """Check the container is created with the pool name"""
+        with mock.patch('robottelo.ui.browser.docker') as docker:
+            with mock.patch.dict(os.environ, {'PYTEST_XDIST_WORKER': 'gw3'}):
+                pool = DockerBrowserPool(size=1)
+                with mock.patch('robottelo.ui.browser.Remote'):
+                    pool._add()
+                    docker_browser = pool._idle.get(timeout=0)
+        self.assertIsInstance(docker_browser, DockerBrowser)
+        client = docker.Client.return_value
+        name = client.create_container.call_args[1]['name']
+        self.assertTrue(name.startswith('robottelo-selenium-gw3-'))
+        self.assertEqual(name, docker_browser.name)
@@ -0,0 +1,102 @@
+"""Tests for :mod:`robottelo.ui.base`."""
+import six
+import unittest2
+
+from robottelo.ui.base import AJAX_IDLE_SCRIPT, QUERY_SCRIPT, Base
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+if six.PY2:
+    import mock
+else:
+    from unittest import mock
+
+
+class WaitForAjaxTestCase(unittest2.TestCase):
+    """Tests for :meth:`robottelo.ui.base.Base.wait_for_ajax`."""
+
+    def setUp(self):
+        self.browser = mock.Mock()
+        self.browser.ajax_wait_stats = {'count': 0, 'time': 0.0}
+        self.base = Base(self.browser)
+
+    def test_idle(self):
+        """Check the page is waited with a single script call"""
+        self.browser.execute_async_script.return_value = True
+        self.base.wait_for_ajax()
+        self.base.wait_for_ajax(timeout=10)
+        self.browser.execute_async_script.assert_called_with(
+            AJAX_IDLE_SCRIPT, 10000)
+        self.browser.set_script_timeout.assert_called_once_with(35)
+        self.browser.execute_script.assert_not_called()
+        self.assertEqual(2, self.browser.ajax_wait_stats['count'])
+
+    def test_timeout(self):
+        """Check a timeout is raised if the page is not idle in time"""
+        self.browser.execute_async_script.return_value = False
+        with self.assertRaises(TimeoutException):
+            self.base.wait_for_ajax()
+        self.browser.execute_async_script.side_effect = TimeoutException
+        with self.assertRaises(TimeoutException):
+            self.base.wait_for_ajax()
+        self.assertEqual(2, self.browser.ajax_wait_stats['count'])
+
+    def test_fallback(self):
+        """Check the requests are polled if the script can not run"""
+        self.browser.execute_async_script.side_effect = WebDriverException
+        self.browser.execute_script.return_value = 0
+        self.base.wait_for_ajax()
+        self.assertEqual(2, self.browser.execute_script.call_count)
+        self.assertEqual(1, self.browser.ajax_wait_stats['count'])
+
+
+class QueryTestCase(unittest2.TestCase):
+    """Tests for :meth:`robottelo.ui.base.Base.query`."""
+
+    def setUp(self):
+        self.browser = mock.Mock()
+        self.browser.execute_async_script.return_value = True
+        self.base = Base(self.browser)
+
+    def test_single_call(self):
+        """Check the elements are described with a single script call"""
+        self.browser.execute_script.return_value = [
+            {'element': 'a', 'displayed': True},
+            {'element': 'b', 'displayed': False},
+        ]
+        self.assertEqual(['a'], self.base.find_elements((By.ID, 'my"id')))
+        self.browser.execute_script.assert_called_once_with(
+            QUERY_SCRIPT, 'css', '[id="my\\"id"]', [], {}, None)
+        self.base.query(
+            (By.XPATH, '//tr'),
+            attributes=('value',),
+            children={'box': (By.CLASS_NAME, 'box')},
+        )
+        self.browser.execute_script.assert_called_with(
+            QUERY_SCRIPT, 'xpath', '//tr', ['value'],
+            {'box': ('css', '.box')}, None)
+
+    def test_fallback(self):
+        """Check locators the script can not resolve are queried element by
+        element
+        """
+        element = mock.Mock(text=u'Link')
+        element.is_displayed.return_value = True
+        element.get_attribute.return_value = u'/path'
+        element.find_elements.return_value = []
+        self.browser.find_elements.return_value = [element]
+        self.assertEqual(
+            [{
+                'element': element,
+                'displayed': True,
+                'text': u'Link',
+                'attributes': {'href': u'/path'},
+                'children': {'child': None},
+            }],
+            self.base.query(
+                (By.LINK_TEXT, 'Link'),
+                attributes=('href',),
+                children={'child': (By.XPATH, 'span')},
+            )
+        )
+        self.browser.execute_script.assert_not_called()
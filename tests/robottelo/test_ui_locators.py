@@ -1,6 +1,15 @@
 """Unit tests for :mod:`robottelo.ui.locators`."""
+import os
+import pickle
+import tempfile
 import unittest2
+from robottelo.ui.locators import base, common, menu, registry, tab
 from robottelo.ui.locators.model import Locator, LocatorDict, By
+from robottelo.ui.locators.registry import (
+    CompiledLocator,
+    LocatorError,
+    LocatorRegistry,
+)
 
 
 class LocatorTestCase(unittest2.TestCase):
@@ -193,3 +202,152 @@ class LocatorTestCase(unittest2.TestCase):
         self.assertEqual(first.second[1], '//foo/bar/blaz')
         self.assertEqual(first['second.naz'][1], '//second/naz')
         self.assertEqual(first['second.zaz'][1], '//zaz')
+
+
+class LocatorRegistryTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.ui.locators.registry.LocatorRegistry`."""
+
+    def setUp(self):
+        self.locators = LocatorRegistry({
+            'menu.home': (By.XPATH, "//a[@class='home']"),
+            'menu.item': (By.XPATH, "//a[@id='%s']"),
+            'menu.item.button': (By.ID, 'button_%s'),
+            'spinner': (By.ID, 'spinner'),
+        })
+
+    def test_lazy_compile(self):
+        """Check the definitions are compiled on first lookup"""
+        self.assertIsNone(self.locators._compiled)
+        self.assertEqual(4, len(self.locators))
+        self.assertIsNone(self.locators._compiled)
+        self.locators['spinner']
+        self.assertIsNotNone(self.locators._compiled)
+
+    def test_lookup(self):
+        """Check all the access forms return the same locator"""
+        locator = self.locators['menu.home']
+        self.assertIsInstance(locator, CompiledLocator)
+        self.assertIs(locator, self.locators.menu.home)
+        self.assertIs(locator, self.locators['menu']['home'])
+        self.assertIs(locator, self.locators.menu['home'])
+        self.assertEqual((By.XPATH, "//a[@class='home']"), locator)
+        self.assertEqual(By.XPATH, locator._strategy)
+        self.assertEqual("//a[@class='home']", locator._value)
+        strategy, value = locator
+        self.assertEqual(By.XPATH, strategy)
+        self.assertIn('home', self.locators.menu)
+        self.assertIn('menu.home', self.locators)
+        self.assertNotIn('menu.bazinga', self.locators)
+
+    def test_children_attributes(self):
+        """Check the compiled children are attributes of their parent"""
+        self.locators['spinner']
+        self.assertIs(vars(self.locators)['menu'], self.locators['menu'])
+        menu = self.locators.menu
+        self.assertIs(vars(menu)['item'], self.locators['menu.item'])
+        self.assertIs(
+            vars(menu.item)['button'], self.locators['menu.item.button'])
+
+    def test_unknown_locator(self):
+        """Check unknown locators raise instead of creating nodes"""
+        with self.assertRaises(KeyError):
+            self.locators['menu.bazinga']
+        with self.assertRaises(KeyError):
+            self.locators.menu.bazinga
+        self.assertFalse(hasattr(self.locators, '_bazinga'))
+        self.assertIsNone(self.locators.get('bazinga'))
+
+    def test_locator_and_node(self):
+        """Check a locator can also contain other locators"""
+        item = self.locators.menu.item
+        self.assertEqual((By.XPATH, "//a[@id='%s']"), item)
+        self.assertEqual(By.XPATH, item[0])
+        self.assertIs(self.locators['menu.item.button'], item.button)
+        self.assertIs(item.button, item['button'])
+
+    def test_interpolation(self):
+        """Check the templates interpolation returns a new locator"""
+        locator = self.locators.menu.item % 'users'
+        self.assertIsInstance(locator, CompiledLocator)
+        self.assertEqual((By.XPATH, "//a[@id='users']"), locator)
+        self.assertEqual(
+            (By.ID, 'button_users'), self.locators.menu.item.button % 'users')
+        self.assertEqual(
+            pickle.loads(pickle.dumps(locator)), locator)
+
+    def test_invalid_definitions(self):
+        """Check the invalid definitions are rejected on compile"""
+        for definitions in (
+                {'foo': (By.XPATH,)},
+                {'foo': 'xpath'},
+                {'foo': ('bar', '//foo')},
+                {'foo..bar': (By.XPATH, '//foo')},
+                {'items.foo': (By.XPATH, '//foo')}):
+            with self.assertRaises(LocatorError):
+                LocatorRegistry(definitions)['foo']
+
+    def test_placeholders(self):
+        """Check the placeholder values match the template"""
+        self.assertIsNone(registry.placeholders('//div'))
+        self.assertIsNone(registry.placeholders('//div[.="100%%"]'))
+        self.assertEqual((u'x', 1), registry.placeholders('//%s[%d]'))
+        self.assertEqual(
+            {'name': u'x'}, registry.placeholders('//a[@id="%(name)s"]'))
+
+    @unittest2.skipIf(registry.etree is None, 'lxml is not installed')
+    def test_check_definitions(self):
+        """Check the invalid XPath expressions are reported"""
+        errors = registry.check_definitions({
+            'valid': (By.XPATH, '//a[@id="%s"][%d]'),
+            'invalid': (By.XPATH, '//a[@id="%s"'),
+            'id': (By.ID, '//a['),
+        })
+        self.assertEqual(1, len(errors))
+        self.assertTrue(errors[0].startswith('invalid: '))
+
+    def test_check_source(self):
+        """Check the keys defined twice are reported"""
+        handle, path = tempfile.mkstemp(suffix='.py')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w') as handler:
+            handler.write(
+                'locators = LocatorRegistry({\n'
+                '    "foo": (By.ID, "foo"),\n'
+                '    "bar": (By.ID, "bar"),\n'
+                '    "foo": (By.ID, "baz"),\n'
+                '})\n'
+            )
+        errors = registry.check_source(path)
+        self.assertEqual(1, len(errors))
+        self.assertIn(':4: duplicate locator foo, first defined on line 2',
+                      errors[0])
+
+
+class LocatorDefinitionsTestCase(unittest2.TestCase):
+    """Checks the UI locator definitions."""
+
+    modules = (base, common, menu, tab)
+
+    def test_no_duplicates(self):
+        """Check no locator is defined twice"""
+        for module in self.modules:
+            path = module.__file__
+            if path.endswith('.pyc'):
+                path = path[:-1]
+            self.assertEqual([], registry.check_source(path))
+
+    def test_compile(self):
+        """Check all the locators compile"""
+        for module in self.modules:
+            for value in vars(module).values():
+                if isinstance(value, LocatorRegistry):
+                    registry.compile_locators(value.definitions)
+
+    @unittest2.skipIf(registry.etree is None, 'lxml is not installed')
+    def test_xpath(self):
+        """Check all the XPath expressions compile"""
+        for module in self.modules:
+            for value in vars(module).values():
+                if isinstance(value, LocatorRegistry):
+                    self.assertEqual(
+                        [], registry.check_definitions(value.definitions))
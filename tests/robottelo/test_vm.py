@@ -2,7 +2,12 @@
 import six
 import unittest2
 from robottelo import ssh
-from robottelo.vm import VirtualMachine, VirtualMachineError
+from robottelo.vm import (
+    VirtualMachine,
+    VirtualMachineError,
+    VirtualMachinePool,
+    create_vms,
+)
 
 if six.PY2:
     from mock import call, patch
@@ -32,12 +37,13 @@ class VirtualMachineTestCase(unittest2.TestCase):
         self.settings.clients.provisioning_server = self.provisioning_server
 
     @patch('time.sleep')
+    @patch.object(VirtualMachine, '_ssh_ready', return_value=True)
     @patch('robottelo.ssh.command', side_effect=[
         ssh.SSHCommandResult(),
         ssh.SSHCommandResult(stdout=['(192.168.0.1)']),
     ])
     def test_dont_create_if_already_created(
-            self, ssh_command, sleep):
+            self, ssh_command, ssh_ready, sleep):
         """Check if the creation steps does run more than one"""
         self.configure_provisoning_server()
         vm = VirtualMachine()
@@ -51,7 +57,43 @@ class VirtualMachineTestCase(unittest2.TestCase):
             vm.create()
         self.assertEqual(vm.ip_addr, '192.168.0.1')
         self.assertEqual(ssh_command.call_count, 2)
-        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(ssh_ready.call_count, 1)
+        self.assertEqual(sleep.call_count, 0)
+
+    @patch('time.sleep')
+    @patch.object(VirtualMachine, '_ssh_ready', side_effect=[False, True])
+    @patch('robottelo.ssh.command', side_effect=[
+        ssh.SSHCommandResult(),
+        ssh.SSHCommandResult(return_code=1),
+        ssh.SSHCommandResult(return_code=1),
+        ssh.SSHCommandResult(return_code=1),
+        ssh.SSHCommandResult(stdout=['(192.168.0.1)']),
+    ])
+    def test_create_polls_readiness(self, ssh_command, ssh_ready, sleep):
+        """Check the machine address and SSH are polled with backoff"""
+        self.configure_provisoning_server()
+        vm = VirtualMachine()
+        vm.create()
+        self.assertEqual(vm.ip_addr, '192.168.0.1')
+        self.assertEqual(
+            [call(1), call(2), call(4), call(1)], sleep.call_args_list)
+
+    @patch('time.sleep')
+    @patch('robottelo.ssh.command', side_effect=lambda cmd, *args, **kwargs: (
+        ssh.SSHCommandResult(return_code=1 if 'ping' in cmd else 0)))
+    def test_create_timeout(self, ssh_command, sleep):
+        """Check a machine which does not boot is destroyed"""
+        self.configure_provisoning_server()
+        vm = VirtualMachine(image_dir='/opt/robottelo/images')
+        with patch.object(vm, 'boot_timeout', 0):
+            with self.assertRaises(VirtualMachineError):
+                vm.create()
+        self.assertFalse(vm._created)
+        self.assertIn(
+            call(u'virsh undefine {0}'.format(vm.hostname),
+                 hostname=self.provisioning_server),
+            ssh_command.call_args_list
+        )
 
     def test_invalid_distro(self):
         """Check if an exception is raised if an invalid distro is passed"""
@@ -113,3 +155,69 @@ class VirtualMachineTestCase(unittest2.TestCase):
         ]
 
         self.assertListEqual(ssh_command.call_args_list, ssh_command_args_list)
+
+
+class VirtualMachinePoolTestCase(unittest2.TestCase):
+    """Tests for :class:`robottelo.vm.VirtualMachinePool` and
+    :func:`robottelo.vm.create_vms`.
+    """
+
+    def setUp(self):
+        super(VirtualMachinePoolTestCase, self).setUp()
+        patcher = patch('robottelo.vm.settings', spec=True)
+        settings = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings.clients.provisioning_server = 'provisioning.example.com'
+        for method in ('create', 'destroy', 'run'):
+            patcher = patch.object(VirtualMachine, method, autospec=True)
+            setattr(self, method, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_create_vms(self):
+        """Check the machines are created"""
+        vms = create_vms(3, distro='rhel68')
+        self.assertEqual(3, len(vms))
+        self.assertEqual(3, self.create.call_count)
+        self.assertEqual(set(vms), set(
+            args[0][0] for args in self.create.call_args_list))
+        self.assertEqual('rhel68', vms[0].distro)
+        self.assertFalse(self.destroy.called)
+
+    def test_create_vms_error(self):
+        """Check all the machines are destroyed if one fails"""
+        def create(vm):
+            if self.create.call_count == 2:
+                raise VirtualMachineError('failed')
+
+        self.create.side_effect = create
+        with self.assertRaises(VirtualMachineError):
+            create_vms(3)
+        self.assertEqual(3, self.destroy.call_count)
+
+    def test_pool(self):
+        """Check the machines are created in advance and reused"""
+        prepared = []
+        pool = VirtualMachinePool(size=2, prepare=prepared.append)
+        self.assertEqual(2, pool.fill())
+        self.assertEqual(2, len(prepared))
+        with pool.vm(reuse=True) as vm:
+            self.assertIn(vm, prepared)
+        self.assertEqual(2, self.create.call_count)
+        self.run.assert_called_with(vm, u'subscription-manager clean')
+        with pool.vm() as vm:
+            pass
+        self.destroy.assert_called_once_with(vm)
+        self.assertEqual(1, pool.fill())
+        pool.close()
+        self.assertEqual(3, self.destroy.call_count)
+
+    def test_pool_empty(self):
+        """Check a machine is created when the pool is empty and destroyed
+        when the test fails
+        """
+        pool = VirtualMachinePool(size=1)
+        with self.assertRaises(ValueError):
+            with pool.vm(reuse=True) as vm:
+                raise ValueError
+        self.assertEqual(1, self.create.call_count)
+        self.destroy.assert_called_once_with(vm)